@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк отрисовки доски: прямое рисование каждой плитки, сборка из кэша плиток,
+дорисовка одной новой строки на закэшированном холсте игры,
+а также размер и время кодирования для каждого формата вывода
+"""
+
+import time
+from io import BytesIO
+
+from PIL import Image, ImageDraw
+
+from wordly_bot import render
+from wordly_bot.config import ATTEMPTS
+
+MARKS = ("correct", "present", "absent")
+
+
+def make_attempts(rows: int, length: int):
+    letters = render.ALPHABET
+    return [
+        (
+            "".join(letters[(r * length + c) % len(letters)] for c in range(length)),
+            [MARKS[(r + c) % 3] for c in range(length)],
+        )
+        for r in range(rows)
+    ]
+
+
+def draw_direct(attempts, word_length: int):
+    """Старый способ: шрифт ищется на каждый рендер, каждая плитка рисуется заново"""
+    render._load_cyrillic_font.cache_clear()
+    tile, gap, padding = render.TILE, render.GAP, render.PADDING
+    width = padding * 2 + word_length * tile + (word_length - 1) * gap
+    height = padding * 2 + ATTEMPTS * tile + (ATTEMPTS - 1) * gap
+    img = Image.new("RGB", (width, height), render.BACKGROUND_COLOR)
+    draw = ImageDraw.Draw(img)
+    font = render._load_cyrillic_font(int(tile * 0.5))
+    for r in range(ATTEMPTS):
+        for c in range(word_length):
+            x0 = padding + c * (tile + gap)
+            y0 = padding + r * (tile + gap)
+            if r < len(attempts):
+                ch, fill = attempts[r][0][c], render.COLORS[attempts[r][1][c]]
+            else:
+                ch, fill = "", render.COLORS["empty"]
+            draw.rectangle([x0, y0, x0 + tile, y0 + tile], fill=fill)
+            draw.rectangle([x0, y0, x0 + tile, y0 + tile], outline=render.BORDER_COLOR, width=2)
+            if ch:
+                bbox = draw.textbbox((0, 0), ch, font=font)
+                tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
+                draw.text((x0 + (tile - tw) // 2, y0 + (tile - th) // 2 - 2), ch, font=font, fill=render.TEXT_COLOR)
+    return img
+
+
+def draw_sprites(attempts, word_length: int):
+    img = render._empty_board(render.TILE, word_length).copy()
+    for r, (guess, marks) in enumerate(attempts):
+        for c in range(word_length):
+            xy = (render.PADDING + c * (render.TILE + render.GAP), render.PADDING + r * (render.TILE + render.GAP))
+            img.paste(render._tile_sprite(render.TILE, guess[c], marks[c]), xy)
+    return img
+
+
+def draw_incremental(attempts, word_length: int):
+    """Холст игры уже в кэше, дорисовывается только последняя строка"""
+    render.CANVAS_CACHE.drop(0)
+    render.render_attempts_image(attempts[:-1], word_length, chat_id=0)
+    entry = render.CANVAS_CACHE.take(0)
+    start = time.perf_counter()
+    img = entry[0]
+    render._paint_rows(img, render.TILE, word_length, attempts, len(attempts) - 1)
+    return time.perf_counter() - start
+
+
+def encode(img) -> int:
+    bio = BytesIO()
+    img.save(bio, format="PNG")
+    return bio.tell()
+
+
+def bench(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    repeat = 50
+    render.warm_tile_cache()
+    print(f"Плиток в кэше: {len(render._tile_cache)}")
+    print(
+        f"{'длина':>5} {'строк':>5} {'рисование, мс':>14} {'плитки, мс':>11} "
+        f"{'ускорение':>10} {'+строка, мс':>12} {'PNG, мс':>8}"
+    )
+    for length in (5, 9):
+        for rows in (1, 3, ATTEMPTS):
+            attempts = make_attempts(rows, length)
+            direct = bench(lambda: draw_direct(attempts, length), repeat)
+            sprites = bench(lambda: draw_sprites(attempts, length), repeat)
+            img = draw_sprites(attempts, length)
+            png = bench(lambda: encode(img), repeat)
+            incremental = sum(draw_incremental(attempts, length) for _ in range(repeat)) / repeat * 1000
+            print(
+                f"{length:>5} {rows:>5} {direct:>14.2f} {sprites:>11.2f} "
+                f"{direct / sprites:>9.1f}x {incremental:>12.2f} {png:>8.2f}"
+            )
+    bench_formats(repeat // 5)
+
+
+def bench_formats(repeat: int):
+    print()
+    print(f"{'формат':>8} {'плитка':>6} {'длина':>5} {'строк':>5} {'байт':>8} {'кодирование, мс':>16}")
+    for fmt in render.FORMATS:
+        for tile in (48, render.TILE):
+            for length in (5, 9):
+                for rows in (1, ATTEMPTS):
+                    attempts = make_attempts(rows, length)
+                    img = render._empty_board(tile, length, render._image_mode(fmt)).copy()
+                    render._paint_rows(img, tile, length, attempts, 0)
+                    size = len(render.encode_image(img, fmt))
+                    ms = bench(lambda: render.encode_image(img, fmt), repeat)
+                    print(f"{fmt:>8} {tile:>6} {length:>5} {rows:>5} {size:>8} {ms:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
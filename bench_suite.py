@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Набор микробенчмарков горячих путей бота:
+- score_guess для всех длин, с повторяющимися буквами и без
+- load_words, загрузка всех словарей и холодный импорт бота
+- проверка хода (check_guess)
+- каждая функция db.py на заранее заполненной базе
+- render_attempts_image на каждом заполнении доски
+- on_text целиком на поддельных Update (запросы к Telegram не уходят)
+
+Результаты сохраняются в JSON. С --baseline прогон сравнивается с сохранённым,
+замедление больше --threshold считается регрессией (код выхода 1).
+
+    python bench_suite.py -o bench.json
+    python bench_suite.py --save-baseline bench_baseline.json
+    python bench_suite.py --baseline bench_baseline.json --threshold 0.2 --only db.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import datetime
+import inspect
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+WORK_DIR = tempfile.mkdtemp(prefix="slovli-bench-")
+os.environ.setdefault("SLOVLI_DB_FILE", os.path.join(WORK_DIR, "bench.db"))
+os.environ.setdefault("SLOVLI_METRICS_PORT", "0")
+os.environ.setdefault("SLOVLI_HEALTH_PORT", "0")
+
+import telegram
+from telegram import Update
+
+from wordly_bot import db, handlers, render
+from wordly_bot.config import ATTEMPTS, METRICS_ENABLED, WORDS_FILE
+from wordly_bot.game import load_words, normalize_word, score_guess
+from wordly_bot.main import load_dictionaries
+
+LENGTHS = range(4, 10)
+# Раунд длится не меньше MIN_ROUND секунд: короткие операции повторяются внутри раунда
+MIN_ROUND = 0.02
+SEED = 42
+
+# Бенчмарк: имя, функция (обычная или async) и сколько операций она делает за вызов
+Bench = Tuple[str, Callable, int]
+
+
+# --- Замеры ---
+
+
+def measure(fn: Callable, ops: int, rounds: int, loop: asyncio.AbstractEventLoop) -> Dict[str, float]:
+    if inspect.iscoroutinefunction(fn):
+
+        async def batch(n: int) -> float:
+            started = time.perf_counter()
+            for _ in range(n):
+                await fn()
+            return time.perf_counter() - started
+
+        def run(n: int) -> float:
+            return loop.run_until_complete(batch(n))
+
+    else:
+
+        def run(n: int) -> float:
+            started = time.perf_counter()
+            for _ in range(n):
+                fn()
+            return time.perf_counter() - started
+
+    inner = 1
+    while run(inner) < MIN_ROUND and inner < 1 << 20:
+        inner *= 2
+    per_op = sorted(run(inner) / (inner * ops) * 1e6 for _ in range(rounds))
+    return {
+        "median_us": statistics.median(per_op),
+        "min_us": per_op[0],
+        "p95_us": per_op[min(len(per_op) - 1, int(len(per_op) * 0.95))],
+        "rounds": rounds,
+        "inner": inner,
+        "ops": ops,
+    }
+
+
+# --- Игра и словарь ---
+
+
+def game_benches() -> Iterator[Bench]:
+    rng = random.Random(SEED)
+    for length in LENGTHS:
+        words = handlers.WORDS_BY_LENGTH.get(length) or []
+        if len(words) < 2:
+            continue
+        pairs = [(rng.choice(words), rng.choice(words)) for _ in range(200)]
+        # Повторяющиеся буквы: самый дорогой случай разметки (present/absent по остатку частот)
+        repeated = [w for w in words if len(set(w)) < length] or words
+        dup_pairs = [(rng.choice(repeated), rng.choice(repeated)) for _ in range(200)]
+        yield f"score_guess.{length}.random", lambda p=pairs: [score_guess(g, a) for g, a in p], len(pairs)
+        yield f"score_guess.{length}.repeated", lambda p=dup_pairs: [score_guess(g, a) for g, a in p], len(dup_pairs)
+
+    words5 = handlers.WORDS_BY_LENGTH.get(5) or []
+    samples = [rng.choice(words5) for _ in range(100)] if words5 else []
+    guesses = (
+        samples  # в словаре
+        + ["ЪЪЪЪЪ"] * 30  # не в словаре: полный проход проверки
+        + ["ДЛИННОЕСЛОВО"] * 20  # не та длина
+    )
+    raw = [w.lower().replace("Е", "ё") + "!" for w in samples]
+    yield "validate.check_guess", lambda: [handlers.check_guess(g, 5) for g in guesses], len(guesses)
+    yield "validate.normalize_word", lambda: [normalize_word(w) for w in raw], len(raw)
+
+
+def quiet(fn: Callable) -> Callable:
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+
+    return run
+
+
+def startup_benches() -> Iterator[Bench]:
+    for length in (5, 9):
+        yield f"load_words.{length}", lambda n=length: load_words(WORDS_FILE, n, min_count=1), 1
+    yield "startup.load_dictionaries", quiet(load_dictionaries), 1
+
+
+def cold_import(rounds: int) -> Dict[str, float]:
+    """Холодный импорт бота в отдельном процессе: конфиг, PTB, Pillow, все модули"""
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    times = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", "import wordly_bot.main"],
+            env=env,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        times.append((time.perf_counter() - started) * 1e6)
+    times.sort()
+    return {
+        "median_us": statistics.median(times),
+        "min_us": times[0],
+        "p95_us": times[-1],
+        "rounds": rounds,
+        "inner": 1,
+        "ops": 1,
+    }
+
+
+# --- База ---
+
+
+def populate(users: int, chats: int) -> None:
+    """Заполнить базу так, чтобы индексы и страницы были как у живого бота"""
+    rng = random.Random(SEED)
+    con = db.db()
+    now = int(time.time())
+    with con:
+        con.executemany(
+            "INSERT OR REPLACE INTO stats(user_id, played, wins, current_streak, max_streak, dist3, dist4)"
+            " VALUES (?,?,?,?,?,?,?)",
+            [
+                (uid, played, wins, rng.randint(0, 5), rng.randint(0, 20), wins // 2, wins - wins // 2)
+                for uid in range(1, users + 1)
+                for played in [rng.randint(1, 300)]
+                for wins in [rng.randint(0, played)]
+            ],
+        )
+        con.executemany(
+            "INSERT OR REPLACE INTO users(user_id, username, first_name, last_name, last_seen) VALUES (?,?,?,?,?)",
+            [(uid, f"user{uid}", f"Игрок {uid}", None, now) for uid in range(1, users + 1)],
+        )
+        con.executemany(
+            "INSERT OR REPLACE INTO chat_stats(chat_id, played, wins, current_streak, max_streak) VALUES (?,?,?,?,?)",
+            [(-cid, 50, 30, 3, 9) for cid in range(1, chats + 1)],
+        )
+        con.executemany(
+            "INSERT OR REPLACE INTO chat_user_wins(chat_id, user_id, name, wins) VALUES (?,?,?,?)",
+            [(-cid, uid, f"Игрок {uid}", rng.randint(1, 40)) for cid in range(1, chats + 1) for uid in range(1, 11)],
+        )
+        con.executemany(
+            "INSERT OR REPLACE INTO chat_settings(chat_id, word_length, created_at) VALUES (?,?,?)",
+            [(-cid, 5, now) for cid in range(1, chats + 1)],
+        )
+        con.executemany(
+            "INSERT OR REPLACE INTO games(chat_id, answer, attempts_json, status, word_length, created_at)"
+            " VALUES (?,?,?,?,?,?)",
+            [(-cid, "СЛОВО", "[]", "IN_PROGRESS", 5, now) for cid in range(1, chats + 1)],
+        )
+        con.executemany(
+            "INSERT OR REPLACE INTO moderators(user_id, username, added_by, added_at) VALUES (?,?,?,?)",
+            [(uid, f"user{uid}", 1, now) for uid in range(1, 21)],
+        )
+    con.close()
+
+
+def db_benches(users: int, chats: int) -> Iterator[Bench]:
+    rng = random.Random(SEED)
+    uid = lambda: rng.randint(1, users)  # noqa: E731
+    cid = lambda: -rng.randint(1, chats)  # noqa: E731
+    attempts = [["СЛОВО", ["absent"] * 5, 1]] * 3
+
+    yield "db.get_game", lambda: db.get_game(cid()), 1
+    yield "db.save_game", lambda: db.save_game(cid(), "СЛОВО", attempts, "IN_PROGRESS", 5), 1
+    yield "db.set_board_message_id", lambda: db.set_board_message_id(cid(), 42), 1
+
+    def clear_and_restore():
+        chat = cid()
+        db.clear_game(chat)
+        db.save_game(chat, "СЛОВО", [], "IN_PROGRESS", 5)
+
+    yield "db.clear_game+save_game", clear_and_restore, 1
+    yield "db.finish_game_and_update_stats", lambda: db.finish_game_and_update_stats(uid(), True, 4), 1
+    yield "db.update_chat_stats", lambda: db.update_chat_stats(cid(), True, 4), 1
+    yield "db.get_stats", lambda: db.get_stats(uid()), 1
+    yield "db.get_chat_stats", lambda: db.get_chat_stats(cid()), 1
+    yield "db.record_chat_win", lambda: db.record_chat_win(cid(), uid(), "Игрок"), 1
+    yield "db.get_chat_leaderboard", lambda: db.get_chat_leaderboard(cid(), 10), 1
+    for board in ("wins", "rate", "streak"):
+        yield f"db.get_top_stats.{board}", lambda b=board: db.get_top_stats(b, 10, 10), 1
+    yield "db.load_global_top", db.load_global_top, 1
+    yield "db.get_chat_settings", lambda: db.get_chat_settings(cid()), 1
+    yield "db.save_chat_settings", lambda: db.save_chat_settings(cid(), 5), 1
+    yield "db.save_chat_image_settings", lambda: db.save_chat_image_settings(cid(), "png", 80), 1
+    yield "db.get_custom_words", lambda: db.get_custom_words(5), 1
+    yield "db.add+remove_custom_word", lambda: (db.add_custom_word("ЖЖЖЖЖ", 5, 1), db.remove_custom_word("ЖЖЖЖЖ", 5)), 1
+    yield "db.get_deleted_words", lambda: db.get_deleted_words(5), 1
+    yield "db.add+remove_deleted_word", lambda: (db.add_deleted_word("ЖЖЖЖЖ", 5, 1), db.remove_deleted_word("ЖЖЖЖЖ", 5)), 1
+    yield "db.get_moderators", db.get_moderators, 1
+    yield "db.is_moderator", lambda: db.is_moderator(uid()), 1
+    yield "db.save_user_info", lambda: db.save_user_info(uid(), "user", "Игрок", None), 1
+    yield "db.find_user_by_username", lambda: db.find_user_by_username(f"user{uid()}"), 1
+    yield "db.get_user_info", lambda: db.get_user_info(uid()), 1
+    yield "db.get_table_columns", lambda: db.get_table_columns("stats"), 1
+    yield "db.iter_table_chunks.stats", lambda: sum(len(c) for c in db.iter_table_chunks("stats")), 1
+
+
+# --- Отрисовка ---
+
+
+def make_attempts(rows: int, length: int) -> List[Tuple[str, List[str]]]:
+    letters = render.ALPHABET
+    kinds = ("correct", "present", "absent")
+    return [
+        (
+            "".join(letters[(r * length + c) % len(letters)] for c in range(length)),
+            [kinds[(r + c) % 3] for c in range(length)],
+        )
+        for r in range(rows)
+    ]
+
+
+def render_benches() -> Iterator[Bench]:
+    if not render.load_pillow():
+        print("Pillow не установлен — отрисовка пропущена")
+        return
+    render.warm_tile_cache()
+    for length in (5, 9):
+        for rows in range(ATTEMPTS + 1):
+            attempts = make_attempts(rows, length)
+            yield (
+                f"render.png.{length}.{rows}",
+                lambda a=attempts, n=length: render.render_attempts_image(a, n, None, "png"),
+                1,
+            )
+
+
+# --- on_text целиком ---
+
+
+class _FakeContext:
+    def __init__(self, bot):
+        self.bot = bot
+
+
+async def _fake_post(self, endpoint: str, data=None, *args, **kwargs):
+    if endpoint == "getMe":
+        return {"id": 1, "is_bot": True, "first_name": "bench", "username": "bench_bot"}
+    chat_id = int((data or {}).get("chat_id", 1))
+    return {"message_id": 1, "date": 0, "chat": {"id": chat_id, "type": "group"}, "text": ""}
+
+
+def on_text_benches(chats: int) -> Iterator[Bench]:
+    """Ход в игре от чтения базы до отправки доски; Bot API заменён заглушкой без сети"""
+    telegram.Bot._do_post = _fake_post
+    bot = telegram.Bot("1:bench")
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(bot.initialize())
+    context = _FakeContext(bot)
+    words = [w for w in handlers.WORDS_BY_LENGTH.get(5, []) if w != "СЛОВО"][: ATTEMPTS - 1]
+    if len(words) < ATTEMPTS - 1:
+        return
+    counter = {"update": 0, "turn": 0, "chat": 0}
+
+    def make_update(chat_id: int, text: str) -> Update:
+        counter["update"] += 1
+        message = {
+            "message_id": counter["update"],
+            "date": 0,
+            "chat": {"id": chat_id, "type": "group"},
+            "from": {"id": 1 + counter["update"] % 50, "is_bot": False, "first_name": "Игрок"},
+            "text": text,
+        }
+        return Update.de_json({"update_id": counter["update"], "message": message}, bot)
+
+    def reset_games() -> None:
+        for c in range(1, chats + 1):
+            db.save_game(-c, "СЛОВО", [], "IN_PROGRESS", 5)
+
+    reset_games()
+
+    async def guess():
+        # Каждый чат получает по ходу; когда до конца игры остаётся один ход — партии начинаются заново
+        counter["chat"] += 1
+        if counter["chat"] > chats:
+            counter["chat"] = 1
+            counter["turn"] += 1
+            if counter["turn"] >= ATTEMPTS - 1:
+                counter["turn"] = 0
+                reset_games()
+        chat_id = -counter["chat"]
+        await handlers.on_text(make_update(chat_id, words[counter["turn"]].lower()), context)
+
+    async def rejected():
+        await handlers.on_text(make_update(-1, "ъъъъъ"), context)
+
+    yield "on_text.guess", guess, 1
+    yield "on_text.rejected", rejected, 1
+
+
+# --- Сравнение ---
+
+
+def compare(
+    results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float, stat: str
+) -> List[str]:
+    regressions = []
+    print()
+    print(f"{'бенчмарк':<40} {'сейчас, мкс':>12} {'база, мкс':>12} {'изменение':>10}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<40} {result[stat]:>12.2f} {'—':>12} {'новый':>10}")
+            continue
+        change = result[stat] / base[stat] - 1 if base[stat] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  РЕГРЕССИЯ"
+            regressions.append(name)
+        print(f"{name:<40} {result[stat]:>12.2f} {base[stat]:>12.2f} {change:>+9.1%}{flag}")
+    return regressions
+
+
+def git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--output", default="bench_results.json", help="куда сохранить результаты")
+    parser.add_argument("--baseline", help="JSON прошлого прогона для сравнения")
+    parser.add_argument("--save-baseline", help="сохранить этот прогон как базовый")
+    parser.add_argument("--threshold", type=float, default=0.15, help="допустимое замедление (0.15 = 15%%)")
+    parser.add_argument("--stat", choices=("median_us", "min_us", "p95_us"), default="median_us")
+    parser.add_argument("--rounds", type=int, default=15, help="раундов на бенчмарк")
+    parser.add_argument("--only", action="append", default=[], help="только бенчмарки с этим префиксом")
+    parser.add_argument("--users", type=int, default=20000, help="игроков в тестовой базе")
+    parser.add_argument("--chats", type=int, default=2000, help="чатов в тестовой базе")
+    parser.add_argument("--no-import", action="store_true", help="не мерить холодный импорт")
+    args = parser.parse_args()
+
+    wanted = lambda name: not args.only or any(name.startswith(p) for p in args.only)  # noqa: E731
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        db.init_db()
+        load_dictionaries()
+    populate(args.users, args.chats)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    groups = (
+        game_benches(),
+        startup_benches(),
+        db_benches(args.users, args.chats),
+        render_benches(),
+        on_text_benches(args.chats),
+    )
+    results: Dict[str, Dict[str, float]] = {}
+    print(f"{'бенчмарк':<40} {'медиана, мкс':>13} {'мин, мкс':>10} {'p95, мкс':>10}")
+    for group in groups:
+        for name, fn, ops in group:
+            if not wanted(name):
+                continue
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = measure(fn, ops, args.rounds, loop)
+            results[name] = result
+            print(f"{name:<40} {result['median_us']:>13.2f} {result['min_us']:>10.2f} {result['p95_us']:>10.2f}")
+    if not args.no_import and wanted("startup.import"):
+        results["startup.import"] = result = cold_import(max(3, args.rounds // 3))
+        print(f"{'startup.import':<40} {result['median_us']:>13.0f} {result['min_us']:>10.0f} {result['p95_us']:>10.0f}")
+    render.RENDER_POOL.shutdown()
+    loop.close()
+
+    report = {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "metrics": METRICS_ENABLED,
+            "users": args.users,
+            "chats": args.chats,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nРезультаты: {args.output}")
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Базовый прогон: {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold, args.stat)
+        if regressions:
+            print(f"\nРегрессий: {len(regressions)} (порог {args.threshold:.0%}): {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\nРегрессий нет (порог {args.threshold:.0%})")
+
+
+if __name__ == "__main__":
+    main()
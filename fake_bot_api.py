@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Локальный поддельный Bot API для проверки сетевого слоя бота без Telegram.
+
+Отвечает на любые методы правдоподобными ответами, может добавлять задержку,
+ошибки 5xx и 429, а getUpdates раздаёт обновления из JSON/JSONL файла.
+При остановке печатает число вызовов по методам.
+
+Пример:
+    python fake_bot_api.py --port 8081 --latency 50 --error-rate 0.05 --updates updates.jsonl
+    SLOVLI_API_BASE_URL=http://127.0.0.1:8081 python -m wordly_bot.main
+
+Порт по умолчанию 8081; бот рядом держит свои порты: метрики (SLOVLI_METRICS_PORT)
+и проверки /livez, /readyz (SLOVLI_HEALTH_PORT, 8082) — с ними порт заглушки совпадать не должен.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import signal
+import time
+from collections import Counter, deque
+from email.parser import BytesParser
+from email.policy import HTTP
+from urllib.parse import parse_qs
+
+from wordly_bot.http_server import HttpRequest, HttpResponse, HttpServer
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Словли", "username": "slovli_fake_bot"}
+MESSAGE_METHODS = {
+    "sendMessage",
+    "sendPhoto",
+    "sendDocument",
+    "editMessageText",
+    "editMessageMedia",
+    "editMessageCaption",
+}
+
+
+def parse_params(request: HttpRequest) -> dict:
+    content_type = request.headers.get("content-type", "")
+    if not request.body:
+        return dict(request.query)
+    if content_type.startswith("application/json"):
+        return request.json()
+    if content_type.startswith("multipart/form-data"):
+        msg = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + request.body
+        )
+        params = {}
+        for part in msg.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            if part.get_filename():
+                params[name] = f"<file {part.get_filename()}>"
+            else:
+                params[name] = part.get_content()
+        return params
+    return {k: v[-1] for k, v in parse_qs(request.body.decode("utf-8")).items()}
+
+
+class FakeBotApi:
+    def __init__(self, latency: float, jitter: float, error_rate: float, flood_rate: float, updates):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.flood_rate = flood_rate
+        self.updates = deque(updates)
+        self.calls = Counter()
+        self.errors = Counter()
+        self.message_ids = Counter()
+
+    def message(self, params: dict) -> dict:
+        chat_id = int(params.get("chat_id", 0) or 0)
+        self.message_ids[chat_id] += 1
+        message = {
+            "message_id": int(params.get("message_id", 0) or 0) or self.message_ids[chat_id],
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "group"},
+            "from": BOT_USER,
+        }
+        if "text" in params:
+            message["text"] = params["text"]
+        if "caption" in params:
+            message["caption"] = params["caption"]
+        return message
+
+    async def handle(self, request: HttpRequest) -> HttpResponse:
+        method = request.path.rsplit("/", 1)[-1]
+        self.calls[method] += 1
+        params = parse_params(request)
+
+        if method == "getUpdates":
+            return await self.get_updates(params)
+        delay = max(0.0, random.gauss(self.latency, self.jitter)) if self.jitter else self.latency
+        if delay:
+            await asyncio.sleep(delay)
+        if random.random() < self.error_rate:
+            self.errors[method] += 1
+            return HttpResponse.json({"ok": False, "error_code": 502, "description": "Bad Gateway"}, 502)
+        if random.random() < self.flood_rate:
+            self.errors[method] += 1
+            return HttpResponse.json(
+                {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": "Too Many Requests: retry after 1",
+                    "parameters": {"retry_after": 1},
+                },
+                429,
+            )
+
+        if method == "getMe":
+            result = BOT_USER
+        elif method in MESSAGE_METHODS:
+            result = self.message(params)
+        else:
+            result = True
+        return HttpResponse.json({"ok": True, "result": result})
+
+    async def get_updates(self, params: dict) -> HttpResponse:
+        offset = int(params.get("offset", 0) or 0)
+        while self.updates and self.updates[0]["update_id"] < offset:
+            self.updates.popleft()
+        if not self.updates:
+            # Длинный опрос: ждём немного и отвечаем пустым списком
+            await asyncio.sleep(min(float(params.get("timeout", 0) or 0), 1.0))
+            return HttpResponse.json({"ok": True, "result": []})
+        limit = int(params.get("limit", 100) or 100)
+        return HttpResponse.json({"ok": True, "result": list(self.updates)[:limit]})
+
+
+def load_updates(path: str):
+    with open(path, encoding="utf-8") as f:
+        text = f.read().strip()
+    updates = json.loads(text) if text.startswith("[") else [json.loads(l) for l in text.splitlines() if l.strip()]
+    for i, update in enumerate(updates, start=1):
+        update.setdefault("update_id", i)
+    return updates
+
+
+async def serve(args) -> None:
+    api = FakeBotApi(
+        args.latency / 1000,
+        args.jitter / 1000,
+        args.error_rate,
+        args.flood_rate,
+        load_updates(args.updates) if args.updates else [],
+    )
+    server = HttpServer(args.host, args.port)
+    server.route("*", "/bot", api.handle, prefix=True)
+    await server.start()
+    print(f"Поддельный Bot API: http://{args.host}:{server.port}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+    await server.stop()
+    for method, count in api.calls.most_common():
+        print(f"{method}: {count} (ошибок: {api.errors[method]})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081, help="не совпадает с SLOVLI_HEALTH_PORT (8082)")
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа, мс")
+    parser.add_argument("--jitter", type=float, default=0.0, help="разброс задержки, мс")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов 502")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="доля ответов 429")
+    parser.add_argument("--updates", help="JSON/JSONL с обновлениями для getUpdates")
+    asyncio.run(serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
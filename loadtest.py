@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Нагрузочный тест без сети: N чатов одновременно играют полные партии через настоящие хендлеры.
+
+Каждый чат по очереди шлёт /new, ходы словами из словаря (иногда с опечатками, повторами
+и угадыванием ответа), болтовню, которая не является ходом, и иногда /giveup.
+Обновления проходят через то же приложение, что и в боте (хендлеры, обработчик с порядком
+по чатам, база, отрисовка), а Bot API заменён заглушкой, которая только считает вызовы.
+
+В конце печатаются пропускная способность, p50/p99 задержки по видам обновлений
+и разбивка времени: база по запросам, отрисовка, кодирование, ожидание пула.
+
+    python loadtest.py --chats 1000 --games 2 --api-latency 30
+    SLOVLI_CONCURRENT_UPDATES=64 python loadtest.py --chats 3000 --json load.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+# До импорта бота: своя база, метрики для разбивки времени, без лимитов Telegram и без HTTP-сервера
+os.environ.setdefault("SLOVLI_DB_FILE", os.path.join(tempfile.mkdtemp(prefix="slovli-load-"), "load.db"))
+os.environ["SLOVLI_METRICS"] = "1"
+os.environ.setdefault("SLOVLI_METRICS_PORT", "0")
+os.environ.setdefault("SLOVLI_HEALTH_PORT", "0")
+os.environ.setdefault("SLOVLI_RATE_LIMIT", "0")
+
+from telegram import Update
+from telegram.ext import ApplicationBuilder
+
+from wordly_bot import handlers, metrics
+from wordly_bot.config import ATTEMPTS
+from wordly_bot.db import get_game, init_db
+from wordly_bot.main import build_application, load_dictionaries
+from wordly_bot.offline import StubRequest, text_update
+from wordly_bot.watchdog import WATCHDOG
+
+CHATTER = (
+    "всем привет",
+    "ну ты даёшь",
+    "хм сложно",
+    "давай ещё",
+    "ок",  # одно слово не той длины — бот ответит подсказкой
+    "ага",
+    "это не слово",
+    "😂",
+    "ну и слово",
+)
+TYPO = "ЪЫЪЫЪЫЪЫЪ"
+# Генератор подглядывает в игру без замера, чтобы не смешивать свои запросы с запросами бота
+peek_game = getattr(get_game, "__wrapped__", get_game)
+
+
+class LoadRun:
+    def __init__(self, app, args):
+        self.app = app
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.update_id = 0
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.words = handlers.WORDS_BY_LENGTH.get(5) or []
+
+    def make_update(self, chat_id: int, user_id: int, text: str) -> Update:
+        self.update_id += 1
+        return text_update(self.app.bot, self.update_id, chat_id, user_id, text)
+
+    async def send(self, kind: str, chat_id: int, user_id: int, text: str) -> None:
+        update = self.make_update(chat_id, user_id, text)
+        started = time.perf_counter()
+        # Тот же путь, что у обновлений из getUpdates: обработчик с порядком по чатам, затем хендлеры
+        await self.app.update_processor.process_update(update, self.app.process_update(update))
+        self.latencies[kind].append(time.perf_counter() - started)
+
+    async def pause(self) -> None:
+        if self.args.think:
+            await asyncio.sleep(self.rng.expovariate(1 / self.args.think))
+
+    async def play_chat(self, index: int) -> None:
+        args = self.args
+        chat_id = -(1_000_000 + index)
+        players = [index * 100 + p for p in range(1, args.players + 1)]
+        for _ in range(args.games):
+            await self.send("new", chat_id, players[0], "/new")
+            tried = set()
+            giveup_at = self.rng.randint(2, ATTEMPTS - 1) if self.rng.random() < args.giveup else None
+            for move in range(ATTEMPTS * 2):
+                await self.pause()
+                user = self.rng.choice(players)
+                if self.rng.random() < args.chatter:
+                    await self.send("chatter", chat_id, user, self.rng.choice(CHATTER))
+                    continue
+                if giveup_at is not None and len(tried) >= giveup_at:
+                    await self.send("giveup", chat_id, user, "/giveup")
+                    break
+                g = peek_game(chat_id)
+                if not g or g["status"] != "IN_PROGRESS":
+                    break
+                await self.send("guess", chat_id, user, self.pick_guess(g["answer"], tried, move))
+        # Чат уходит: незаконченную партию закрывает /giveup
+        g = peek_game(chat_id)
+        if g and g["status"] == "IN_PROGRESS":
+            await self.send("giveup", chat_id, players[0], "/giveup")
+
+    def pick_guess(self, answer: str, tried: set, move: int) -> str:
+        roll = self.rng.random()
+        if roll < self.args.typos:
+            return TYPO[:5].lower()
+        if tried and roll < self.args.typos + 0.05:
+            return self.rng.choice(sorted(tried)).lower()  # повтор
+        # Шанс угадать растёт с каждым ходом, как у живых игроков
+        if move >= 2 and roll > 1 - self.args.win_rate * move / ATTEMPTS:
+            tried.add(answer)
+            return answer.lower()
+        word = self.rng.choice(self.words)
+        tried.add(word)
+        return word.lower()
+
+    async def run(self) -> float:
+        started = time.perf_counter()
+        await asyncio.gather(*(self.play_chat(i) for i in range(self.args.chats)))
+        return time.perf_counter() - started
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def breakdown(histogram: metrics.Histogram) -> Dict[str, Dict[str, float]]:
+    return {
+        "/".join(labels) or "all": {"count": count, "total_s": total, "avg_ms": total / count * 1000 if count else 0.0}
+        for labels, (count, total) in sorted(histogram.totals().items(), key=lambda kv: -kv[1][1])
+    }
+
+
+def build_report(run: LoadRun, stub: StubRequest, elapsed: float) -> Dict[str, object]:
+    all_latencies = [x for values in run.latencies.values() for x in values]
+    handler_total = sum(total for _, total in metrics.HANDLER_SECONDS.totals().values())
+    db_total = sum(total for _, total in metrics.DB_SECONDS.totals().values())
+    return {
+        "chats": run.args.chats,
+        "games_per_chat": run.args.games,
+        # У ChatOrderedUpdateProcessor семафор базового класса — лимит очереди, а не параллельность
+        "concurrency": getattr(run.app.update_processor, "workers", run.app.update_processor.max_concurrent_updates),
+        "updates": len(all_latencies),
+        "elapsed_s": elapsed,
+        "updates_per_s": len(all_latencies) / elapsed if elapsed else 0.0,
+        "games": {result: metrics.GAMES_FINISHED.value(result) for result in ("win", "loss", "giveup")},
+        "guesses": metrics.GUESSES.value(),
+        "rejected": {r: metrics.REJECTED_WORDS.value(r) for r in ("length", "alphabet", "dictionary", "repeat")},
+        "latency_ms": {
+            kind: {
+                "count": len(values),
+                "p50": percentile(values, 0.5) * 1000,
+                "p99": percentile(values, 0.99) * 1000,
+                "max": max(values) * 1000,
+                "mean": statistics.fmean(values) * 1000,
+            }
+            for kind, values in sorted(run.latencies.items())
+            if values
+        },
+        "time_s": {
+            "handlers": handler_total,
+            "db": db_total,
+            "render_draw": sum(t for _, t in metrics.RENDER_DRAW_SECONDS.totals().values()),
+            "render_encode": sum(t for _, t in metrics.RENDER_ENCODE_SECONDS.totals().values()),
+            "render_wait": sum(t for _, t in metrics.RENDER_WAIT_SECONDS.totals().values()),
+        },
+        "loop_lag_ms": {key: value * 1000 for key, value in WATCHDOG.percentiles().items()},
+        "loop_stalls": WATCHDOG.stalls,
+        "db": breakdown(metrics.DB_SECONDS),
+        "handlers": breakdown(metrics.HANDLER_SECONDS),
+        "api_calls": dict(stub.calls),
+        "api_upload_mb": stub.upload_bytes / 1024 / 1024,
+    }
+
+
+def print_report(report: Dict[str, object]) -> None:
+    print(
+        f"Чатов: {report['chats']} × {report['games_per_chat']} игр, параллельно: {report['concurrency']}\n"
+        f"Обновлений: {report['updates']} за {report['elapsed_s']:.1f} с — {report['updates_per_s']:.0f} в секунду\n"
+        f"Игры: {report['games']}, ходов: {report['guesses']:.0f}, отклонено: {report['rejected']}"
+    )
+    print(f"\n{'обновление':>10} {'кол-во':>7} {'p50, мс':>8} {'p99, мс':>8} {'max, мс':>8}")
+    for kind, row in report["latency_ms"].items():
+        print(f"{kind:>10} {row['count']:>7} {row['p50']:>8.1f} {row['p99']:>8.1f} {row['max']:>8.1f}")
+
+    times = report["time_s"]
+    handlers_total = times["handlers"] or 1.0
+    print("\nВремя внутри хендлеров (сумма по всем задачам):")
+    for name, seconds in times.items():
+        share = "" if name == "handlers" else f" ({seconds / handlers_total:.0%})"
+        print(f"  {name:<14} {seconds:>8.2f} с{share}")
+    lag = report["loop_lag_ms"]
+    print(
+        f"\nЗадержка event loop: p50 {lag['p50']:.1f} мс, p99 {lag['p99']:.1f} мс, max {lag['max']:.1f} мс, "
+        f"блокировок дольше порога: {report['loop_stalls']}"
+    )
+    print("\nБаза по запросам:")
+    for name, row in list(report["db"].items())[:12]:
+        print(f"  {name:<32} {row['count']:>7} × {row['avg_ms']:>6.2f} мс = {row['total_s']:>6.2f} с")
+    print(f"\nВызовы Bot API: {report['api_calls']}, загружено {report['api_upload_mb']:.1f} МБ")
+
+
+async def main_async(args) -> Dict[str, object]:
+    stub = StubRequest(args.api_latency / 1000, args.api_jitter / 1000)
+    app = build_application(builder=ApplicationBuilder().updater(None), token="1:load", requests=(stub, stub))
+    await app.initialize()
+    if app.post_init:
+        await app.post_init(app)
+    await app.start()
+    run = LoadRun(app, args)
+    try:
+        # Вывод хендлеров не нужен в отчёте (логи без setup_logging и так идут только от WARNING)
+        with contextlib.redirect_stdout(io.StringIO()):
+            elapsed = await run.run()
+    finally:
+        await app.stop()
+        await app.shutdown()
+        if app.post_shutdown:
+            await app.post_shutdown(app)
+    return build_report(run, stub, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=200, help="одновременных чатов")
+    parser.add_argument("--games", type=int, default=2, help="игр в каждом чате")
+    parser.add_argument("--players", type=int, default=3, help="игроков в чате")
+    parser.add_argument("--chatter", type=float, default=0.2, help="доля сообщений, не являющихся ходом")
+    parser.add_argument("--typos", type=float, default=0.1, help="доля ходов словами не из словаря")
+    parser.add_argument("--giveup", type=float, default=0.1, help="доля партий, которые сдают")
+    parser.add_argument("--win-rate", type=float, default=0.35, help="как быстро игроки угадывают ответ")
+    parser.add_argument("--think", type=float, default=0.0, help="средняя пауза между сообщениями чата, с")
+    parser.add_argument("--api-latency", type=float, default=20.0, help="задержка ответа Bot API, мс")
+    parser.add_argument("--api-jitter", type=float, default=10.0, help="случайная добавка к задержке, мс")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="сохранить отчёт в JSON")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        init_db()
+        load_dictionaries()
+    report = asyncio.run(main_async(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Отчёт: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
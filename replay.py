@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Воспроизведение записанных обновлений (SLOVLI_RECORD_DIR) через хендлеры бота.
+
+run — прогнать журнал на копии базы с исходной скоростью (--speed 1), быстрее (--speed 20)
+или без пауз (--speed 0). Bot API заменён заглушкой, ответы бота и время обработки
+каждого обновления сохраняются в JSON. Загаданные слова зависят только от update_id и --seed,
+так что два прогона одного журнала дают одинаковые ответы.
+
+compare — сравнить два прогона (например, до и после изменения): расхождения в ответах
+и изменение p50/p99 по видам обновлений; при расхождениях или замедлении код выхода 1.
+
+    python replay.py run records/ --db data/slovli.db --speed 10 -o before.json
+    git checkout feature && python replay.py run records/ --db data/slovli.db --speed 10 -o after.json
+    python replay.py compare before.json after.json --threshold 0.2
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+_current_update: ContextVar[int] = ContextVar("replay_update", default=0)
+
+
+def copy_database(source: str) -> str:
+    """Онлайн-копия базы: оригинал не меняется, даже если бот с ней сейчас работает"""
+    target = os.path.join(tempfile.mkdtemp(prefix="slovli-replay-"), "replay.db")
+    if not source:
+        return target
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(target)
+    with dst:
+        src.backup(dst)
+    src.close()
+    dst.close()
+    return target
+
+
+def resolve_logs(paths: List[str]) -> List[str]:
+    from wordly_bot.recorder import list_records
+
+    files: List[str] = []
+    for path in paths:
+        files.extend(list_records(path) if os.path.isdir(path) else [path])
+    return files
+
+
+def kind_of(text: str) -> str:
+    if text.startswith("/"):
+        return text.split()[0].split("@")[0]
+    return "text"
+
+
+def describe_call(endpoint: str, params: Dict[str, Any]) -> str:
+    """Ответ бота без картинок и id сообщений: по нему сравниваются прогоны"""
+    text = params.get("text") or params.get("caption") or ""
+    media = " [фото]" if "photo" in params or "media" in params else ""
+    return f"{endpoint}{media}: {text}"
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def latency_summary(updates: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    by_kind: Dict[str, List[float]] = defaultdict(list)
+    for item in updates:
+        by_kind[item["kind"]].append(item["ms"])
+        by_kind["all"].append(item["ms"])
+    return {
+        kind: {
+            "count": len(values),
+            "p50": percentile(values, 0.5),
+            "p99": percentile(values, 0.99),
+            "max": max(values),
+            "mean": statistics.fmean(values),
+        }
+        for kind, values in sorted(by_kind.items())
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+# --- run ---
+
+
+async def replay(records: List[Dict[str, Any]], args) -> Dict[str, Any]:
+    from telegram.ext import ApplicationBuilder
+
+    from wordly_bot import handlers, metrics
+    from wordly_bot.main import build_application
+    from wordly_bot.offline import StubRequest, text_update
+
+    outputs: Dict[int, List[str]] = defaultdict(list)
+
+    def capture(endpoint: str, params: Dict[str, Any]) -> None:
+        update_id = _current_update.get()
+        if update_id:
+            outputs[update_id].append(describe_call(endpoint, params))
+
+    # Загаданное слово зависит только от обновления: между await внутри pick_answer переключений нет
+    pick_answer = handlers.pick_answer
+
+    def seeded_pick(pool, word_length=5):
+        random.seed(f"{args.seed}:{_current_update.get()}")
+        return pick_answer(pool, word_length)
+
+    handlers.pick_answer = seeded_pick
+
+    stub = StubRequest(args.api_latency / 1000, 0.0, capture)
+    app = build_application(builder=ApplicationBuilder().updater(None), token="1:replay", requests=(stub, stub))
+    await app.initialize()
+    if app.post_init:
+        await app.post_init(app)
+    await app.start()
+
+    results: List[Dict[str, Any]] = []
+    in_flight = asyncio.Semaphore(args.max_in_flight)
+
+    async def process(record: Dict[str, Any], scheduled: float) -> None:
+        _current_update.set(record["id"])
+        update = text_update(
+            app.bot,
+            record["id"],
+            record["chat"],
+            record["user"],
+            record["text"],
+            chat_type=record.get("type", "group"),
+            name=record.get("name", ""),
+            date=int(record["t"]),
+        )
+        try:
+            await app.update_processor.process_update(update, app.process_update(update))
+        finally:
+            in_flight.release()
+        results.append(
+            {
+                "id": record["id"],
+                "chat": record["chat"],
+                "kind": kind_of(record["text"]),
+                "in": record["text"],
+                # От момента, когда обновление пришло бы в исходном темпе: очередь тоже считается
+                "ms": (time.perf_counter() - scheduled) * 1000,
+                "out": outputs.pop(record["id"], []),
+            }
+        )
+
+    tasks = []
+    started = time.perf_counter()
+    t0 = records[0]["t"] if records else 0.0
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for record in records:
+                scheduled = started
+                if args.speed > 0:
+                    scheduled = started + (record["t"] - t0) / args.speed
+                    delay = scheduled - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                await in_flight.acquire()
+                if args.speed <= 0:
+                    scheduled = time.perf_counter()
+                tasks.append(asyncio.create_task(process(record, scheduled)))
+            await asyncio.gather(*tasks)
+    finally:
+        elapsed = time.perf_counter() - started
+        await app.stop()
+        await app.shutdown()
+        if app.post_shutdown:
+            await app.post_shutdown(app)
+
+    results.sort(key=lambda item: item["id"])
+    return {
+        "meta": {
+            "revision": git_revision(),
+            "logs": args.logs,
+            "speed": args.speed,
+            "seed": args.seed,
+            "recorded_span_s": (records[-1]["t"] - t0) if records else 0.0,
+        },
+        "summary": {
+            "updates": len(results),
+            "elapsed_s": elapsed,
+            "updates_per_s": len(results) / elapsed if elapsed else 0.0,
+            "latency_ms": latency_summary(results),
+            "db_s": sum(t for _, t in metrics.DB_SECONDS.totals().values()),
+            "render_s": sum(
+                t
+                for h in (metrics.RENDER_DRAW_SECONDS, metrics.RENDER_ENCODE_SECONDS)
+                for _, t in h.totals().values()
+            ),
+            "api_calls": dict(stub.calls),
+        },
+        "updates": results,
+    }
+
+
+def cmd_run(args) -> int:
+    # Настройки читаются при импорте бота: сначала копия базы и отключение лишнего
+    os.environ["SLOVLI_DB_FILE"] = copy_database(args.db)
+    os.environ["SLOVLI_RECORD_DIR"] = ""
+    os.environ["SLOVLI_METRICS"] = "1"
+    os.environ["SLOVLI_METRICS_PORT"] = "0"
+    os.environ["SLOVLI_HEALTH_PORT"] = "0"
+    if not args.rate_limit:
+        os.environ["SLOVLI_RATE_LIMIT"] = "0"
+
+    from wordly_bot.db import init_db
+    from wordly_bot.leaderboard import GLOBAL_TOP
+    from wordly_bot.main import load_dictionaries
+    from wordly_bot.recorder import read_records
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        init_db()
+        GLOBAL_TOP.load()
+        load_dictionaries()
+
+    records = [
+        r for r in read_records(resolve_logs(args.logs)) if r.get("bot") == args.bot or (args.bot is None and "bot" not in r)
+    ]
+    if args.limit:
+        records = records[: args.limit]
+    if not records:
+        print("В журнале нет обновлений")
+        return 1
+    print(f"Обновлений: {len(records)}, база: {os.environ['SLOVLI_DB_FILE']}, скорость: {args.speed or 'без пауз'}")
+
+    report = asyncio.run(replay(records, args))
+    summary = report["summary"]
+    print(
+        f"Обработано {summary['updates']} за {summary['elapsed_s']:.1f} с ({summary['updates_per_s']:.0f}/с), "
+        f"база {summary['db_s']:.1f} с, отрисовка {summary['render_s']:.1f} с"
+    )
+    print(f"{'вид':>12} {'кол-во':>7} {'p50, мс':>8} {'p99, мс':>8} {'max, мс':>8}")
+    for kind, row in summary["latency_ms"].items():
+        print(f"{kind:>12} {row['count']:>7} {row['p50']:>8.1f} {row['p99']:>8.1f} {row['max']:>8.1f}")
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+    print(f"Результат: {args.output}")
+    return 0
+
+
+# --- compare ---
+
+
+def cmd_compare(args) -> int:
+    with open(args.before, encoding="utf-8") as f:
+        before = json.load(f)
+    with open(args.after, encoding="utf-8") as f:
+        after = json.load(f)
+
+    a_updates = {u["id"]: u for u in before["updates"]}
+    b_updates = {u["id"]: u for u in after["updates"]}
+    missing = sorted(set(a_updates) ^ set(b_updates))
+    diffs = [i for i in sorted(set(a_updates) & set(b_updates)) if a_updates[i]["out"] != b_updates[i]["out"]]
+
+    print(f"Прогоны: {before['meta'].get('revision')} → {after['meta'].get('revision')}")
+    print(f"Обновлений: {len(a_updates)} / {len(b_updates)}, есть только в одном: {len(missing)}")
+    print(f"Разные ответы: {len(diffs)}")
+    for update_id in diffs[: args.show]:
+        a, b = a_updates[update_id], b_updates[update_id]
+        print(f"\n  #{update_id} чат {a['chat']}: {a['in']}")
+        for line in a["out"]:
+            print(f"    - {line}")
+        for line in b["out"]:
+            print(f"    + {line}")
+
+    regressions = []
+    a_lat, b_lat = before["summary"]["latency_ms"], after["summary"]["latency_ms"]
+    print(f"\n{'вид':>12} {'p50 до':>8} {'p50 после':>10} {'p99 до':>8} {'p99 после':>10} {'p99':>8}")
+    for kind in sorted(set(a_lat) & set(b_lat)):
+        a, b = a_lat[kind], b_lat[kind]
+        change = b["p99"] / a["p99"] - 1 if a["p99"] else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "  МЕДЛЕННЕЕ"
+            regressions.append(kind)
+        print(f"{kind:>12} {a['p50']:>8.1f} {b['p50']:>10.1f} {a['p99']:>8.1f} {b['p99']:>10.1f} {change:>+7.0%}{flag}")
+    return 1 if diffs or missing or regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="прогнать журнал через хендлеры")
+    run.add_argument("logs", nargs="+", help="файлы updates-*.jsonl.gz или каталог SLOVLI_RECORD_DIR")
+    run.add_argument("--db", default="", help="база, с копии которой начинать (по умолчанию — пустая)")
+    run.add_argument("--speed", type=float, default=1.0, help="1 — исходный темп, 10 — в 10 раз быстрее, 0 — без пауз")
+    run.add_argument("--bot", help="имя бота из SLOVLI_TENANTS_FILE (по умолчанию — однобот)")
+    run.add_argument("--limit", type=int, default=0, help="только первые N обновлений")
+    run.add_argument("--seed", type=int, default=1, help="зерно загадываемых слов")
+    run.add_argument("--api-latency", type=float, default=0.0, help="задержка заглушки Bot API, мс")
+    run.add_argument("--rate-limit", action="store_true", help="оставить лимиты Telegram (SLOVLI_RATE_*)")
+    run.add_argument("--max-in-flight", type=int, default=4096, help="сколько обновлений держать в обработке")
+    run.add_argument("-o", "--output", default="replay.json")
+
+    compare = sub.add_parser("compare", help="сравнить два прогона")
+    compare.add_argument("before")
+    compare.add_argument("after")
+    compare.add_argument("--threshold", type=float, default=0.15, help="допустимый рост p99 (0.15 = 15%%)")
+    compare.add_argument("--show", type=int, default=20, help="сколько расхождений показать")
+
+    args = parser.parse_args()
+    if args.command == "run" and args.db and not os.path.exists(args.db):
+        parser.error(f"нет базы {args.db}")
+    sys.exit(cmd_run(args) if args.command == "run" else cmd_compare(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Стресс-тест параллельной обработки обновлений.
+
+Каждый «ход» повторяет схему on_text: прочитать игру из БД, подождать ответа Telegram
+(имитация отправки доски), дописать попытку и сохранить игру целиком.
+Несколько игроков в каждом чате шлют ходы одновременно. В конце сверяется,
+сколько попыток реально сохранено, и сравнивается пропускная способность:
+- sequential — стандартная обработка PTB по одному обновлению
+- unordered — параллельно без порядка внутри чата (ходы теряются)
+- ordered   — ChatOrderedUpdateProcessor
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import tempfile
+import time
+
+os.environ.setdefault("SLOVLI_DB_FILE", os.path.join(tempfile.mkdtemp(prefix="slovli-stress-"), "stress.db"))
+
+from telegram import Chat, Message, Update, User
+from telegram.ext import SimpleUpdateProcessor
+
+from wordly_bot.db import get_game, init_db, save_game
+from wordly_bot.dispatch import ChatOrderedUpdateProcessor
+
+DATE = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def make_update(update_id: int, chat_id: int, user_id: int, text: str) -> Update:
+    user = User(user_id, f"u{user_id}", False)
+    chat = Chat(chat_id, Chat.GROUP)
+    return Update(update_id, message=Message(update_id, DATE, chat, from_user=user, text=text))
+
+
+async def guess(update: Update, latency: float) -> None:
+    chat_id = update.effective_chat.id
+    g = get_game(chat_id)
+    attempts = json.loads(g["attempts_json"])
+    await asyncio.sleep(latency)  # ответ в Telegram между чтением и записью, как в on_text
+    attempts.append([update.message.text, ["absent"] * 5])
+    save_game(chat_id, g["answer"], attempts, "IN_PROGRESS")
+
+
+async def run(processor, chats: int, moves: int, latency: float):
+    base = 1_000_000 * chats
+    for c in range(chats):
+        save_game(base + c, "слово", [], "IN_PROGRESS")
+    updates = [
+        make_update(i, base + i % chats, i % 3, f"ход{i}")
+        for i in range(chats * moves)
+    ]
+    await processor.initialize()
+    started = time.perf_counter()
+    await asyncio.gather(*(processor.process_update(u, guess(u, latency)) for u in updates))
+    elapsed = time.perf_counter() - started
+    await processor.shutdown()
+
+    saved = 0
+    in_order = True
+    for c in range(chats):
+        texts = [a[0] for a in json.loads(get_game(base + c)["attempts_json"])]
+        saved += len(texts)
+        expected = [u.message.text for u in updates if u.effective_chat.id == base + c]
+        in_order = in_order and texts == expected
+    return len(updates), saved, in_order, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--moves", type=int, default=20, help="ходов в каждом чате")
+    parser.add_argument("--latency", type=float, default=0.01, help="имитация ответа Telegram, с")
+    parser.add_argument("--workers", type=int, default=64)
+    args = parser.parse_args()
+
+    init_db()
+    modes = {
+        "sequential": lambda: SimpleUpdateProcessor(1),
+        "unordered": lambda: SimpleUpdateProcessor(args.workers),
+        "ordered": lambda: ChatOrderedUpdateProcessor(args.workers),
+    }
+    print(f"{'режим':>10} {'чатов':>5} {'ходов':>6} {'сохранено':>9} {'порядок':>7} {'ходов/с':>8}")
+    for chats in (1, 4, 16, 64):
+        for name, factory in modes.items():
+            if name == "sequential" and chats > 16:
+                continue
+            total, saved, in_order, elapsed = asyncio.run(run(factory(), chats, args.moves, args.latency))
+            print(
+                f"{name:>10} {chats:>5} {total:>6} {saved:>9} {'да' if in_order else 'нет':>7} "
+                f"{total / elapsed:>8.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
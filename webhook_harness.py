@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Локальная проверка режима вебхука: отправляет записанные обновления Telegram
+(JSON-файл с объектом или списком, либо JSONL по одному обновлению в строке)
+POST-запросами на адрес бота с заголовком секретного токена.
+
+Пример:
+    SLOVLI_MODE=webhook SLOVLI_WEBHOOK_SECRET=test python -m wordly_bot.main
+    python webhook_harness.py updates.jsonl --secret test
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def load_updates(path: str):
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    stripped = text.lstrip()
+    if stripped.startswith("["):
+        return json.loads(stripped)
+    if stripped.startswith("{") and "\n{" not in stripped:
+        return [json.loads(stripped)]
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def post_update(url: str, secret: str, update: dict, timeout: float):
+    data = json.dumps(update, ensure_ascii=False).encode("utf-8")
+    req = urllib.request.Request(url, data=data, method="POST")
+    req.add_header("Content-Type", "application/json")
+    if secret:
+        req.add_header(SECRET_HEADER, secret)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Отправка записанных обновлений на вебхук бота")
+    parser.add_argument("files", nargs="+", help="JSON/JSONL файлы с обновлениями")
+    parser.add_argument("--url", default="http://127.0.0.1:8080/telegram")
+    parser.add_argument("--secret", default=os.getenv("SLOVLI_WEBHOOK_SECRET", ""))
+    parser.add_argument("--delay", type=float, default=0.0, help="пауза между обновлениями, с")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    args = parser.parse_args()
+
+    sent = failed = 0
+    update_id = int(time.time())
+    for path in args.files:
+        for update in load_updates(path):
+            # Записи без update_id получают возрастающие номера
+            update.setdefault("update_id", update_id)
+            update_id += 1
+            status = post_update(args.url, args.secret, update, args.timeout)
+            if status == 200:
+                sent += 1
+            else:
+                failed += 1
+                print(f"update_id={update['update_id']}: HTTP {status}", file=sys.stderr)
+            if args.delay:
+                time.sleep(args.delay)
+    print(f"Отправлено: {sent}, ошибок: {failed}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,25 @@ __all__ = [
     "render",
     "handlers",
     "main",
+    "backup",
+    "leaderboard",
+    "export",
+    "emoji_board",
+    "http_server",
+    "webhook",
+    "dispatch",
+    "ratelimit",
+    "cluster",
+    "network",
+    "tenants",
+    "multibot",
+    "metrics",
+    "recorder",
+    "offline",
+    "profiling",
+    "watchdog",
+    "logs",
+    "health",
 ]
 
 
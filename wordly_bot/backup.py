@@ -0,0 +1,221 @@
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from .config import (
+    BACKUP_COMPRESS,
+    BACKUP_DIR,
+    BACKUP_INTERVAL,
+    BACKUP_KEEP,
+    BACKUP_MAX_RESTARTS,
+    BACKUP_PAGES,
+    BACKUP_PAUSE,
+)
+from .tenants import Tenant, current_tenant, use_tenant
+
+log = logging.getLogger(__name__)
+
+SNAPSHOT_PREFIX = "slovli-"
+
+# Одновременно выполняется только один бэкап (команда и расписание не пересекаются)
+_backup_lock = threading.Lock()
+_scheduler_stop = threading.Event()
+
+
+@dataclass
+class BackupResult:
+    path: str
+    size: int
+    duration: float
+    integrity: str
+
+
+def format_size(size: int) -> str:
+    value = float(size)
+    for unit in ("Б", "КБ", "МБ"):
+        if value < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} ГБ"
+
+
+class _BackupRestarted(Exception):
+    pass
+
+
+def _copy_online(
+    db_file: str, dest_path: str, pages: int, pause: float, max_restarts: int = BACKUP_MAX_RESTARTS
+) -> None:
+    """Скопировать живую базу пачками страниц, отпуская блокировку между шагами.
+
+    Запись в базу из другого соединения начинает такое копирование заново с первой страницы.
+    Под нагрузкой (каждая партия пишет) оно может не закончиться никогда, поэтому после
+    max_restarts перезапусков база в режиме WAL копируется за один шаг — одной транзакцией чтения,
+    которая запись не держит. С обычным журналом такое чтение остановило бы запись на всё
+    копирование, поэтому бэкап завершается ошибкой и повторяется в следующий раз.
+    """
+    src = sqlite3.connect(db_file)
+    dst = sqlite3.connect(dest_path)
+    state = {"remaining": None, "restarts": 0}
+
+    def progress(status: int, remaining: int, total: int) -> None:
+        previous = state["remaining"]
+        state["remaining"] = remaining
+        if previous is not None and remaining > previous:
+            state["restarts"] += 1
+            if state["restarts"] > max_restarts:
+                raise _BackupRestarted()
+        # Между шагами блокировка источника снята — даём записаться ходам игроков
+        if remaining and pause > 0:
+            time.sleep(pause)
+
+    try:
+        try:
+            src.backup(dst, pages=pages, progress=progress)
+        except _BackupRestarted:
+            journal = src.execute("PRAGMA journal_mode").fetchone()[0]
+            if journal.lower() != "wal":
+                raise RuntimeError(
+                    f"копирование начиналось заново {state['restarts']} раз из-за записи "
+                    f"(журнал {journal}, не WAL), бэкап отложен до следующего раза"
+                )
+            log.warning(
+                "Бэкап %s: копирование по %d страниц начиналось заново %d раз из-за записи, копирую за один шаг",
+                db_file,
+                pages,
+                state["restarts"],
+            )
+            src.backup(dst, pages=-1)
+    finally:
+        dst.close()
+        src.close()
+
+
+def _integrity_check(path: str) -> str:
+    con = sqlite3.connect(path)
+    try:
+        rows = con.execute("PRAGMA integrity_check").fetchall()
+    finally:
+        con.close()
+    return "; ".join(str(row[0]) for row in rows)
+
+
+def _compress(path: str) -> str:
+    gz_path = path + ".gz"
+    with open(path, "rb") as src, gzip.open(gz_path, "wb", compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.remove(path)
+    return gz_path
+
+
+def list_snapshots(backup_dir: Optional[str] = None) -> List[str]:
+    """Список снапшотов от старых к новым"""
+    backup_dir = backup_dir or current_tenant().backup_dir or BACKUP_DIR
+    if not os.path.isdir(backup_dir):
+        return []
+    names = [
+        n for n in os.listdir(backup_dir)
+        if n.startswith(SNAPSHOT_PREFIX) and (n.endswith(".db") or n.endswith(".db.gz"))
+    ]
+    return [os.path.join(backup_dir, n) for n in sorted(names)]
+
+
+def rotate_snapshots(keep: int = BACKUP_KEEP, backup_dir: Optional[str] = None) -> List[str]:
+    """Удалить самые старые снапшоты сверх лимита. Возвращает удалённые пути"""
+    snapshots = list_snapshots(backup_dir)
+    removed = snapshots[:-keep] if keep > 0 else []
+    for path in removed:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    return removed
+
+
+def run_backup(
+    compress: Optional[bool] = None,
+    pages: int = BACKUP_PAGES,
+    pause: float = BACKUP_PAUSE,
+) -> BackupResult:
+    """
+    Сделать снапшот базы без остановки бота.
+    Блокирующая функция: вызывать из фонового потока (asyncio.to_thread).
+    """
+    if compress is None:
+        compress = BACKUP_COMPRESS
+    if not _backup_lock.acquire(blocking=False):
+        raise RuntimeError("бэкап уже выполняется")
+    try:
+        started = time.monotonic()
+        tenant = current_tenant()
+        backup_dir = tenant.backup_dir or BACKUP_DIR
+        os.makedirs(backup_dir, exist_ok=True)
+        now = time.time()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"{int(now * 1000) % 1000:03d}"
+        name = f"{SNAPSHOT_PREFIX}{stamp}.db"
+        final_path = os.path.join(backup_dir, name)
+        tmp_path = final_path + ".tmp"
+
+        try:
+            _copy_online(tenant.db_file, tmp_path, pages, pause)
+            integrity = _integrity_check(tmp_path)
+            if integrity != "ok":
+                raise RuntimeError(f"снапшот не прошёл integrity_check: {integrity}")
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        os.replace(tmp_path, final_path)
+        if compress:
+            final_path = _compress(final_path)
+        rotate_snapshots(backup_dir=backup_dir)
+
+        return BackupResult(
+            path=final_path,
+            size=os.path.getsize(final_path),
+            duration=time.monotonic() - started,
+            integrity=integrity,
+        )
+    finally:
+        _backup_lock.release()
+
+
+def start_backup_scheduler(
+    interval: int = BACKUP_INTERVAL, tenants: Optional[List[Tenant]] = None
+) -> Optional[threading.Thread]:
+    """Запустить фоновый поток с периодическими бэкапами (interval <= 0 — выключено)"""
+    if interval <= 0:
+        return None
+    targets = tenants or [current_tenant()]
+
+    def loop() -> None:
+        while not _scheduler_stop.wait(interval):
+            for tenant in targets:
+                try:
+                    with use_tenant(tenant):
+                        result = run_backup()
+                    log.info(
+                        "Бэкап %s: %s за %.1f с",
+                        result.path,
+                        format_size(result.size),
+                        result.duration,
+                        extra={"db": tenant.db_file},
+                    )
+                except Exception as e:  # noqa: BLE001
+                    log.error("Ошибка бэкапа: %s", e, extra={"db": tenant.db_file})
+
+    _scheduler_stop.clear()
+    thread = threading.Thread(target=loop, name="slovli-backup", daemon=True)
+    thread.start()
+    return thread
+
+
+def stop_backup_scheduler() -> None:
+    _scheduler_stop.set()
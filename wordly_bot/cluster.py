@@ -0,0 +1,288 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from telegram import Bot, Update
+from telegram.error import NetworkError, RetryAfter, TimedOut
+from telegram.ext import ApplicationBuilder
+
+from .backup import start_backup_scheduler, stop_backup_scheduler
+from .config import (
+    BOT_MODE,
+    CLUSTER_TOP_REFRESH,
+    HEALTH_PATH,
+    METRICS_PORT,
+    TOKEN,
+    WEBHOOK_LISTEN,
+    WEBHOOK_PATH,
+    WORDS_FILE,
+)
+from .db import enable_wal
+from .health import start_health_server, stop_health_server, use_health_port
+from .leaderboard import GLOBAL_TOP
+from .metrics import start_metrics_server, stop_metrics_server, use_metrics_port
+from .network import bot_kwargs
+
+log = logging.getLogger(__name__)
+
+# Сколько ждать воркеры при остановке и как часто проверять, живы ли они
+STOP_TIMEOUT = 15.0
+MONITOR_INTERVAL = 5.0
+# Как часто воркер проверяет, не изменили ли words.txt через /addword в другом воркере
+WORDS_WATCH_INTERVAL = 10.0
+POLL_TIMEOUT = 30
+
+
+def shard_for(chat_id: int, shards: int) -> int:
+    """Номер воркера для чата; crc32 не зависит от процесса и перезапуска, в отличие от hash()"""
+    return zlib.crc32(str(chat_id).encode()) % shards
+
+
+def update_shard_key(update: Update) -> int:
+    if update.effective_chat is not None:
+        return update.effective_chat.id
+    if update.effective_user is not None:
+        return update.effective_user.id
+    return 0
+
+
+# --- Воркер ---
+
+
+async def _watch_words_file(stop: asyncio.Event) -> None:
+    from .handlers import reload_word_dictionaries
+
+    try:
+        mtime = os.path.getmtime(WORDS_FILE)
+    except OSError:
+        mtime = 0.0
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), WORDS_WATCH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        try:
+            current = os.path.getmtime(WORDS_FILE)
+        except OSError:
+            continue
+        if current != mtime:
+            mtime = current
+            await reload_word_dictionaries()
+
+
+async def _serve_worker(index: int, inbox, processes: int) -> None:
+    from .main import build_application
+
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    app = build_application(processes, ApplicationBuilder().updater(None))
+
+    def read_inbox() -> None:
+        # Очередь multiprocessing блокирующая — читаем её в отдельном потоке
+        while True:
+            payload = inbox.get()
+            if payload is None:
+                loop.call_soon_threadsafe(stop.set)
+                return
+            try:
+                update = Update.de_json(json.loads(payload), app.bot)
+            except (ValueError, TypeError, KeyError) as e:
+                log.warning("Некорректное обновление: %s", e, extra={"worker": index})
+                continue
+            loop.call_soon_threadsafe(app.update_queue.put_nowait, update)
+
+    await app.initialize()
+    if app.post_init:
+        await app.post_init(app)
+    watcher = None
+    try:
+        await app.start()
+        threading.Thread(target=read_inbox, name=f"slovli-inbox-{index}", daemon=True).start()
+        watcher = asyncio.create_task(_watch_words_file(stop))
+        log.info("Воркер запущен", extra={"worker": index, "pid": os.getpid()})
+        await stop.wait()
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+        if app.running:
+            await app.stop()
+        if app.post_stop:
+            await app.post_stop(app)
+        await app.shutdown()
+        if app.post_shutdown:
+            await app.post_shutdown(app)
+        log.info("Воркер остановлен", extra={"worker": index})
+
+
+def worker_main(index: int, inbox, processes: int) -> None:
+    # Ctrl+C приходит всей группе процессов; воркер останавливается только по команде ведущего
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    # У каждого воркера свой экземпляр топа: в базу он не пишет, а периодически перечитывает stats
+    GLOBAL_TOP.share(CLUSTER_TOP_REFRESH)
+    if METRICS_PORT:
+        use_metrics_port(METRICS_PORT + 1 + index)
+    # Живость и готовность проверяет ведущий процесс: он же видит, живы ли воркеры
+    use_health_port(0)
+    asyncio.run(_serve_worker(index, inbox, processes))
+
+
+# --- Ведущий процесс ---
+
+
+class Supervisor:
+    """Запускает воркеры и раздаёт им обновления: все обновления одного чата попадают в один воркер"""
+
+    def __init__(self, workers: int):
+        # fork: воркеры получают уже загруженные словари и делят их страницы памяти с ведущим
+        self._ctx = multiprocessing.get_context("fork")
+        self.workers = workers
+        self.inboxes = [self._ctx.Queue() for _ in range(workers)]
+        self.processes: List[Optional[multiprocessing.Process]] = [None] * workers
+        self.routed = [0] * workers
+        self.restarts = 0
+
+    def _spawn(self, index: int) -> None:
+        process = self._ctx.Process(
+            target=worker_main,
+            args=(index, self.inboxes[index], self.workers),
+            name=f"slovli-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        self.processes[index] = process
+
+    def start(self) -> None:
+        for index in range(self.workers):
+            self._spawn(index)
+
+    def check(self) -> None:
+        """Перезапустить упавшие воркеры; их очереди сохраняются, обновления не теряются"""
+        for index, process in enumerate(self.processes):
+            if process is not None and not process.is_alive():
+                log.error("Воркер завершился, перезапуск", extra={"worker": index, "exitcode": process.exitcode})
+                self.restarts += 1
+                self._spawn(index)
+
+    async def deliver(self, update: Update) -> None:
+        index = shard_for(update_shard_key(update), self.workers)
+        self.inboxes[index].put(update.to_json())
+        self.routed[index] += 1
+
+    def status(self) -> Dict[str, object]:
+        return {
+            "workers": self.workers,
+            "alive": sum(1 for p in self.processes if p is not None and p.is_alive()),
+            "routed": list(self.routed),
+            "restarts": self.restarts,
+        }
+
+    def check_alive(self) -> Tuple[bool, str]:
+        alive = sum(1 for p in self.processes if p is not None and p.is_alive())
+        return alive == self.workers, f"живых воркеров: {alive} из {self.workers}"
+
+    def stop(self, timeout: float = STOP_TIMEOUT) -> None:
+        for inbox in self.inboxes:
+            inbox.put(None)
+        deadline = time.monotonic() + timeout
+        for process in self.processes:
+            if process is not None:
+                process.join(max(0.0, deadline - time.monotonic()))
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+        for inbox in self.inboxes:
+            inbox.close()
+
+
+async def _monitor(supervisor: Supervisor, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), MONITOR_INTERVAL)
+        except asyncio.TimeoutError:
+            supervisor.check()
+
+
+async def _poll(bot: Bot, supervisor: Supervisor, stop: asyncio.Event) -> None:
+    """getUpdates в ведущем процессе; offset подтверждается только после передачи воркеру"""
+    await bot.delete_webhook()
+    offset = 0
+    try:
+        while not stop.is_set():
+            try:
+                updates = await bot.get_updates(
+                    offset=offset, timeout=POLL_TIMEOUT, allowed_updates=Update.ALL_TYPES
+                )
+            except RetryAfter as e:
+                await asyncio.sleep(float(e.retry_after))
+                continue
+            except (TimedOut, NetworkError) as e:
+                log.warning("Ошибка getUpdates: %s", e)
+                await asyncio.sleep(1)
+                continue
+            for update in updates:
+                await supervisor.deliver(update)
+                offset = update.update_id + 1
+    finally:
+        # Последнюю переданную пачку подтверждает только следующий getUpdates: без него после
+        # перезапуска Telegram пришлёт её снова, и /new или ход применятся дважды
+        if offset:
+            try:
+                await bot.get_updates(offset=offset, timeout=0)
+            except Exception as e:  # noqa: BLE001
+                log.warning("Не удалось подтвердить обновления до %d: %s", offset, e)
+
+
+async def _serve_ingress(supervisor: Supervisor) -> None:
+    from .webhook import WebhookReceiver, register_webhook, stop_on_signals, webhook_secret, webhook_server
+
+    stop = asyncio.Event()
+    stop_on_signals(stop)
+    monitor = asyncio.create_task(_monitor(supervisor, stop))
+    # Метрики ведущего (getUpdates/setWebhook) на METRICS_PORT, воркеров — на следующих портах
+    await start_metrics_server()
+    start_health_server(extra_checks={"workers": supervisor.check_alive})
+    async with Bot(TOKEN, **bot_kwargs()) as bot:
+        if BOT_MODE == "webhook":
+            secret = webhook_secret()
+            server = webhook_server(WebhookReceiver(bot, secret, supervisor.deliver, supervisor.status))
+            await server.start()
+            await register_webhook(bot, secret)
+            log.info("Вебхук слушает %s:%s%s, health: %s", WEBHOOK_LISTEN, server.port, WEBHOOK_PATH, HEALTH_PATH)
+            try:
+                await stop.wait()
+            finally:
+                await server.stop()
+        else:
+            poller = asyncio.create_task(_poll(bot, supervisor, stop))
+            await stop.wait()
+            poller.cancel()
+            try:
+                await poller
+            except asyncio.CancelledError:
+                pass
+    monitor.cancel()
+    await stop_metrics_server()
+    stop_health_server()
+
+
+def run_cluster(workers: int) -> None:
+    """Режим нескольких процессов: ведущий получает обновления и раздаёт их воркерам по chat_id"""
+    log.info("Журнал базы: %s, воркеров: %d", enable_wal(), workers)
+    supervisor = Supervisor(workers)
+    supervisor.start()
+    start_backup_scheduler()
+    try:
+        asyncio.run(_serve_ingress(supervisor))
+    finally:
+        log.info("Остановка воркеров")
+        supervisor.stop()
+        stop_backup_scheduler()
+        log.info("Обновлений по воркерам: %s", supervisor.routed)
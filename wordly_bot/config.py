@@ -7,27 +7,152 @@ load_dotenv()
 # Core game config
 ATTEMPTS = 6
 WORD_LEN = 5
+WORD_LENGTHS = range(4, 10)  # длины слов, которые можно выбрать через /length
 
 # Files and DB
 WORDS_FILE = os.getenv("SLOVLI_WORDS_FILE", "words.txt")
 DB_FILE = os.getenv("SLOVLI_DB_FILE", "slovli.db")
 
+# Backups
+BACKUP_DIR = os.getenv("SLOVLI_BACKUP_DIR", os.path.join(os.path.dirname(DB_FILE) or ".", "backups"))
+BACKUP_INTERVAL = int(os.getenv("SLOVLI_BACKUP_INTERVAL", "0"))  # секунды, 0 — без расписания
+BACKUP_KEEP = int(os.getenv("SLOVLI_BACKUP_KEEP", "7"))
+BACKUP_COMPRESS = os.getenv("SLOVLI_BACKUP_COMPRESS", "1") == "1"
+BACKUP_PAGES = int(os.getenv("SLOVLI_BACKUP_PAGES", "256"))  # страниц за один шаг
+BACKUP_PAUSE = float(os.getenv("SLOVLI_BACKUP_PAUSE", "0.005"))  # пауза между шагами, сек
+# Сколько раз запись в базу может начать пошаговое копирование заново, прежде чем база копируется за один шаг
+BACKUP_MAX_RESTARTS = int(os.getenv("SLOVLI_BACKUP_MAX_RESTARTS", "3"))
+
+# Stats export (/exportstats и python -m wordly_bot.export)
+EXPORT_DIR = os.getenv("SLOVLI_EXPORT_DIR", os.path.join(os.path.dirname(DB_FILE) or ".", "exports"))
+EXPORT_CHUNK = int(os.getenv("SLOVLI_EXPORT_CHUNK", "5000"))  # строк за один запрос
+EXPORT_MAX_UPLOAD = int(os.getenv("SLOVLI_EXPORT_MAX_UPLOAD", str(45 * 1024 * 1024)))  # лимит документа в Telegram
+EXPORT_KEEP = int(os.getenv("SLOVLI_EXPORT_KEEP", "3"))  # сколько выгрузок таблицы, не влезших в Telegram, хранить
+
+# Render
+# 1 — одно сообщение с доской на игру, которое правится после каждого хода
+BOARD_EDIT = os.getenv("SLOVLI_BOARD_EDIT", "0") == "1"
+RENDER_FORMAT = os.getenv("SLOVLI_RENDER_FORMAT", "png")  # png | palette | webp | emoji | text
+RENDER_TILE = int(os.getenv("SLOVLI_RENDER_TILE", "80"))  # размер плитки в пикселях
+RENDER_PNG_LEVEL = int(os.getenv("SLOVLI_RENDER_PNG_LEVEL", "6"))  # zlib 0-9
+RENDER_CANVAS_CACHE_MB = float(os.getenv("SLOVLI_RENDER_CANVAS_CACHE_MB", "64"))  # холсты активных игр
+RENDER_POOL_KIND = os.getenv("SLOVLI_RENDER_POOL", "thread")  # thread | process
+RENDER_WORKERS = int(os.getenv("SLOVLI_RENDER_WORKERS", "2"))
+RENDER_MAX_PENDING = int(os.getenv("SLOVLI_RENDER_MAX_PENDING", "32"))  # больше — доска уходит текстом
+
+# Карты custom emoji для текстовой доски (emoji_green.json, emoji_yellow.json, emoji_red.json)
+EMOJI_DIR = os.getenv("SLOVLI_EMOJI_DIR", ".")
+
+# Параллельная обработка обновлений: разные чаты — параллельно, внутри чата — строго по очереди
+CONCURRENT_UPDATES = int(os.getenv("SLOVLI_CONCURRENT_UPDATES", "16"))  # 1 — последовательно, как раньше
+MAX_PENDING_UPDATES = int(os.getenv("SLOVLI_MAX_PENDING_UPDATES", "1024"))  # лимит ждущих обновлений
+
+# HTTP-клиент для Bot API: пул соединений, таймауты (секунды), повторы
+HTTP_POOL_SIZE = int(os.getenv("SLOVLI_HTTP_POOL", "64"))
+HTTP_UPDATES_POOL_SIZE = int(os.getenv("SLOVLI_HTTP_UPDATES_POOL", "2"))  # отдельный пул для getUpdates
+HTTP_VERSION = os.getenv("SLOVLI_HTTP_VERSION", "1.1")  # 2 — нужен пакет h2
+HTTP_KEEPALIVE = float(os.getenv("SLOVLI_HTTP_KEEPALIVE", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("SLOVLI_HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("SLOVLI_HTTP_READ_TIMEOUT", "10"))
+HTTP_WRITE_TIMEOUT = float(os.getenv("SLOVLI_HTTP_WRITE_TIMEOUT", "10"))
+HTTP_MEDIA_WRITE_TIMEOUT = float(os.getenv("SLOVLI_HTTP_MEDIA_WRITE_TIMEOUT", "20"))  # загрузка картинок
+HTTP_POOL_TIMEOUT = float(os.getenv("SLOVLI_HTTP_POOL_TIMEOUT", "3"))  # ожидание свободного соединения
+HTTP_RETRIES = int(os.getenv("SLOVLI_HTTP_RETRIES", "2"))
+HTTP_BACKOFF = float(os.getenv("SLOVLI_HTTP_BACKOFF", "0.5"))
+API_BASE_URL = os.getenv("SLOVLI_API_BASE_URL", "")  # например http://127.0.0.1:8081 для fake_bot_api.py
+
+# Несколько ботов в одном процессе: JSON со списком {name, token|token_env, db_file, admin_user_id}
+TENANTS_FILE = os.getenv("SLOVLI_TENANTS_FILE", "")
+
+# Кластер: ведущий процесс получает обновления и раздаёт их воркерам по chat_id (0 — один процесс)
+CLUSTER_WORKERS = int(os.getenv("SLOVLI_WORKERS", "0"))
+CLUSTER_TOP_REFRESH = float(os.getenv("SLOVLI_CLUSTER_TOP_REFRESH", "30"))  # как часто воркер перечитывает /top
+
+# Исходящие запросы к Telegram: общий лимит и лимиты чатов (token bucket), повтор после 429
+RATE_LIMIT = os.getenv("SLOVLI_RATE_LIMIT", "1") == "1"
+RATE_GLOBAL = float(os.getenv("SLOVLI_RATE_GLOBAL", "30"))  # сообщений в секунду на бота
+RATE_CHAT = float(os.getenv("SLOVLI_RATE_CHAT", "1"))  # сообщений в секунду в личный чат
+RATE_GROUP_PER_MIN = float(os.getenv("SLOVLI_RATE_GROUP_PER_MIN", "20"))  # сообщений в минуту в группу
+RATE_BURST = int(os.getenv("SLOVLI_RATE_BURST", "3"))  # сколько сообщений в чат можно отправить подряд
+RATE_MAX_RETRIES = int(os.getenv("SLOVLI_RATE_MAX_RETRIES", "3"))
+
+# Global leaderboard (/top)
+TOP_SIZE = int(os.getenv("SLOVLI_TOP_SIZE", "10"))  # сколько строк показывать
+TOP_CAPACITY = int(os.getenv("SLOVLI_TOP_CAPACITY", "100"))  # сколько держать в памяти
+TOP_MIN_PLAYED = int(os.getenv("SLOVLI_TOP_MIN_PLAYED", "10"))  # минимум игр для рейтинга по проценту побед
+
 # Telegram
 TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN")
 
+# Режим получения обновлений: polling или webhook
+BOT_MODE = os.getenv("SLOVLI_MODE", "polling")
+WEBHOOK_LISTEN = os.getenv("SLOVLI_WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("SLOVLI_WEBHOOK_PORT", "8080"))
+WEBHOOK_PATH = os.getenv("SLOVLI_WEBHOOK_PATH", "/telegram")
+WEBHOOK_URL = os.getenv("SLOVLI_WEBHOOK_URL", "")  # публичный адрес, например https://bot.example.com
+WEBHOOK_SECRET = os.getenv("SLOVLI_WEBHOOK_SECRET", "")  # пусто — генерируется, только если задан WEBHOOK_URL
+HEALTH_PATH = os.getenv("SLOVLI_HEALTH_PATH", "/healthz")
+
+# Метрики Prometheus на /metrics (SLOVLI_METRICS=0 — без замеров вообще, порт 0 — без HTTP-сервера)
+METRICS_ENABLED = os.getenv("SLOVLI_METRICS", "1") == "1"
+METRICS_LISTEN = os.getenv("SLOVLI_METRICS_LISTEN", "127.0.0.1")
+METRICS_PORT = int(os.getenv("SLOVLI_METRICS_PORT", "9090"))
+
+# Проверки живости и готовности на отдельном порту: /livez и /readyz (0 — без сервера)
+HEALTH_LISTEN = os.getenv("SLOVLI_HEALTH_LISTEN", "127.0.0.1")
+HEALTH_PORT = int(os.getenv("SLOVLI_HEALTH_PORT", "8082"))
+HEALTH_LOOP_TIMEOUT = float(os.getenv("SLOVLI_HEALTH_LOOP_TIMEOUT", "2"))  # сек на ответ event loop
+HEALTH_DB_BUDGET = float(os.getenv("SLOVLI_HEALTH_DB_BUDGET", "1"))  # сек на запрос к базе
+HEALTH_UPDATES_MAX_AGE = float(os.getenv("SLOVLI_HEALTH_UPDATES_MAX_AGE", "120"))  # с последнего getUpdates
+HEALTH_WEBHOOK_MAX_AGE = float(os.getenv("SLOVLI_HEALTH_WEBHOOK_MAX_AGE", "0"))  # вебхук, 0 — не проверять
+HEALTH_EXIT_AFTER = float(os.getenv("SLOVLI_HEALTH_EXIT_AFTER", "0"))  # завершить процесс, если loop мёртв N сек
+
+# Логи: JSON в stdout через очередь и отдельный поток (text — для чтения глазами)
+LOG_LEVEL = os.getenv("SLOVLI_LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("SLOVLI_LOG_FORMAT", "json")  # json | text
+LOG_SAMPLE = float(os.getenv("SLOVLI_LOG_SAMPLE", "0.1"))  # доля чатов, для которых пишутся частые события
+LOG_REDACT = os.getenv("SLOVLI_LOG_REDACT", "1") == "1"  # 0 — писать загаданные слова (для отладки)
+LOG_QUEUE_SIZE = int(os.getenv("SLOVLI_LOG_QUEUE_SIZE", "10000"))  # больше — записи отбрасываются
+
+# Сторож event loop: замер задержки loop и стек кода, который держит его дольше порога
+LOOP_WATCHDOG = os.getenv("SLOVLI_LOOP_WATCHDOG", "1") == "1"
+LOOP_LAG_INTERVAL = float(os.getenv("SLOVLI_LOOP_LAG_INTERVAL", "0.1"))  # такт замера, сек
+LOOP_LAG_THRESHOLD = float(os.getenv("SLOVLI_LOOP_LAG_THRESHOLD", "0.25"))  # дольше — печатать стек
+LOOP_LAG_WINDOW = int(os.getenv("SLOVLI_LOOP_LAG_WINDOW", "600"))  # тактов в окне процентилей
+LOOP_LAG_STACK_DEPTH = int(os.getenv("SLOVLI_LOOP_LAG_STACK_DEPTH", "12"))
+
+# /profile: профилирование работающего бота по команде администратора
+PROFILE_MAX_SECONDS = int(os.getenv("SLOVLI_PROFILE_MAX_SECONDS", "300"))
+PROFILE_TOP = int(os.getenv("SLOVLI_PROFILE_TOP", "40"))  # строк в отчёте
+
+# Запись входящих обновлений для replay.py (пусто — не записывать); текст не-ходов хэшируется
+RECORD_DIR = os.getenv("SLOVLI_RECORD_DIR", "")
+RECORD_MAX_MB = float(os.getenv("SLOVLI_RECORD_MAX_MB", "16"))  # размер файла до сжатия
+RECORD_KEEP = int(os.getenv("SLOVLI_RECORD_KEEP", "20"))  # сколько файлов хранить
+RECORD_SALT = os.getenv("SLOVLI_RECORD_SALT", "")  # пусто — случайная соль на каждый запуск
+
+# Быстрый старт: при запуске грузится только словарь длины WORD_LEN, остальные — в фоне или при первом
+# обращении; Pillow импортируется при первой отрисовке (в кластере словари всё равно грузятся до fork)
+LAZY_START = os.getenv("SLOVLI_LAZY_START", "1") == "1"
+
+# Предупреждения о настройках: импорт config ничего не печатает, main выводит их в лог после настройки логов
+CONFIG_WARNINGS = []
+
 # ID администратора
 admin_id_str = os.getenv("SLOVLI_ADMIN_USER_ID")
 if admin_id_str is None or admin_id_str == "0":
-    print("[WARNING] SLOVLI_ADMIN_USER_ID не установлен! Административные команды недоступны.")
-    print("[INFO] Создайте файл .env и добавьте: SLOVLI_ADMIN_USER_ID=ваш_id")
+    CONFIG_WARNINGS.append(
+        "SLOVLI_ADMIN_USER_ID не установлен! Административные команды недоступны. "
+        "Создайте файл .env и добавьте: SLOVLI_ADMIN_USER_ID=ваш_id"
+    )
     ADMIN_USER_ID = 0
 else:
     try:
         ADMIN_USER_ID = int(admin_id_str)
-        print(f"[INFO] Администратор установлен: {ADMIN_USER_ID}")
     except ValueError:
-        print(f"[ERROR] Неверный формат SLOVLI_ADMIN_USER_ID: {admin_id_str}")
-        print("[INFO] ID должен быть числом (например: 123456789)")
+        CONFIG_WARNINGS.append(
+            f"Неверный формат SLOVLI_ADMIN_USER_ID: {admin_id_str}. ID должен быть числом (например: 123456789)"
+        )
         ADMIN_USER_ID = 0
 
 
@@ -1,18 +1,31 @@
 import json
 import sqlite3
 import time
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
-from .config import DB_FILE
+from .metrics import DB_SECONDS, instrument_functions
+from .tenants import current_tenant
 
 
 def db() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_FILE)
+    # В режиме нескольких ботов у каждого своя база
+    conn = sqlite3.connect(current_tenant().db_file)
     conn.row_factory = sqlite3.Row
     return conn
 
 
+def enable_wal() -> str:
+    """WAL: читатели (бэкап, выгрузка, воркеры кластера) не ждут писателя и не держат его"""
+    con = db()
+    mode = con.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+    con.close()
+    return mode
+
+
 def init_db():
+    # Режим журнала хранится в самом файле базы; WAL нужен во всех режимах: бэкап и выгрузка
+    # читают базу в фоне, и с обычным журналом их чтение останавливало бы запись ходов
+    enable_wal()
     con = db()
     cur = con.cursor()
     # Helper: ensure a column exists; if not, add it
@@ -38,6 +51,7 @@ def init_db():
     )
     # In-place migration for existing DBs missing the column
     ensure_column("games", "word_length", "word_length INTEGER NOT NULL DEFAULT 5")
+    ensure_column("games", "board_message_id", "board_message_id INTEGER")
     cur.execute(
         """
         CREATE TABLE IF NOT EXISTS stats (
@@ -92,6 +106,8 @@ def init_db():
         );
         """
     )
+    ensure_column("chat_settings", "image_format", "image_format TEXT NOT NULL DEFAULT ''")
+    ensure_column("chat_settings", "tile_size", "tile_size INTEGER NOT NULL DEFAULT 0")
     cur.execute(
         """
         CREATE TABLE IF NOT EXISTS custom_words (
@@ -137,6 +153,28 @@ def init_db():
         );
         """
     )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS global_top (
+            board TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            score1 REAL NOT NULL,
+            score2 REAL NOT NULL,
+            name TEXT NOT NULL DEFAULT '',
+            PRIMARY KEY(board, user_id)
+        );
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS global_top_floor (
+            board TEXT PRIMARY KEY,
+            score1 REAL NOT NULL,
+            score2 REAL NOT NULL,
+            user_id INTEGER NOT NULL
+        );
+        """
+    )
     con.commit()
     con.close()
 
@@ -170,6 +208,15 @@ def save_game(chat_id: int, answer: str, attempts: List[List], status: str, word
     con.close()
 
 
+def set_board_message_id(chat_id: int, message_id: int):
+    """Запомнить сообщение с доской текущей игры (режим одного сообщения на игру)"""
+    con = db()
+    cur = con.cursor()
+    cur.execute("UPDATE games SET board_message_id=? WHERE chat_id=?", (message_id, chat_id))
+    con.commit()
+    con.close()
+
+
 def clear_game(chat_id: int):
     con = db()
     cur = con.cursor()
@@ -180,11 +227,14 @@ def clear_game(chat_id: int):
 
 def finish_game_and_update_stats(
     winner_user_id: Optional[int], won: bool, attempts_count: Optional[int]
-):
+) -> Optional[dict]:
+    """Обновляет статистику игрока и возвращает новые played/wins/max_streak"""
     if winner_user_id is None:
-        return
+        return None
     con = db()
     cur = con.cursor()
+    # Игрок может закончить игры в чатах разных воркеров одновременно: чтение и запись — одна транзакция
+    cur.execute("BEGIN IMMEDIATE")
     cur.execute("SELECT * FROM stats WHERE user_id=?", (winner_user_id,))
     st = cur.fetchone()
     if st is None:
@@ -211,6 +261,7 @@ def finish_game_and_update_stats(
     )
     con.commit()
     con.close()
+    return {"played": played, "wins": wins, "max_streak": max_streak}
 
 
 def update_chat_stats(chat_id: int, won: bool, attempts_count: Optional[int]):
@@ -298,6 +349,135 @@ def get_chat_leaderboard(chat_id: int, limit: int = 10) -> List[sqlite3.Row]:
     return rows
 
 
+_TOP_ORDER = {
+    "wins": ("s.wins > 0", "s.wins DESC, s.played ASC"),
+    "rate": ("s.played >= ?", "CAST(s.wins AS REAL) / s.played DESC, s.wins DESC"),
+    "streak": ("s.max_streak > 0", "s.max_streak DESC, s.wins DESC"),
+}
+
+
+def get_top_stats(board: str, limit: int, min_played: int = 1) -> List[sqlite3.Row]:
+    """Полный запрос рейтинга по таблице stats — только для первичного построения/досыпки топа"""
+    where, order = _TOP_ORDER[board]
+    params = (min_played, limit) if "?" in where else (limit,)
+    con = db()
+    cur = con.cursor()
+    cur.execute(
+        f"""
+        SELECT s.user_id, s.played, s.wins, s.max_streak,
+               COALESCE(u.first_name, u.username, '') AS name
+        FROM stats s LEFT JOIN users u ON u.user_id = s.user_id
+        WHERE {where}
+        ORDER BY {order}, s.user_id ASC
+        LIMIT ?
+        """,
+        params,
+    )
+    rows = cur.fetchall()
+    con.close()
+    return rows
+
+
+def load_global_top() -> Tuple[List[sqlite3.Row], List[sqlite3.Row]]:
+    """Загрузить сохранённый глобальный топ: (записи, нижние границы досок)"""
+    con = db()
+    cur = con.cursor()
+    cur.execute("SELECT board, user_id, score1, score2, name FROM global_top")
+    entries = cur.fetchall()
+    cur.execute("SELECT board, score1, score2, user_id FROM global_top_floor")
+    floors = cur.fetchall()
+    con.close()
+    return entries, floors
+
+
+def save_global_top_changes(
+    upserts: List[Tuple[str, int, float, float, str]],
+    deletes: List[Tuple[str, int]],
+    floors: Dict[str, Optional[Tuple[float, float, int]]],
+    replace_boards: Tuple[str, ...] = (),
+):
+    """Сохранить изменённые строки глобального топа одной транзакцией"""
+    con = db()
+    cur = con.cursor()
+    for board in replace_boards:
+        cur.execute("DELETE FROM global_top WHERE board=?", (board,))
+    if deletes:
+        cur.executemany("DELETE FROM global_top WHERE board=? AND user_id=?", deletes)
+    if upserts:
+        cur.executemany(
+            """
+            INSERT INTO global_top(board, user_id, score1, score2, name)
+            VALUES(?,?,?,?,?)
+            ON CONFLICT(board, user_id) DO UPDATE SET
+                score1=excluded.score1,
+                score2=excluded.score2,
+                name=excluded.name
+            """,
+            upserts,
+        )
+    for board, floor in floors.items():
+        if floor is None:
+            cur.execute("DELETE FROM global_top_floor WHERE board=?", (board,))
+            continue
+        cur.execute(
+            """
+            INSERT INTO global_top_floor(board, score1, score2, user_id)
+            VALUES(?,?,?,?)
+            ON CONFLICT(board) DO UPDATE SET
+                score1=excluded.score1,
+                score2=excluded.score2,
+                user_id=excluded.user_id
+            """,
+            (board, *floor),
+        )
+    con.commit()
+    con.close()
+
+
+EXPORTABLE_TABLES = ("stats", "chat_stats", "chat_user_wins")
+
+
+def get_table_columns(table: str) -> List[str]:
+    if table not in EXPORTABLE_TABLES:
+        raise ValueError(f"Таблица недоступна для выгрузки: {table}")
+    con = db()
+    cur = con.cursor()
+    cur.execute(f"PRAGMA table_info({table})")
+    columns = [row[1] for row in cur.fetchall()]
+    con.close()
+    return columns
+
+
+def iter_table_chunks(table: str, chunk_size: int = 5000) -> Iterator[List[tuple]]:
+    """
+    Читает таблицу пачками по rowid. Каждая пачка — отдельный короткий запрос,
+    поэтому выгрузка не держит блокировку базы и не мешает записи ходов.
+    """
+    if table not in EXPORTABLE_TABLES:
+        raise ValueError(f"Таблица недоступна для выгрузки: {table}")
+    con = db()
+    try:
+        cur = con.cursor()
+        last_rowid = None
+        while True:
+            if last_rowid is None:
+                cur.execute(f"SELECT rowid, * FROM {table} ORDER BY rowid LIMIT ?", (chunk_size,))
+            else:
+                cur.execute(
+                    f"SELECT rowid, * FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last_rowid, chunk_size),
+                )
+            rows = cur.fetchall()
+            if not rows:
+                break
+            last_rowid = rows[-1][0]
+            yield [tuple(row)[1:] for row in rows]
+            if len(rows) < chunk_size:
+                break
+    finally:
+        con.close()
+
+
 def get_chat_settings(chat_id: int) -> Optional[sqlite3.Row]:
     con = db()
     cur = con.cursor()
@@ -324,6 +504,24 @@ def save_chat_settings(chat_id: int, word_length: int):
     con.close()
 
 
+def save_chat_image_settings(chat_id: int, image_format: str, tile_size: int):
+    """Формат картинки доски и размер плитки для чата ('' и 0 — настройки по умолчанию)"""
+    con = db()
+    cur = con.cursor()
+    cur.execute(
+        """
+        INSERT INTO chat_settings(chat_id, created_at, image_format, tile_size)
+        VALUES(?,?,?,?)
+        ON CONFLICT(chat_id) DO UPDATE SET
+            image_format=excluded.image_format,
+            tile_size=excluded.tile_size
+        """,
+        (chat_id, int(time.time()), image_format, tile_size),
+    )
+    con.commit()
+    con.close()
+
+
 def get_custom_words(word_length: int) -> List[str]:
     con = db()
     cur = con.cursor()
@@ -538,3 +736,7 @@ def get_user_info(user_id: int) -> Optional[sqlite3.Row]:
 
 
 
+
+
+# Время каждой функции базы в slovli_db_query_seconds{query=...}
+instrument_functions(globals(), __name__, DB_SECONDS, exclude=("db", "enable_wal", "init_db"))
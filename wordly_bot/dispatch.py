@@ -0,0 +1,98 @@
+import asyncio
+from typing import Any, Awaitable, Dict, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from .config import CONCURRENT_UPDATES, MAX_PENDING_UPDATES
+
+
+class _ChatSlot:
+    """Замок чата и число обновлений этого чата, которые держат или ждут его"""
+
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Обновления разных чатов обрабатываются параллельно, обновления одного чата — строго по очереди.
+    on_text читает и перезаписывает games.attempts_json целиком, поэтому два хода в одном чате
+    не должны пересекаться, иначе один из них потеряется.
+
+    Семафор базового класса ограничивает число ждущих обновлений (max_pending),
+    свой семафор — число одновременно выполняемых хендлеров (workers).
+    Ждущие своей очереди обновления одного чата не занимают рабочие места и не тормозят другие чаты.
+    Замок чата удаляется, как только у чата не остаётся обновлений.
+    """
+
+    def __init__(self, workers: int = CONCURRENT_UPDATES, max_pending: int = MAX_PENDING_UPDATES):
+        super().__init__(max(max_pending, workers))
+        self.workers = workers
+        self._running = asyncio.Semaphore(workers)
+        self._chats: Dict[int, _ChatSlot] = {}
+        self.active = 0
+        self.processed = 0
+        self.max_chat_queue = 0
+
+    @staticmethod
+    def chat_key(update: object) -> Optional[int]:
+        if isinstance(update, Update) and update.effective_chat is not None:
+            return update.effective_chat.id
+        return None
+
+    async def _run(self, coroutine: "Awaitable[Any]") -> None:
+        async with self._running:
+            self.active += 1
+            try:
+                await coroutine
+            finally:
+                self.active -= 1
+                self.processed += 1
+
+    async def do_process_update(self, update: object, coroutine: "Awaitable[Any]") -> None:
+        chat_id = self.chat_key(update)
+        if chat_id is None:
+            await self._run(coroutine)
+            return
+        # Замок берётся без await до него, поэтому очередь чата идёт в порядке получения обновлений
+        slot = self._chats.get(chat_id)
+        if slot is None:
+            slot = self._chats[chat_id] = _ChatSlot()
+        slot.users += 1
+        if slot.users > self.max_chat_queue:
+            self.max_chat_queue = slot.users
+        try:
+            async with slot.lock:
+                await self._run(coroutine)
+        finally:
+            slot.users -= 1
+            if slot.users == 0:
+                del self._chats[chat_id]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "active": self.active,
+            "chats": len(self._chats),
+            "queued": sum(slot.users for slot in self._chats.values()) - self.active,
+            "processed": self.processed,
+            "max_chat_queue": self.max_chat_queue,
+        }
+
+
+def build_update_processor(workers: int = CONCURRENT_UPDATES) -> Optional[ChatOrderedUpdateProcessor]:
+    """None — оставить стандартную последовательную обработку PTB"""
+    if workers <= 1:
+        return None
+    return ChatOrderedUpdateProcessor(workers)
+
@@ -0,0 +1,80 @@
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+from telegram import MessageEntity
+
+from .config import EMOJI_DIR
+
+log = logging.getLogger(__name__)
+
+# Карты буква -> custom_emoji_id собираются скриптом emoji_id_grabber.py
+EMOJI_MAP_FILES = {
+    "correct": "emoji_green.json",
+    "present": "emoji_yellow.json",
+    "absent": "emoji_red.json",
+}
+# Текст под кастомным эмодзи; все заглушки по 2 единицы UTF-16, поэтому смещения считаются по позиции
+PLACEHOLDERS = {"correct": "🟩", "present": "🟨", "absent": "🟥"}
+PLACEHOLDER_LEN = 2
+
+# Шаблоны: (буква, отметка) -> (заглушка, custom_emoji_id)
+_templates: Optional[Dict[Tuple[str, str], Tuple[str, str]]] = None
+# Сбрасывается, если Telegram отказал в кастомных эмодзи (нужен username с Fragment)
+_custom_emoji_available = True
+
+
+def load_emoji_templates(emoji_dir: str = EMOJI_DIR) -> Dict[Tuple[str, str], Tuple[str, str]]:
+    """Один раз прочитать карты эмодзи и подготовить шаблоны для всех букв и отметок"""
+    global _templates
+    templates: Dict[Tuple[str, str], Tuple[str, str]] = {}
+    for mark, filename in EMOJI_MAP_FILES.items():
+        path = os.path.join(emoji_dir, filename)
+        try:
+            with open(path, encoding="utf-8") as f:
+                mapping = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning("Не удалось загрузить карту эмодзи %s: %s", path, e)
+            continue
+        for letter, emoji_id in mapping.items():
+            templates[(letter.upper(), mark)] = (PLACEHOLDERS[mark], str(emoji_id))
+    _templates = templates
+    return templates
+
+
+def build_emoji_board(
+    attempts: List[Tuple[str, List[str]]]
+) -> Optional[Tuple[str, List[MessageEntity]]]:
+    """Текст доски и сущности custom_emoji; None, если для какой-то буквы нет эмодзи"""
+    templates = _templates if _templates is not None else load_emoji_templates()
+    parts: List[str] = []
+    entities: List[MessageEntity] = []
+    offset = 0
+    for r, (guess, marks) in enumerate(attempts):
+        if r:
+            parts.append("\n")
+            offset += 1
+        for ch, mark in zip(guess, marks):
+            template = templates.get((ch, mark if mark in PLACEHOLDERS else "absent"))
+            if template is None:
+                return None
+            placeholder, emoji_id = template
+            parts.append(placeholder)
+            entities.append(
+                MessageEntity(MessageEntity.CUSTOM_EMOJI, offset, PLACEHOLDER_LEN, custom_emoji_id=emoji_id)
+            )
+            offset += PLACEHOLDER_LEN
+    return "".join(parts), entities
+
+
+def custom_emoji_enabled() -> bool:
+    return _custom_emoji_available
+
+
+def disable_custom_emoji(reason: Exception) -> None:
+    """Telegram отказал в кастомных эмодзи — дальше доска отправляется цветными квадратами"""
+    global _custom_emoji_available
+    if _custom_emoji_available:
+        _custom_emoji_available = False
+        log.warning("Кастомные эмодзи недоступны, доска будет квадратами: %s", reason)
@@ -0,0 +1,144 @@
+import argparse
+import csv
+import gzip
+import json
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from .config import EXPORT_CHUNK, EXPORT_DIR, EXPORT_KEEP
+from .db import EXPORTABLE_TABLES, get_table_columns, iter_table_chunks
+from .logs import setup_logging
+from .tenants import current_tenant
+
+log = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("csv", "jsonl")
+PART_SUFFIX = ".part"
+
+
+@dataclass
+class ExportResult:
+    path: str
+    table: str
+    rows: int
+    size: int
+    duration: float
+
+
+def export_table(
+    table: str,
+    fmt: str = "csv",
+    out_dir: Optional[str] = None,
+    chunk_size: int = EXPORT_CHUNK,
+    out_path: Optional[str] = None,
+) -> ExportResult:
+    """
+    Выгрузить таблицу в gzip CSV или NDJSON, читая её пачками фиксированного размера.
+    Память не зависит от размера таблицы. Блокирующая функция — из бота вызывать через asyncio.to_thread.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат: {fmt} (доступны: {', '.join(EXPORT_FORMATS)})")
+    columns = get_table_columns(table)
+
+    started = time.monotonic()
+    if out_path is None:
+        out_dir = out_dir or current_tenant().export_dir or EXPORT_DIR
+        os.makedirs(out_dir, exist_ok=True)
+        # mkstemp занимает уникальное имя: две выгрузки одной таблицы в ту же секунду не пишут в один файл.
+        # Пока файл пишется, у него суффикс .part — ротация и список выгрузок его не видят
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=f"{table}-{time.strftime('%Y%m%d-%H%M%S')}-", suffix=f".{fmt}.gz{PART_SUFFIX}", dir=out_dir
+        )
+        os.close(fd)
+        out_path = tmp_path[: -len(PART_SUFFIX)]
+    else:
+        tmp_path = out_path + PART_SUFFIX
+
+    rows = 0
+    try:
+        with gzip.open(tmp_path, "wt", encoding="utf-8", newline="") as f:
+            writer = None
+            if fmt == "csv":
+                writer = csv.writer(f)
+                writer.writerow(columns)
+            for chunk in iter_table_chunks(table, chunk_size):
+                if writer is not None:
+                    writer.writerows(chunk)
+                else:
+                    f.writelines(
+                        json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in chunk
+                    )
+                rows += len(chunk)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, out_path)
+
+    return ExportResult(
+        path=out_path,
+        table=table,
+        rows=rows,
+        size=os.path.getsize(out_path),
+        duration=time.monotonic() - started,
+    )
+
+
+def list_exports(table: str, out_dir: Optional[str] = None) -> List[str]:
+    """Готовые выгрузки таблицы в папке от старых к новым (недописанные .part не входят)"""
+    out_dir = out_dir or current_tenant().export_dir or EXPORT_DIR
+    if not os.path.isdir(out_dir):
+        return []
+    paths = [
+        os.path.join(out_dir, n) for n in os.listdir(out_dir) if n.startswith(f"{table}-") and n.endswith(".gz")
+    ]
+    return sorted(paths, key=os.path.getmtime)
+
+
+def rotate_exports(table: str, keep: int = EXPORT_KEEP, out_dir: Optional[str] = None) -> List[str]:
+    """Удалить самые старые выгрузки таблицы сверх лимита (как снапшоты бэкапов). Возвращает удалённые пути"""
+    exports = list_exports(table, out_dir)
+    removed = exports[:-keep] if keep > 0 else []
+    for path in removed:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    return removed
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Выгрузка статистики Словли в gzip CSV/NDJSON")
+    parser.add_argument(
+        "tables",
+        nargs="*",
+        help=f"таблицы для выгрузки: {', '.join(EXPORTABLE_TABLES)} (по умолчанию все)",
+    )
+    parser.add_argument("--format", "-f", choices=EXPORT_FORMATS, default="csv")
+    parser.add_argument("--out", "-o", default=EXPORT_DIR, help="папка для файлов")
+    parser.add_argument("--chunk", type=int, default=EXPORT_CHUNK, help="строк за один запрос")
+    args = parser.parse_args(argv)
+    unknown = [t for t in args.tables if t not in EXPORTABLE_TABLES]
+    if unknown:
+        parser.error(f"неизвестные таблицы: {', '.join(unknown)}")
+
+    setup_logging()
+    for table in args.tables or EXPORTABLE_TABLES:
+        result = export_table(table, args.format, args.out, args.chunk)
+        log.info(
+            "%s: %d строк -> %s (%d байт, %.1f с)",
+            table,
+            result.rows,
+            result.path,
+            result.size,
+            result.duration,
+            extra={"table": table, "rows": result.rows, "path": result.path, "size": result.size},
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 import random
 import re
+from collections.abc import Sequence
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 from .config import WORD_LEN
 
@@ -44,6 +45,94 @@ def load_words(path: str, length: int, *, min_count: int = 1000) -> List[str]:
     )
 
 
+# Буквы А-Я без Ё занимают в cp1251 по одному байту подряд (0xC0-0xDF), поэтому порядок байтов
+# совпадает с алфавитным и отсортированный список слов остаётся отсортированным после упаковки
+PACKED_ENCODING = "cp1251"
+
+
+class PackedWords(Sequence):
+    """Отсортированный словарь одной длины в одном bytes: слово — length байт подряд.
+
+    Ведёт себя как список строк (len, индексы, срезы, in, random.choice), но вместо
+    объекта str (~60+ байт на слово) хранит length байт; in — двоичный поиск по буферу.
+    """
+
+    __slots__ = ("length", "data")
+
+    def __init__(self, length: int, data: bytes = b""):
+        if len(data) % length:
+            raise ValueError(f"Размер буфера {len(data)} не кратен длине слова {length}")
+        self.length = length
+        self.data = data
+
+    @classmethod
+    def from_words(cls, words: Iterable[str], length: int) -> "PackedWords":
+        return cls(length, b"".join(w.encode(PACKED_ENCODING) for w in sorted(set(words))))
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data) // self.length
+
+    def _word(self, i: int) -> str:
+        start = i * self.length
+        return self.data[start:start + self.length].decode(PACKED_ENCODING)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            return [self._word(i) for i in range(*index.indices(len(self)))]
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("PackedWords index out of range")
+        return self._word(index)
+
+    def __iter__(self) -> Iterator[str]:
+        data, step = self.data, self.length
+        for start in range(0, len(data), step):
+            yield data[start:start + step].decode(PACKED_ENCODING)
+
+    def __contains__(self, word: object) -> bool:
+        return self.find(word) >= 0
+
+    def find(self, word: object) -> int:
+        """Индекс слова или -1 (двоичный поиск, без декодирования буфера)"""
+        if not isinstance(word, str) or len(word) != self.length:
+            return -1
+        try:
+            key = word.encode(PACKED_ENCODING)
+        except UnicodeEncodeError:
+            return -1
+        data, step = self.data, self.length
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = mid * step
+            probe = data[start:start + step]
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+    def index(self, word, start: int = 0, stop: Optional[int] = None) -> int:
+        i = self.find(word)
+        if i < 0 or i < start or (stop is not None and i >= stop):
+            raise ValueError(f"{word!r} нет в словаре")
+        return i
+
+    def count(self, word) -> int:
+        return 1 if self.find(word) >= 0 else 0
+
+    def __repr__(self) -> str:
+        return f"<PackedWords length={self.length} words={len(self)} bytes={self.nbytes}>"
+
+
 def score_guess(guess: str, answer: str) -> List[str]:
     n = len(answer)
     marks = ["absent"] * n
@@ -88,14 +177,14 @@ def letters_aggregate(attempts: List[Tuple[str, List[str]]]) -> Dict[str, str]:
     return best
 
 
-def pick_answer(pool: List[str], word_length: int = 5) -> str:
+def pick_answer(pool: Sequence, word_length: int = 5) -> str:
     while True:
         w = random.choice(pool)
         if len(w) == word_length and re.fullmatch(r"[А-Я]{" + str(word_length) + "}", w):
             return w
 
 
-def get_words_for_length(word_length: int, all_words: List[str]) -> List[str]:
+def get_words_for_length(word_length: int, all_words: Sequence) -> Sequence:
     """Получить все слова для заданной длины"""
     return all_words
 
@@ -1,13 +1,31 @@
+import asyncio
 import json
+import logging
+import os
 import re
+import threading
 import time
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
-from telegram import Update
+from telegram import InputFile, Update
 from telegram.ext import ContextTypes
 
-from .config import ATTEMPTS, WORD_LEN, TOKEN, WORDS_FILE, ADMIN_USER_ID
+from .config import (
+    ATTEMPTS,
+    BACKUP_KEEP,
+    BOARD_EDIT,
+    EXPORT_MAX_UPLOAD,
+    PROFILE_MAX_SECONDS,
+    RENDER_FORMAT,
+    TOKEN,
+    TOP_MIN_PLAYED,
+    TOP_SIZE,
+    WORD_LEN,
+    WORD_LENGTHS,
+    WORDS_FILE,
+)
 from .db import (
+    EXPORTABLE_TABLES,
     clear_game,
     finish_game_and_update_stats,
     get_chat_leaderboard,
@@ -17,9 +35,11 @@ from .db import (
     init_db,
     record_chat_win,
     save_game,
+    set_board_message_id,
     update_chat_stats,
     get_chat_settings,
     save_chat_settings,
+    save_chat_image_settings,
     add_moderator,
     remove_moderator,
     get_moderators,
@@ -30,6 +50,7 @@ from .db import (
     get_user_info,
 )
 from .game import (
+    PackedWords,
     letters_aggregate,
     load_words,
     normalize_word,
@@ -39,52 +60,129 @@ from .game import (
     add_word_to_file,
     remove_word_from_file,
 )
-from .render import reply_with_grid_image
+from .render import (
+    BOARD_FORMATS,
+    CANVAS_CACHE,
+    MAX_TILE,
+    MIN_TILE,
+    RENDER_POOL,
+    TILE,
+    drop_board_canvas,
+    edit_board,
+    reply_with_board,
+    send_board,
+)
+from .backup import format_size, run_backup
+from .export import EXPORT_FORMATS, export_table, rotate_exports
+from .leaderboard import BOARD_ALIASES, BOARD_TITLES, format_top_line, global_top
+from .dispatch import ChatOrderedUpdateProcessor
+from .ratelimit import OutboundLimiter, bulk_priority
+from .network import NETWORK_STATS
+from .metrics import GAMES_FINISHED, GUESSES, REJECTED_WORDS
+from .tenants import current_tenant
+
+log = logging.getLogger(__name__)
 
 
-WORDS_ALL: List[str] = []
-ANSWER_POOL: List[str] = []
+# Длина -> PackedWords; пул загадок — тот же объект, что и словарь длины
 WORDS_BY_LENGTH: dict = {}
 ANSWER_POOLS_BY_LENGTH: dict = {}
 
-def set_word_lists(words_all: List[str], answer_pool: List[str]) -> None:
-    global WORDS_ALL, ANSWER_POOL
-    WORDS_ALL = words_all
-    ANSWER_POOL = answer_pool
-
 def set_words_by_length(words_by_length: dict, answer_pools_by_length: dict) -> None:
     global WORDS_BY_LENGTH, ANSWER_POOLS_BY_LENGTH
     WORDS_BY_LENGTH = words_by_length
     ANSWER_POOLS_BY_LENGTH = answer_pools_by_length
 
 
+# Одна загрузка длины за раз: фоновая подгрузка и первый /length не читают файл дважды
+_length_lock = threading.Lock()
+
+
+def _read_length(length: int) -> PackedWords:
+    try:
+        words = PackedWords.from_words(load_words(WORDS_FILE, length, min_count=100), length)
+        log.info("Загружено %d слов длиной %d (%d КБ)", len(words), length, words.nbytes // 1024)
+        return words
+    except Exception as e:
+        log.error("Ошибка загрузки слов длиной %d: %s", length, e)
+        return PackedWords(length)
+
+
+def load_length(length: int) -> PackedWords:
+    """Слова длины из памяти, а если их ещё нет — из файла (при быстром старте грузится только WORD_LEN)"""
+    words = WORDS_BY_LENGTH.get(length)
+    if words is not None:
+        return words
+    with _length_lock:
+        words = WORDS_BY_LENGTH.get(length)
+        if words is None:
+            words = _read_length(length)
+            # Пул ответов — раньше слов: кто увидел слова длины, найдёт и её пул
+            ANSWER_POOLS_BY_LENGTH[length] = words
+            WORDS_BY_LENGTH[length] = words
+    return words
+
+
+async def ensure_words(length: int) -> PackedWords:
+    """То же в хендлере: чтение файла идёт в потоке, event loop не ждёт"""
+    words = WORDS_BY_LENGTH.get(length)
+    if words is not None:
+        return words
+    return await asyncio.to_thread(load_length, length)
+
+
+def load_remaining_lengths() -> None:
+    """Догрузить остальные длины (фоновый поток после быстрого старта)"""
+    for length in WORD_LENGTHS:
+        load_length(length)
+
+
 async def reload_word_dictionaries() -> None:
     """Перезагрузить словари после изменения файла words.txt"""
     global WORDS_BY_LENGTH, ANSWER_POOLS_BY_LENGTH
-    
-    # Загружаем слова для всех длин от 4 до 9
-    words_by_length = {}
-    answer_pools_by_length = {}
-    
-    for length in range(4, 10):
-        try:
-            words = load_words(WORDS_FILE, length, min_count=100)
-            words_by_length[length] = words
-            print(f"Перезагружено {len(words)} слов длиной {length}")
-        except Exception as e:
-            print(f"Ошибка перезагрузки слов длиной {length}: {e}")
-            words_by_length[length] = []
-    
-    # Создаем пулы ответов для каждой длины
-    for length in range(4, 10):
-        if length in words_by_length and words_by_length[length]:
-            answer_pools_by_length[length] = words_by_length[length]
-        else:
-            answer_pools_by_length[length] = []
-    
+
+    # Перечитываются только уже загруженные длины, остальные загрузятся при первом обращении
+    lengths = sorted(WORDS_BY_LENGTH) or [WORD_LEN]
+    words_by_length = await asyncio.to_thread(lambda: {length: _read_length(length) for length in lengths})
+
     # Обновляем глобальные переменные
     WORDS_BY_LENGTH = words_by_length
-    ANSWER_POOLS_BY_LENGTH = answer_pools_by_length
+    ANSWER_POOLS_BY_LENGTH = dict(words_by_length)
+
+
+def end_game(chat_id: int) -> None:
+    """Удалить игру чата вместе с закэшированной картинкой доски"""
+    clear_game(chat_id)
+    drop_board_canvas(chat_id)
+
+
+def image_options(settings) -> Tuple[str, int]:
+    """Вид доски и размер плитки чата с учётом настроек по умолчанию"""
+    fmt = settings["image_format"] if settings and settings["image_format"] in BOARD_FORMATS else RENDER_FORMAT
+    tile = settings["tile_size"] if settings and settings["tile_size"] else TILE
+    return fmt, tile
+
+
+async def show_board(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    message_id: Optional[int],
+    board: List[Tuple[str, List[str]]],
+    word_length: int,
+    fmt: str,
+    tile: int,
+    caption: str,
+    final: bool = False,
+) -> None:
+    """Режим одного сообщения: обновить доску игры, а если не вышло — отправить её заново"""
+    chat_id = key_chat_id(update)
+    if message_id and await edit_board(
+        context.bot, chat_id, message_id, board, word_length, fmt, tile, caption, keep_canvas=not final
+    ):
+        return
+    msg = await send_board(update.message, board, word_length, None if final else chat_id, fmt, tile, caption)
+    if not final:
+        set_board_message_id(chat_id, msg.message_id)
 
 
 def display_name(update: Update) -> str:
@@ -108,9 +206,14 @@ def save_user_from_update(update: Update):
         )
 
 
+def admin_id() -> int:
+    """Администратор бота, которому пришло обновление (в режиме нескольких ботов у каждого свой)"""
+    return current_tenant().admin_user_id
+
+
 def check_admin_permissions(user_id: int) -> tuple[bool, str]:
     """Проверить права администратора. Возвращает (разрешено, сообщение_об_ошибке)"""
-    if ADMIN_USER_ID == 0:
+    if admin_id() == 0:
         return False, (
             "❌ Администратор не настроен!\n\n"
             "Создайте файл .env в корне проекта и добавьте:\n"
@@ -118,11 +221,11 @@ def check_admin_permissions(user_id: int) -> tuple[bool, str]:
             "Чтобы получить ваш ID, напишите боту @userinfobot"
         )
     
-    if user_id != ADMIN_USER_ID:
+    if user_id != admin_id():
         return False, (
             f"❌ Эта команда доступна только администратору!\n\n"
             f"Ваш ID: {user_id}\n"
-            f"Админ ID: {ADMIN_USER_ID}\n\n"
+            f"Админ ID: {admin_id()}\n\n"
             "Если вы администратор, проверьте настройки в файле .env"
         )
     
@@ -131,7 +234,7 @@ def check_admin_permissions(user_id: int) -> tuple[bool, str]:
 
 def check_moderator_permissions(user_id: int) -> tuple[bool, str]:
     """Проверить права модератора или администратора. Возвращает (разрешено, сообщение_об_ошибке)"""
-    if ADMIN_USER_ID == 0:
+    if admin_id() == 0:
         return False, (
             "❌ Администратор не настроен!\n\n"
             "Создайте файл .env в корне проекта и добавьте:\n"
@@ -139,8 +242,8 @@ def check_moderator_permissions(user_id: int) -> tuple[bool, str]:
             "Чтобы получить ваш ID, напишите боту @userinfobot"
         )
     
-    if not is_admin_or_moderator(user_id, ADMIN_USER_ID):
-        role = "администратор" if user_id == ADMIN_USER_ID else ("модератор" if is_moderator(user_id) else "обычный пользователь")
+    if not is_admin_or_moderator(user_id, admin_id()):
+        role = "администратор" if user_id == admin_id() else ("модератор" if is_moderator(user_id) else "обычный пользователь")
         return False, (
             f"❌ Эта команда доступна только администратору и модераторам!\n\n"
             f"Ваш ID: {user_id}\n"
@@ -183,7 +286,9 @@ async def cmd_help(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "/new — новая игра\n"
         "/giveup — сдаться\n"
         "/stats — статистика\n"
+        "/top [wins|rate|streak] — глобальный рейтинг\n"
         "/length [число] — установить длину слова (4-9)\n"
+        "/image [png|palette|webp|emoji|text] [размер] — вид доски\n"
         "/checkword [слово] — проверить слово в словаре\n"
         "/help — эта справка"
     )
@@ -191,7 +296,7 @@ async def cmd_help(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     
     # Добавляем команды для модераторов и администраторов
-    if is_admin_or_moderator(user_id, ADMIN_USER_ID):
+    if is_admin_or_moderator(user_id, admin_id()):
         help_text += "\n\nКоманды модератора:\n"
         help_text += "/addword <слово> — добавить слово\n"
         help_text += "/removeword <слово> — удалить слово\n"
@@ -199,11 +304,16 @@ async def cmd_help(update: Update, context: ContextTypes.DEFAULT_TYPE):
         help_text += "/myrole — показать свою роль\n"
     
     # Добавляем команды только для администратора
-    if user_id == ADMIN_USER_ID:
+    if user_id == admin_id():
         help_text += "\n\nКоманды администратора:\n"
         help_text += "/addmoderator <ID или @username> — добавить модератора\n"
         help_text += "/removemoderator <ID или @username> — удалить модератора\n"
-        help_text += "/moderators — список модераторов"
+        help_text += "/moderators — список модераторов\n"
+        help_text += "/backup — онлайн-бэкап базы данных\n"
+        help_text += "/exportstats [таблица] [csv|jsonl] — выгрузка статистики\n"
+        help_text += "/renderstats — нагрузка на отрисовку досок\n"
+        help_text += "/netstats — задержки и ошибки запросов к Telegram\n"
+        help_text += "/profile <секунды> [cpu|mem] — профиль работающего бота"
     
     await update.message.reply_text(help_text)
 
@@ -212,7 +322,7 @@ async def cmd_new(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = key_chat_id(update)
     g = get_game(chat_id)
     if g and g["status"] == "IN_PROGRESS":
-        clear_game(chat_id)
+        end_game(chat_id)
         await update.message.reply_text(f"Предыдущая игра завершена. Ответ был: {g['answer']}")
 
     # Получаем настройки чата
@@ -221,6 +331,7 @@ async def cmd_new(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     try:
         # Получаем пул слов для данной длины
+        await ensure_words(word_length)
         pool = ANSWER_POOLS_BY_LENGTH.get(word_length, [])
         if not pool:
             await update.message.reply_text(f"Нет слов длиной {word_length} букв в словаре.")
@@ -233,11 +344,16 @@ async def cmd_new(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
         
         answer = pick_answer(pool, word_length)
-        print(f"[DEBUG] Загадано для чата {chat_id}: {answer} (длина: {word_length})")
+        log.info("Новая игра", extra={"chat_id": chat_id, "length": word_length, "answer": answer, "sample": True})
         save_game(chat_id, answer, [], "IN_PROGRESS", word_length)
-        await update.message.reply_text(
-            f"Поехали! Загадано слово из {word_length} букв. У вас {ATTEMPTS} попыток."
-        )
+        intro = f"Поехали! Загадано слово из {word_length} букв. У вас {ATTEMPTS} попыток."
+        if BOARD_EDIT:
+            # Одно сообщение с доской на игру: дальше ходы его только правят
+            fmt, tile = image_options(settings)
+            msg = await send_board(update.message, [], word_length, chat_id, fmt, tile, intro)
+            set_board_message_id(chat_id, msg.message_id)
+        else:
+            await update.message.reply_text(intro)
     except Exception as e:
         await update.message.reply_text(f"Ошибка: {e}")
 
@@ -249,7 +365,9 @@ async def cmd_giveup(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Сейчас нет игры. /new — начать.")
         return
     answer = g["answer"]
-    clear_game(chat_id)
+    end_game(chat_id)
+    GAMES_FINISHED.inc("giveup")
+    log.info("Игра сдана", extra={"chat_id": chat_id, "answer": answer, "sample": True})
     await update.message.reply_text(f"Сдаёмся. Ответ был: {answer}\n/new — новая игра")
 
 
@@ -267,6 +385,51 @@ async def cmd_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
+async def cmd_top(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Глобальный рейтинг игроков по всем чатам"""
+    board = "wins"
+    if context.args:
+        board = BOARD_ALIASES.get(context.args[0].lower())
+        if board is None:
+            await update.message.reply_text("Использование: /top [wins|rate|streak]")
+            return
+
+    leaderboard = global_top()
+    if leaderboard.stale(board, TOP_SIZE):
+        # Полный запрос к stats — в потоке, чтобы /top не останавливал остальные чаты
+        await asyncio.to_thread(leaderboard.refresh, board)
+    entries = leaderboard.top(board, TOP_SIZE)
+    if not entries:
+        await update.message.reply_text("Рейтинг пока пуст. Сыграй /new!")
+        return
+
+    lines = [format_top_line(board, i + 1, e) for i, e in enumerate(entries)]
+    header = f"🏆 Глобальный топ {BOARD_TITLES[board]}"
+    if board == "rate":
+        header += f" (от {TOP_MIN_PLAYED} игр)"
+    await update.message.reply_text(header + ":\n" + "\n".join(lines))
+
+
+REJECT_MESSAGES = {
+    "length": "Нужно слово из {length} букв.",
+    "alphabet": "Только кириллица, без пробелов и символов.",
+    "dictionary": "Такого слова нет в словаре.",
+}
+
+
+def check_guess(guess: str, word_length: int) -> Optional[str]:
+    """Причина отказа (ключ REJECT_MESSAGES) или None, если слово можно ходить"""
+    if len(guess) != word_length:
+        return "length"
+    if not re.fullmatch(r"[А-Я]{" + str(word_length) + "}", guess):
+        return "alphabet"
+    # Проверяем слово в словаре для данной длины
+    words_for_length = get_words_for_length(word_length, WORDS_BY_LENGTH.get(word_length, []))
+    if guess not in words_for_length:
+        return "dictionary"
+    return None
+
+
 async def on_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Сохраняем информацию о пользователе
     save_user_from_update(update)
@@ -289,18 +452,13 @@ async def on_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Получаем настройки чата для определения длины слова
     settings = get_chat_settings(chat_id)
     word_length = settings["word_length"] if settings else 5
-    
-    if len(guess) != word_length:
-        await update.message.reply_text(f"Нужно слово из {word_length} букв.")
-        return
-    if not re.fullmatch(r"[А-Я]{" + str(word_length) + "}", guess):
-        await update.message.reply_text("Только кириллица, без пробелов и символов.")
-        return
-    
-    # Проверяем слово в словаре для данной длины
-    words_for_length = get_words_for_length(word_length, WORDS_BY_LENGTH.get(word_length, []))
-    if guess not in words_for_length:
-        await update.message.reply_text("Такого слова нет в словаре.")
+    fmt, tile = image_options(settings)
+    await ensure_words(word_length)
+
+    reason = check_guess(guess, word_length)
+    if reason is not None:
+        REJECTED_WORDS.inc(reason)
+        await update.message.reply_text(REJECT_MESSAGES[reason].format(length=word_length))
         return
 
     answer = g["answer"]
@@ -309,79 +467,83 @@ async def on_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Запретим повторные попытки тем же словом в рамках одной игры (до добавления нового хода)
     previous_guesses = {a[0] for a in attempts}
     if guess in previous_guesses:
+        REJECTED_WORDS.inc("repeat")
         await update.message.reply_text("Это слово уже пробовали в этой игре.")
         return
 
     marks = score_guess(guess, answer)
     attempts.append([guess, marks, user_id])
+    GUESSES.inc()
 
     if guess == answer:
-        finish_game_and_update_stats(user_id, True, len(attempts))
+        GAMES_FINISHED.inc("win")
+        log.info("Победа", extra={"chat_id": chat_id, "user_id": user_id, "attempts": len(attempts), "sample": True})
+        new_stats = finish_game_and_update_stats(user_id, True, len(attempts))
+        if new_stats:
+            global_top().record_result(user_id, name, **new_stats)
         update_chat_stats(chat_id, True, len(attempts))
         record_chat_win(chat_id, user_id, name)
-        clear_game(chat_id)
-        await reply_with_grid_image(update, [(a[0], a[1]) for a in attempts], word_length)
+        end_game(chat_id)
+        board = [(a[0], a[1]) for a in attempts]
+        headline = f"{guess} — {name}\nПобеда за {len(attempts)} попыток! 🎉"
         st = get_chat_stats(chat_id)
+        leaderboard = get_chat_leaderboard(chat_id, limit=10)
+        lb_text = "\n".join(
+            f"{i+1}. {row['name'] or row['user_id']}: {row['wins']}"
+            for i, row in enumerate(leaderboard)
+        ) or "нет победителей"
         if st and st["played"]:
             winrate = round(100 * st["wins"] / st["played"])
-            leaderboard = get_chat_leaderboard(chat_id, limit=10)
-            lb_text = "\n".join(
-                f"{i+1}. {row['name'] or row['user_id']}: {row['wins']}"
-                for i, row in enumerate(leaderboard)
-            ) or "нет победителей"
-            await update.message.reply_text(
-                f"{guess} — {name}\nПобеда за {len(attempts)} попыток! 🎉\n\n"
+            result = (
+                f"{headline}\n\n"
                 f"Сыграно в чате: {st['played']}\n"
                 f"Побед чата: {st['wins']} ({winrate}%)\n"
                 f"Серия: {st['current_streak']}, рекорд: {st['max_streak']}\n\n"
                 f"Топ победителей:\n{lb_text}\n/new"
             )
         else:
-            leaderboard = get_chat_leaderboard(chat_id, limit=10)
-            lb_text = "\n".join(
-                f"{i+1}. {row['name'] or row['user_id']}: {row['wins']}"
-                for i, row in enumerate(leaderboard)
-            ) or "нет победителей"
-            await update.message.reply_text(
-                f"{guess} — {name}\nПобеда за {len(attempts)} попыток! 🎉\n\n"
-                f"Топ победителей:\n{lb_text}\n/new"
-            )
+            result = f"{headline}\n\nТоп победителей:\n{lb_text}\n/new"
+        if BOARD_EDIT:
+            await show_board(update, context, g["board_message_id"], board, word_length, fmt, tile, headline, final=True)
+            await update.message.reply_text(result)
+        else:
+            # Доска и итог одним сообщением: меньше запросов к API и меньше шансов упереться в лимиты
+            await reply_with_board(update, board, word_length, fmt=fmt, tile=tile, caption=result)
         return
 
     if len(attempts) >= ATTEMPTS:
+        GAMES_FINISHED.inc("loss")
+        log.info("Поражение", extra={"chat_id": chat_id, "answer": answer, "sample": True})
         update_chat_stats(chat_id, False, None)
-        clear_game(chat_id)
-        await reply_with_grid_image(update, [(a[0], a[1]) for a in attempts], word_length)
+        end_game(chat_id)
+        board = [(a[0], a[1]) for a in attempts]
+        headline = f"{guess} — {name}\nНе вышло. Ответ был: {answer}"
         st = get_chat_stats(chat_id)
         if st and st["played"]:
             winrate = round(100 * st["wins"] / st["played"])
-            await update.message.reply_text(
-                f"{guess} — {name}\nНе вышло. Ответ был: {answer}\n\n"
+            result = (
+                f"{headline}\n\n"
                 f"Сыграно в чате: {st['played']}\n"
                 f"Побед чата: {st['wins']} ({winrate}%)\n"
                 f"Серия: {st['current_streak']}, рекорд: {st['max_streak']}\n/new"
             )
         else:
-            await update.message.reply_text(
-                f"{guess} — {name}\nНе вышло. Ответ был: {answer}\n/new"
-            )
+            result = f"{headline}\n/new"
+        if BOARD_EDIT:
+            await show_board(update, context, g["board_message_id"], board, word_length, fmt, tile, headline, final=True)
+            await update.message.reply_text(result)
+        else:
+            await reply_with_board(update, board, word_length, fmt=fmt, tile=tile, caption=result)
         return
 
     save_game(chat_id, answer, attempts, "IN_PROGRESS")
     left = ATTEMPTS - len(attempts)
-    await reply_with_grid_image(update, [(a[0], a[1]) for a in attempts], word_length)
-    await update.message.reply_text(
-        f"{guess} — {name}\nОсталось попыток: {left}"
-    )
-
-
-def bootstrap_words() -> Tuple[List[str], List[str]]:
-    all_words = load_words(WORDS_FILE, WORD_LEN, min_count=1000)
-    pool = load_words(WORDS_FILE, WORD_LEN, min_count=1)
-    inter = sorted(set(pool) & set(all_words))
-    if not inter:
-        raise RuntimeError("ANSWER_POOL не пересекается с WORDS_ALL")
-    return all_words, inter
+    board = [(a[0], a[1]) for a in attempts]
+    status = f"{guess} — {name}\nОсталось попыток: {left}"
+    if BOARD_EDIT:
+        await show_board(update, context, g["board_message_id"], board, word_length, fmt, tile, status)
+        return
+    await reply_with_board(update, board, word_length, chat_id, fmt=fmt, tile=tile, caption=status)
 
 
 async def cmd_length(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -404,8 +566,8 @@ async def cmd_length(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("Длина слова должна быть от 4 до 9 букв.")
             return
         
-        # Проверяем, есть ли слова такой длины
-        if length not in WORDS_BY_LENGTH or not WORDS_BY_LENGTH[length]:
+        # Проверяем, есть ли слова такой длины (при быстром старте длина загружается здесь)
+        if not await ensure_words(length):
             await update.message.reply_text(f"Нет слов длиной {length} букв в словаре.")
             return
         
@@ -416,6 +578,44 @@ async def cmd_length(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Укажите число от 4 до 9.")
 
 
+async def cmd_image(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Настроить вид доски (картинка или текст) и размер плитки для чата"""
+    chat_id = key_chat_id(update)
+    settings = get_chat_settings(chat_id)
+    fmt, tile = image_options(settings)
+
+    if not context.args:
+        await update.message.reply_text(
+            f"Вид доски: {fmt}, плитка {tile} px\n"
+            f"Используйте /image <{'|'.join(BOARD_FORMATS)}> [размер {MIN_TILE}-{MAX_TILE}]\n"
+            "emoji — доска одним сообщением из кастомных эмодзи, text — цветными квадратами\n"
+            "/image default — вернуть настройки по умолчанию"
+        )
+        return
+
+    new_fmt = context.args[0].lower()
+    if new_fmt == "default":
+        save_chat_image_settings(chat_id, "", 0)
+        await update.message.reply_text(f"Вид доски: {RENDER_FORMAT}, плитка {TILE} px (по умолчанию)")
+        return
+    if new_fmt not in BOARD_FORMATS:
+        await update.message.reply_text(f"Вид доски должен быть одним из: {', '.join(BOARD_FORMATS)}")
+        return
+
+    new_tile = tile
+    if len(context.args) > 1:
+        try:
+            new_tile = int(context.args[1])
+        except ValueError:
+            new_tile = 0
+        if new_tile < MIN_TILE or new_tile > MAX_TILE:
+            await update.message.reply_text(f"Размер плитки должен быть от {MIN_TILE} до {MAX_TILE} px.")
+            return
+
+    save_chat_image_settings(chat_id, new_fmt, new_tile)
+    await update.message.reply_text(f"Вид доски: {new_fmt}, плитка {new_tile} px")
+
+
 async def cmd_addword(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Добавить слово в словарь"""
     user_id = update.effective_user.id
@@ -505,7 +705,7 @@ async def cmd_checkword(update: Update, context: ContextTypes.DEFAULT_TYPE):
     length = len(word)
     
     # Проверяем в словаре
-    words = WORDS_BY_LENGTH.get(length, [])
+    words = await ensure_words(length)
     in_dictionary = word in words
     
     if in_dictionary:
@@ -514,6 +714,7 @@ async def cmd_checkword(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"❌ Слово '{word}' НЕТ в словаре")
 
 
+@bulk_priority
 async def cmd_words(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Показать статистику слов"""
     user_id = update.effective_user.id
@@ -527,8 +728,8 @@ async def cmd_words(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not context.args:
         # Показать общую статистику
         stats = []
-        for length in range(4, 10):
-            word_count = len(WORDS_BY_LENGTH.get(length, []))
+        for length in WORD_LENGTHS:
+            word_count = len(await ensure_words(length))
             if word_count > 0:
                 stats.append(f"{length} букв: {word_count} слов")
         
@@ -541,7 +742,7 @@ async def cmd_words(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("Длина слова должна быть от 4 до 9 букв.")
             return
         
-        words = WORDS_BY_LENGTH.get(length, [])
+        words = await ensure_words(length)
         
         msg = f"Слова длиной {length} букв: {len(words)}"
         
@@ -610,7 +811,7 @@ async def cmd_addmoderator(update: Update, context: ContextTypes.DEFAULT_TYPE):
         moderator_id = user_info['user_id']
         username = user_info['username']
     
-    if moderator_id == ADMIN_USER_ID:
+    if moderator_id == admin_id():
         await update.message.reply_text("❌ Администратор не может быть модератором")
         return
     
@@ -699,7 +900,7 @@ async def cmd_myrole(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Показать свою роль"""
     user_id = update.effective_user.id
     
-    if user_id == ADMIN_USER_ID:
+    if user_id == admin_id():
         role = "👑 Администратор"
     elif is_moderator(user_id):
         role = "🛡️ Модератор"
@@ -712,4 +913,188 @@ async def cmd_myrole(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
+async def cmd_backup(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Сделать онлайн-бэкап базы данных (только для администратора)"""
+    user_id = update.effective_user.id
+
+    allowed, error_message = check_admin_permissions(user_id)
+    if not allowed:
+        await update.message.reply_text(error_message)
+        return
+
+    await update.message.reply_text("⏳ Создаю бэкап базы данных...")
+    try:
+        # Копирование идёт в отдельном потоке маленькими пачками и не блокирует игры
+        result = await asyncio.to_thread(run_backup)
+    except Exception as e:
+        await update.message.reply_text(f"❌ Ошибка бэкапа: {e}")
+        return
+
+    await update.message.reply_text(
+        f"✅ Бэкап создан: {os.path.basename(result.path)}\n"
+        f"Размер: {format_size(result.size)}\n"
+        f"Время: {result.duration:.1f} с\n"
+        f"Проверка целостности: {result.integrity}\n"
+        f"Хранится последних снапшотов: {BACKUP_KEEP}"
+    )
+
+
+@bulk_priority
+async def cmd_exportstats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Выгрузить таблицу статистики файлом (только для администратора)"""
+    user_id = update.effective_user.id
+
+    allowed, error_message = check_admin_permissions(user_id)
+    if not allowed:
+        await update.message.reply_text(error_message)
+        return
+
+    table = context.args[0] if context.args else "stats"
+    fmt = context.args[1].lower() if len(context.args or []) > 1 else "csv"
+    if table not in EXPORTABLE_TABLES or fmt not in EXPORT_FORMATS:
+        await update.message.reply_text(
+            "Использование: /exportstats [таблица] [формат]\n\n"
+            f"Таблицы: {', '.join(EXPORTABLE_TABLES)}\n"
+            f"Форматы: {', '.join(EXPORT_FORMATS)}"
+        )
+        return
+
+    await update.message.reply_text(f"⏳ Выгружаю {table}...")
+    try:
+        # Чтение пачками и сжатие идут в отдельном потоке
+        result = await asyncio.to_thread(export_table, table, fmt)
+    except Exception as e:
+        await update.message.reply_text(f"❌ Ошибка выгрузки: {e}")
+        return
+
+    summary = (
+        f"{table}: {result.rows} строк, {format_size(result.size)}, "
+        f"{result.duration:.1f} с"
+    )
+    if result.size > EXPORT_MAX_UPLOAD:
+        # Такие выгрузки остаются на сервере — старые удаляются, как снапшоты бэкапов
+        await asyncio.to_thread(rotate_exports, table)
+        await update.message.reply_text(
+            f"✅ {summary}\nФайл слишком большой для Telegram, сохранён на сервере:\n{result.path}"
+        )
+        return
+
+    try:
+        with open(result.path, "rb") as f:
+            # read_file_handle=False: файл (до EXPORT_MAX_UPLOAD) отправляется потоком, а не читается в память
+            await update.message.reply_document(
+                document=InputFile(f, filename=os.path.basename(result.path), read_file_handle=False),
+                caption=f"✅ {summary}",
+            )
+    finally:
+        os.remove(result.path)
+
+
+async def cmd_renderstats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Показать метрики пула отрисовки и кэша холстов (только для администратора)"""
+    user_id = update.effective_user.id
+
+    allowed, error_message = check_admin_permissions(user_id)
+    if not allowed:
+        await update.message.reply_text(error_message)
+        return
+
+    pool = RENDER_POOL.stats()
+    cache = CANVAS_CACHE.stats()
+    processor = context.application.update_processor
+    updates_text = ""
+    if isinstance(processor, ChatOrderedUpdateProcessor):
+        ups = processor.stats()
+        updates_text = (
+            f"\n\n📨 Обновления: обработчиков {ups['active']}/{ups['workers']}, "
+            f"чатов {ups['chats']}, в очереди {ups['queued']}\n"
+            f"Обработано: {ups['processed']}, макс. очередь одного чата: {ups['max_chat_queue']}"
+        )
+    limiter = context.bot.rate_limiter
+    if isinstance(limiter, OutboundLimiter):
+        out = limiter.stats()
+        updates_text += (
+            f"\n\n📤 Исходящие: в очереди {out['queued']} (макс. {out['queued_max']}), чатов {out['chats']}\n"
+            f"Отправлено: {out['sent']}, ждали лимита: {out['throttled']} "
+            f"(в среднем {out['wait_ms_avg']:.0f} мс)\n"
+            f"429: повторов {out['retries']}, ошибок {out['failed']}"
+        )
+    await update.message.reply_text(
+        f"🖼 Пул отрисовки ({pool['kind']}, потоков: {pool['workers']})\n"
+        f"В очереди: {pool['queue_depth']} (макс. {pool['queue_depth_max']}, лимит {pool['max_pending']})\n"
+        f"Отрисовано: {pool['rendered']}, текстом из-за перегрузки: {pool['degraded']}, из-за ошибок: {pool['errors']}\n"
+        f"Рендер: {pool['render_ms_avg']:.1f} мс, ожидание: {pool['wait_ms_avg']:.1f} мс\n\n"
+        f"Холсты игр: {cache['entries']} ({format_size(cache['bytes'])} из {format_size(cache['max_bytes'])})\n"
+        f"Попадания: {cache['hits']}, промахи: {cache['misses']}, вытеснения: {cache['evictions']}"
+        f"{updates_text}"
+    )
+
+
+async def cmd_netstats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Показать задержки и ошибки запросов к Bot API по методам (только для администратора)"""
+    user_id = update.effective_user.id
+
+    allowed, error_message = check_admin_permissions(user_id)
+    if not allowed:
+        await update.message.reply_text(error_message)
+        return
+
+    stats = NETWORK_STATS.snapshot()
+    if not stats:
+        await update.message.reply_text("Запросов к Bot API ещё не было.")
+        return
+    lines = [
+        f"{endpoint}: {s['calls']} запр., {s['avg_ms']:.0f} мс (макс. {s['max_ms']:.0f}), "
+        f"ошибок {s['errors']}, повторов {s['retries']}"
+        + (f", нет соединений {s['pool_timeouts']}" if s["pool_timeouts"] else "")
+        for endpoint, s in sorted(stats.items(), key=lambda item: -item[1]["calls"])
+    ]
+    await update.message.reply_text("🌐 Bot API по методам:\n" + "\n".join(lines))
+
+
+async def cmd_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Снять профиль CPU или памяти за N секунд и прислать отчёт файлом (только для администратора)"""
+    user_id = update.effective_user.id
+
+    allowed, error_message = check_admin_permissions(user_id)
+    if not allowed:
+        await update.message.reply_text(error_message)
+        return
+
+    # cProfile, pstats и tracemalloc нужны только здесь — не замедляют старт бота
+    from .profiling import PROFILE_MODES, ProfilerBusy, run_profile
+
+    args = context.args or []
+    try:
+        seconds = int(args[0]) if args else 30
+    except ValueError:
+        seconds = 0
+    mode = args[1].lower() if len(args) > 1 else "cpu"
+    if not 1 <= seconds <= PROFILE_MAX_SECONDS or mode not in PROFILE_MODES:
+        await update.message.reply_text(
+            f"Использование: /profile <секунды 1-{PROFILE_MAX_SECONDS}> [{'|'.join(PROFILE_MODES)}]"
+        )
+        return
+
+    await update.message.reply_text(f"⏳ Профилирую {mode} {seconds} с...")
+    try:
+        result = await run_profile(mode, seconds)
+    except ProfilerBusy:
+        await update.message.reply_text("⚠️ Профилирование уже идёт, дождитесь отчёта.")
+        return
+    except Exception as e:
+        await update.message.reply_text(f"❌ Ошибка профилирования: {e}")
+        return
 
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    await update.message.reply_document(
+        document=result.report.encode("utf-8"),
+        filename=f"profile-{mode}-{stamp}.txt",
+        caption=f"✅ Профиль {mode} за {result.seconds:.1f} с",
+    )
+    if result.raw is not None:
+        await update.message.reply_document(
+            document=result.raw,
+            filename=f"profile-{mode}-{stamp}.prof",
+            caption="pstats/snakeviz: python -m pstats profile.prof",
+        )
@@ -0,0 +1,284 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .config import (
+    BOT_MODE,
+    DB_FILE,
+    HEALTH_DB_BUDGET,
+    HEALTH_EXIT_AFTER,
+    HEALTH_LISTEN,
+    HEALTH_LOOP_TIMEOUT,
+    HEALTH_PORT,
+    HEALTH_UPDATES_MAX_AGE,
+    HEALTH_WEBHOOK_MAX_AGE,
+    WORD_LEN,
+)
+
+log = logging.getLogger(__name__)
+
+# Проверки живости и готовности для Docker/Kubernetes: GET /livez и GET /readyz на HEALTH_PORT.
+# Сервер работает в своём потоке со своим event loop, поэтому отвечает и тогда, когда основной loop
+# завис, — и честно говорит, что он завис, а не просто не отвечает.
+#
+#   /livez  — основной loop выполнил пустую задачу за HEALTH_LOOP_TIMEOUT
+#   /readyz — плюс: словарь загружен, база отвечает за HEALTH_DB_BUDGET,
+#             getUpdates (или вебхук) успешно отработал недавно
+
+CheckResult = Tuple[bool, str]
+Check = Callable[[], CheckResult]
+
+_last_updates_at = 0.0
+
+
+def mark_updates_received() -> None:
+    """Успешный getUpdates или принятый вебхук: бот получает обновления"""
+    global _last_updates_at
+    _last_updates_at = time.time()
+
+
+class HealthChecker:
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        db_files: List[str],
+        mode: str = BOT_MODE,
+        loop_timeout: float = HEALTH_LOOP_TIMEOUT,
+        db_budget: float = HEALTH_DB_BUDGET,
+        exit_after: float = HEALTH_EXIT_AFTER,
+    ):
+        self.loop = loop
+        self.db_files = db_files
+        self.mode = mode
+        self.loop_timeout = loop_timeout
+        self.db_budget = db_budget
+        self.exit_after = exit_after
+        self.extra_checks: Dict[str, Check] = {}
+        self._dead_since = 0.0
+
+    # Проверки вызываются из потока health-сервера
+
+    def check_loop(self) -> CheckResult:
+        started = time.perf_counter()
+        future = asyncio.run_coroutine_threadsafe(asyncio.sleep(0), self.loop)
+        try:
+            future.result(self.loop_timeout)
+        except TimeoutError:
+            future.cancel()
+            return False, f"event loop не ответил за {self.loop_timeout:.1f} с"
+        except RuntimeError as e:  # loop уже закрыт
+            return False, str(e)
+        return True, f"{(time.perf_counter() - started) * 1000:.1f} мс"
+
+    def check_dictionary(self) -> CheckResult:
+        from .handlers import WORDS_BY_LENGTH
+
+        count = len(WORDS_BY_LENGTH.get(WORD_LEN) or ())
+        return count > 0, f"{count} слов длиной {WORD_LEN}"
+
+    def check_db(self) -> CheckResult:
+        for path in self.db_files:
+            started = time.perf_counter()
+            try:
+                # Чтение настоящей таблицы: SELECT 1 не заметил бы заблокированную базу
+                con = sqlite3.connect(path, timeout=self.db_budget)
+                try:
+                    con.execute("SELECT 1 FROM games LIMIT 1").fetchall()
+                finally:
+                    con.close()
+            except sqlite3.Error as e:
+                return False, f"{path}: {e}"
+            elapsed = time.perf_counter() - started
+            if elapsed > self.db_budget:
+                return False, f"{path}: {elapsed * 1000:.0f} мс (бюджет {self.db_budget * 1000:.0f} мс)"
+        return True, f"баз: {len(self.db_files)}"
+
+    def check_updates(self) -> CheckResult:
+        max_age = HEALTH_WEBHOOK_MAX_AGE if self.mode == "webhook" else HEALTH_UPDATES_MAX_AGE
+        if max_age <= 0:
+            return True, "не проверяется"
+        last = _last_updates_at
+        if not last:
+            return False, "обновлений ещё не было"
+        age = time.time() - last
+        if age > max_age:
+            return False, f"последние {age:.0f} с назад (предел {max_age:.0f} с)"
+        return True, f"{age:.0f} с назад"
+
+    def _run(self, checks: Dict[str, Check]) -> Tuple[bool, Dict[str, Dict[str, object]]]:
+        results: Dict[str, Dict[str, object]] = {}
+        healthy = True
+        for name, check in checks.items():
+            try:
+                ok, detail = check()
+            except Exception as e:  # noqa: BLE001
+                ok, detail = False, f"{type(e).__name__}: {e}"
+            results[name] = {"ok": ok, "detail": detail}
+            healthy = healthy and ok
+        return healthy, results
+
+    def live(self) -> Tuple[bool, Dict[str, Dict[str, object]]]:
+        healthy, results = self._run({"loop": self.check_loop})
+        self._track_liveness(healthy)
+        return healthy, results
+
+    def ready(self) -> Tuple[bool, Dict[str, Dict[str, object]]]:
+        checks: Dict[str, Check] = {
+            "loop": self.check_loop,
+            "dictionary": self.check_dictionary,
+            "db": self.check_db,
+            "updates": self.check_updates,
+        }
+        checks.update(self.extra_checks)
+        healthy, results = self._run(checks)
+        self._track_liveness(bool(results["loop"]["ok"]))
+        return healthy, results
+
+    def _track_liveness(self, healthy: bool) -> None:
+        # Docker сам не перезапускает unhealthy-контейнер: если loop мёртв дольше HEALTH_EXIT_AFTER,
+        # процесс завершается, и контейнер перезапускает restart policy
+        if healthy:
+            self._dead_since = 0.0
+            return
+        now = time.monotonic()
+        if not self._dead_since:
+            self._dead_since = now
+            return
+        if self.exit_after > 0 and now - self._dead_since >= self.exit_after:
+            log.critical("event loop не отвечает %.0f с, процесс завершается", now - self._dead_since)
+            logging.shutdown()
+            os._exit(70)
+
+
+class HealthServer:
+    """HTTP-сервер проверок в отдельном потоке"""
+
+    def __init__(self, checker: HealthChecker, host: str = HEALTH_LISTEN, port: int = HEALTH_PORT):
+        self.checker = checker
+        self.host = host
+        self.port = port
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._ready = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._main, name="slovli-health", daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+        if self._error is not None:
+            raise self._error
+
+    def stop(self) -> None:
+        if self._loop is not None and self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+
+    def _main(self) -> None:
+        try:
+            asyncio.run(self._serve())
+        except BaseException as e:  # noqa: BLE001
+            self._error = e
+            self._ready.set()
+
+    async def _serve(self) -> None:
+        from .http_server import HttpServer
+
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        server = HttpServer(self.host, self.port)
+        server.route("GET", "/livez", self._live)
+        server.route("GET", "/readyz", self._ready_endpoint)
+        await server.start()
+        self.port = server.port
+        self._ready.set()
+        try:
+            await self._stop.wait()
+        finally:
+            await server.stop(grace=1.0)
+
+    async def _live(self, request):
+        # Проверки ждут основной loop и базу — в пуле потоков, чтобы /livez и /readyz не ждали друг друга
+        return self._response(*await asyncio.to_thread(self.checker.live))
+
+    async def _ready_endpoint(self, request):
+        return self._response(*await asyncio.to_thread(self.checker.ready))
+
+    def _response(self, healthy: bool, results: Dict[str, Dict[str, object]]):
+        from .http_server import HttpResponse
+
+        data = {"status": "ok" if healthy else "fail", "checks": results}
+        return HttpResponse.json(data, 200 if healthy else 503)
+
+
+_server: Optional[HealthServer] = None
+_port = HEALTH_PORT
+
+
+def use_health_port(port: int) -> None:
+    """Свой порт для процесса (0 — без сервера, как у воркеров кластера: проверки отвечает ведущий)"""
+    global _port
+    _port = port
+
+
+def start_health_server(
+    db_files: Optional[List[str]] = None, extra_checks: Optional[Dict[str, Check]] = None
+) -> Optional[HealthServer]:
+    """Поднять /livez и /readyz (один раз на процесс, вызывать из работающего event loop)"""
+    global _server
+    if not _port or _server is not None:
+        return _server
+    checker = HealthChecker(asyncio.get_running_loop(), db_files or [DB_FILE])
+    checker.extra_checks.update(extra_checks or {})
+    server = HealthServer(checker, port=_port)
+    try:
+        server.start()
+    except OSError as e:
+        # Занятый порт не должен останавливать бота: без проверок он работает как раньше
+        log.error("Сервер проверок не запущен на %s:%s: %s", HEALTH_LISTEN, _port, e)
+        return None
+    _server = server
+    log.info("Проверки здоровья: http://%s:%s/livez и /readyz", HEALTH_LISTEN, server.port)
+    return server
+
+
+def stop_health_server() -> None:
+    global _server
+    if _server is not None:
+        server, _server = _server, None
+        server.stop()
+
+
+def main() -> int:
+    """python -m wordly_bot.health [live|ready] — для HEALTHCHECK в Docker (в образе нет curl).
+
+    Единственный print в пакете: вывод — это сам ответ /livez или /readyz (уже JSON),
+    Docker сохраняет его в журнале проверок как есть, поэтому через логи он не идёт.
+    """
+    import urllib.error
+    import urllib.request
+
+    probe = sys.argv[1] if len(sys.argv) > 1 else "live"
+    host = "127.0.0.1" if HEALTH_LISTEN in ("0.0.0.0", "") else HEALTH_LISTEN
+    url = f"http://{host}:{HEALTH_PORT}/{'readyz' if probe == 'ready' else 'livez'}"
+    try:
+        with urllib.request.urlopen(url, timeout=HEALTH_LOOP_TIMEOUT + HEALTH_DB_BUDGET + 2) as response:
+            print(response.read().decode("utf-8"))
+            return 0
+    except urllib.error.HTTPError as e:
+        print(e.read().decode("utf-8", "replace"))
+    except OSError as e:
+        print(f"{url}: {e}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+log = logging.getLogger(__name__)
+
+# Маленький HTTP/1.1 сервер на asyncio: вебхук Telegram, health и метрики без лишних зависимостей
+
+REASONS = {
+    200: "OK",
+    204: "No Content",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class PayloadTooLarge(ValueError):
+    """Content-Length больше max_body: отвечаем 413, тело не читаем"""
+
+
+@dataclass
+class HttpRequest:
+    method: str
+    path: str
+    query: Dict[str, str]
+    headers: Dict[str, str]
+    body: bytes = b""
+    keep_alive: bool = True
+
+    def json(self):
+        return json.loads(self.body.decode("utf-8"))
+
+
+@dataclass
+class HttpResponse:
+    status: int = 200
+    body: bytes = b""
+    content_type: str = "text/plain; charset=utf-8"
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def text(cls, text: str, status: int = 200) -> "HttpResponse":
+        return cls(status, text.encode("utf-8"))
+
+    @classmethod
+    def json(cls, data, status: int = 200) -> "HttpResponse":
+        return cls(status, json.dumps(data, ensure_ascii=False).encode("utf-8"), "application/json")
+
+
+Handler = Callable[[HttpRequest], Awaitable[HttpResponse]]
+
+
+class HttpServer:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        max_body: int = 1024 * 1024,
+        idle_timeout: float = 75.0,
+    ):
+        self.host = host
+        self.port = port
+        self.max_body = max_body
+        self.idle_timeout = idle_timeout
+        self._routes: Dict[Tuple[str, str], Handler] = {}
+        self._prefixes: List[Tuple[str, str, Handler]] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.Task] = set()
+        # Соединения, которые прямо сейчас обрабатывают запрос (остальные просто ждут keep-alive)
+        self._busy: Set[asyncio.Task] = set()
+
+    def route(self, method: str, path: str, handler: Handler, prefix: bool = False) -> None:
+        """prefix=True — обработчик для всех путей, начинающихся с path (method="*" — любой метод)"""
+        if prefix:
+            self._prefixes.append((method.upper(), path, handler))
+        else:
+            self._routes[(method.upper(), path)] = handler
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        # При port=0 система выбирает свободный порт
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self, grace: float = 5.0) -> None:
+        """Перестать принимать соединения и дать текущим запросам завершиться"""
+        if self._server is None:
+            return
+        server, self._server = self._server, None
+        server.close()
+        for task in self._connections - self._busy:
+            task.cancel()
+        if self._busy:
+            _, pending = await asyncio.wait(set(self._busy), timeout=grace)
+            for task in pending:
+                task.cancel()
+        await server.wait_closed()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[HttpRequest]:
+        line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+        if not line:
+            return None
+        method, target, version = line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+        headers: Dict[str, str] = {}
+        while True:
+            raw = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+            if raw in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = raw.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", "0") or 0)
+        if length > self.max_body:
+            raise PayloadTooLarge(f"{length} > {self.max_body}")
+        body = await asyncio.wait_for(reader.readexactly(length), self.idle_timeout) if length else b""
+
+        url = urlsplit(target)
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        return HttpRequest(
+            method=method.upper(),
+            path=url.path,
+            query={k: v[-1] for k, v in parse_qs(url.query).items()},
+            headers=headers,
+            body=body,
+            keep_alive=keep_alive,
+        )
+
+    async def _dispatch(self, request: HttpRequest) -> HttpResponse:
+        handler = self._routes.get((request.method, request.path))
+        if handler is None:
+            for method, prefix, candidate in self._prefixes:
+                if request.path.startswith(prefix) and method in ("*", request.method):
+                    handler = candidate
+                    break
+        if handler is None:
+            if any(path == request.path for _, path in self._routes):
+                return HttpResponse.text("method not allowed", 405)
+            return HttpResponse.text("not found", 404)
+        try:
+            return await handler(request)
+        except Exception as e:  # noqa: BLE001
+            log.exception("Ошибка обработки %s %s: %s", request.method, request.path, e)
+            return HttpResponse.text("internal error", 500)
+
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, response: HttpResponse, keep_alive: bool) -> None:
+        head = [
+            f"HTTP/1.1 {response.status} {REASONS.get(response.status, 'Unknown')}",
+            f"Content-Type: {response.content_type}",
+            f"Content-Length: {len(response.body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        head.extend(f"{k}: {v}" for k, v in response.headers.items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + response.body)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except PayloadTooLarge:
+                    self._write_response(writer, HttpResponse.text("payload too large", 413), False)
+                    break
+                except ValueError:
+                    self._write_response(writer, HttpResponse.text("bad request", 400), False)
+                    break
+                if request is None:
+                    break
+                self._busy.add(task)
+                try:
+                    response = await self._dispatch(request)
+                    keep_alive = request.keep_alive and self._server is not None
+                    self._write_response(writer, response, keep_alive)
+                    await writer.drain()
+                finally:
+                    self._busy.discard(task)
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
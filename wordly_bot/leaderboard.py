@@ -0,0 +1,301 @@
+import bisect
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .config import TOP_CAPACITY, TOP_MIN_PLAYED
+from .db import get_top_stats, load_global_top, save_global_top_changes
+from .tenants import DEFAULT_TENANT, current_tenant
+
+BOARDS = ("wins", "rate", "streak")
+BOARD_ALIASES = {
+    "wins": "wins",
+    "победы": "wins",
+    "rate": "rate",
+    "процент": "rate",
+    "streak": "streak",
+    "серия": "streak",
+}
+BOARD_TITLES = {
+    "wins": "по победам",
+    "rate": "по проценту побед",
+    "streak": "по лучшей серии",
+}
+
+# Ключ сортировки: (score1, score2, -user_id), больше — выше в рейтинге
+Key = Tuple[float, float, int]
+
+
+def board_score(
+    board: str, played: int, wins: int, max_streak: int, min_played: int = TOP_MIN_PLAYED
+) -> Optional[Tuple[float, float]]:
+    """Очки игрока на доске или None, если он туда не проходит"""
+    if board == "wins":
+        return (wins, -played) if wins > 0 else None
+    if board == "rate":
+        return (wins / played, wins) if played >= min_played and played > 0 else None
+    if board == "streak":
+        return (max_streak, wins) if max_streak > 0 else None
+    raise ValueError(f"Неизвестная доска: {board}")
+
+
+class TopBoard:
+    """
+    Топ-K одной доски: отсортированный список ключей и словарь user_id -> (ключ, имя).
+    Поиск позиции — бинарный, вставка/удаление сдвигают не больше capacity элементов.
+    """
+
+    def __init__(self, name: str, capacity: int):
+        self.name = name
+        self.capacity = capacity
+        self._keys: List[Key] = []
+        self._users: Dict[int, Tuple[Key, str]] = {}
+        # Верхняя граница ключей игроков вне топа; None — в топе все, кто проходит на доску
+        self.floor: Optional[Key] = None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _raise_floor(self, key: Key) -> None:
+        if self.floor is None or key > self.floor:
+            self.floor = key
+
+    def _remove(self, user_id: int) -> bool:
+        old = self._users.pop(user_id, None)
+        if old is None:
+            return False
+        i = bisect.bisect_left(self._keys, old[0])
+        del self._keys[i]
+        return True
+
+    def update(
+        self, user_id: int, score: Optional[Tuple[float, float]], name: str
+    ) -> Tuple[List[int], List[int]]:
+        """Обновить очки игрока. Возвращает (добавленные/изменённые id, удалённые id)"""
+        upserts: List[int] = []
+        deletes: List[int] = []
+        was_in_top = self._remove(user_id)
+
+        if score is None:
+            if was_in_top:
+                deletes.append(user_id)
+            return upserts, deletes
+
+        key = (score[0], score[1], -user_id)
+        if len(self._keys) >= self.capacity and key < self._keys[0]:
+            # Не проходит в топ — запоминаем, что снаружи есть игрок с таким ключом
+            self._raise_floor(key)
+            if was_in_top:
+                deletes.append(user_id)
+            return upserts, deletes
+
+        bisect.insort(self._keys, key)
+        self._users[user_id] = (key, name)
+        upserts.append(user_id)
+
+        if len(self._keys) > self.capacity:
+            evicted = self._keys.pop(0)
+            evicted_id = -evicted[2]
+            del self._users[evicted_id]
+            self._raise_floor(evicted)
+            deletes.append(evicted_id)
+        return upserts, deletes
+
+    def exact_count(self) -> int:
+        """Сколько верхних записей гарантированно совпадают с полным рейтингом"""
+        if self.floor is None:
+            return len(self._keys)
+        return len(self._keys) - bisect.bisect_right(self._keys, self.floor)
+
+    def entry(self, user_id: int) -> Tuple[int, float, float, str]:
+        key, name = self._users[user_id]
+        return user_id, key[0], key[1], name
+
+    def top(self, n: int) -> List[Tuple[int, float, float, str]]:
+        return [self.entry(-key[2]) for key in reversed(self._keys[-n:])] if n > 0 else []
+
+    def load(self, rows: List[Tuple[int, float, float, str]], floor: Optional[Key]) -> None:
+        self._users = {uid: ((s1, s2, -uid), name) for uid, s1, s2, name in rows}
+        self._keys = sorted(key for key, _ in self._users.values())
+        self.floor = floor
+        # Сохранённый топ мог быть построен с большей ёмкостью
+        while len(self._keys) > self.capacity:
+            evicted = self._keys.pop(0)
+            del self._users[-evicted[2]]
+            self._raise_floor(evicted)
+
+
+def _floor_row(floor: Optional[Key]) -> Optional[Tuple[float, float, int]]:
+    return None if floor is None else (floor[0], floor[1], -floor[2])
+
+
+class GlobalLeaderboard:
+    """
+    Глобальный рейтинг по таблице stats, поддерживаемый инкрементально.
+    Каждый результат игры обновляет доски за O(log K) и сохраняет только изменённые строки,
+    так что /top не делает запросов по всей таблице stats.
+    """
+
+    def __init__(self, capacity: int = TOP_CAPACITY, min_played: int = TOP_MIN_PLAYED):
+        self.capacity = capacity
+        self.min_played = min_played
+        self.boards: Dict[str, TopBoard] = {b: TopBoard(b, capacity) for b in BOARDS}
+        self._lock = threading.Lock()
+        # Режим кластера: у каждого воркера свой экземпляр, поэтому в базу он не пишет,
+        # а раз в refresh_interval секунд перечитывает топ из stats
+        self.refresh_interval = 0.0
+        self._refreshed: Dict[str, float] = {}
+        # Растёт с каждым record_result: refresh видит, что топ изменился, пока шёл запрос к stats
+        self._version = 0
+
+    def share(self, refresh_interval: float) -> None:
+        """Включить режим нескольких процессов с общей базой"""
+        self.refresh_interval = refresh_interval
+        self._refreshed = {b: time.monotonic() for b in BOARDS}
+
+    def load(self) -> None:
+        """Загрузить топ из базы; при первом запуске построить его по таблице stats"""
+        entries, floors = load_global_top()
+        with self._lock:
+            if not entries and not floors:
+                for board in BOARDS:
+                    self._rebuild(board)
+                return
+            rows: Dict[str, List[Tuple[int, float, float, str]]] = {b: [] for b in BOARDS}
+            for row in entries:
+                if row["board"] in rows:
+                    rows[row["board"]].append(
+                        (row["user_id"], row["score1"], row["score2"], row["name"])
+                    )
+            floor_keys = {
+                row["board"]: (row["score1"], row["score2"], -row["user_id"]) for row in floors
+            }
+            for board in BOARDS:
+                self.boards[board].load(rows[board], floor_keys.get(board))
+
+    def _fetch(self, board: str) -> Tuple[List[Tuple[int, float, float, str]], Optional[Key]]:
+        """Полный запрос к stats для доски; блокировка не нужна и не берётся"""
+        db_rows = get_top_stats(board, self.capacity, self.min_played)
+        rows = []
+        for r in db_rows:
+            score = board_score(board, r["played"], r["wins"], r["max_streak"], self.min_played)
+            if score is not None:
+                rows.append((r["user_id"], score[0], score[1], r["name"] or ""))
+        floor = None
+        if len(db_rows) >= self.capacity and rows:
+            last = rows[-1]
+            floor = (last[1], last[2], -last[0])
+        return rows, floor
+
+    def _rebuild(self, board: str) -> None:
+        """Заполнить доску полным запросом к stats (первый запуск)"""
+        rows, floor = self._fetch(board)
+        self._apply(board, rows, floor)
+        self._save_board(board, rows, floor)
+
+    def _apply(self, board: str, rows: List[Tuple[int, float, float, str]], floor: Optional[Key]) -> None:
+        top = self.boards[board]
+        top.load(rows, None)
+        # Граница — последний загруженный: все остальные игроки не выше его
+        top.floor = floor
+
+    def _snapshot(self, board: str) -> Tuple[List[Tuple[int, float, float, str]], Optional[Key]]:
+        top = self.boards[board]
+        return top.top(self.capacity), top.floor
+
+    @staticmethod
+    def _save_board(board: str, rows: List[Tuple[int, float, float, str]], floor: Optional[Key]) -> None:
+        save_global_top_changes(
+            [(board, *row) for row in rows],
+            [],
+            {board: _floor_row(floor)},
+            replace_boards=(board,),
+        )
+
+    def record_result(self, user_id: int, name: str, played: int, wins: int, max_streak: int) -> None:
+        """Учесть новую статистику игрока после завершённой игры"""
+        upserts: List[Tuple[str, int, float, float, str]] = []
+        deletes: List[Tuple[str, int]] = []
+        floors: Dict[str, Optional[Tuple[float, float, int]]] = {}
+        with self._lock:
+            self._version += 1
+            for board, top in self.boards.items():
+                floor_before = top.floor
+                score = board_score(board, played, wins, max_streak, self.min_played)
+                changed, removed = top.update(user_id, score, name)
+                upserts.extend((board, *top.entry(uid)) for uid in changed)
+                deletes.extend((board, uid) for uid in removed)
+                if top.floor != floor_before:
+                    floors[board] = _floor_row(top.floor)
+            if (upserts or deletes or floors) and not self.refresh_interval:
+                save_global_top_changes(upserts, deletes, floors)
+
+    def stale(self, board: str, n: int) -> bool:
+        """Нужно ли перечитать доску из stats перед показом первых n строк"""
+        with self._lock:
+            if self.refresh_interval:
+                return time.monotonic() - self._refreshed.get(board, 0.0) >= self.refresh_interval
+            # Запас исчерпан (очки игроков в топе упали) — досыпаем из базы
+            top = self.boards[board]
+            return top.exact_count() < min(n, self.capacity) and top.floor is not None
+
+    def refresh(self, board: str, attempts: int = 3) -> None:
+        """Перечитать доску из stats. Блокирующая: вызывать через asyncio.to_thread.
+
+        Запрос идёт без блокировки, чтобы record_result в event loop его не ждал;
+        если за это время пришёл новый результат, запрос повторяется.
+        """
+        for attempt in range(attempts):
+            with self._lock:
+                version = self._version
+            started = time.monotonic()
+            rows, floor = self._fetch(board)
+            with self._lock:
+                if self._version != version and attempt < attempts - 1:
+                    continue
+                self._apply(board, rows, floor)
+                self._refreshed[board] = started
+                version = self._version
+            break
+        if self.refresh_interval:
+            return
+        # Запись в базу — уже без блокировки, чтобы record_result её не ждал. Если за время записи
+        # пришёл результат, его строки могли быть перезаписаны нашими: сохраняем доску ещё раз
+        for _ in range(attempts):
+            self._save_board(board, rows, floor)
+            with self._lock:
+                if self._version == version:
+                    return
+                version = self._version
+                rows, floor = self._snapshot(board)
+
+    def top(self, board: str, n: int) -> List[Tuple[int, float, float, str]]:
+        """Первые n строк доски: (user_id, score1, score2, имя); перечитывание — в refresh"""
+        with self._lock:
+            return self.boards[board].top(n)
+
+
+GLOBAL_TOP = GlobalLeaderboard()
+# Рейтинг считается по базе, поэтому у каждого бота в режиме нескольких ботов он свой
+_TOPS: Dict[str, GlobalLeaderboard] = {DEFAULT_TENANT.name: GLOBAL_TOP}
+
+
+def global_top() -> GlobalLeaderboard:
+    """Рейтинг бота, чьё обновление сейчас обрабатывается"""
+    name = current_tenant().name
+    top = _TOPS.get(name)
+    if top is None:
+        top = _TOPS[name] = GlobalLeaderboard()
+    return top
+
+
+def format_top_line(board: str, place: int, entry: Tuple[int, float, float, str]) -> str:
+    user_id, score1, score2, name = entry
+    who = name or str(user_id)
+    if board == "wins":
+        played = int(-score2)
+        rate = round(100 * score1 / played) if played else 0
+        return f"{place}. {who}: {int(score1)} побед ({rate}%)"
+    if board == "rate":
+        return f"{place}. {who}: {round(100 * score1)}% ({int(score2)} побед)"
+    return f"{place}. {who}: серия {int(score1)} ({int(score2)} побед)"
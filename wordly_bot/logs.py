@@ -0,0 +1,148 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+import zlib
+from typing import Optional
+
+from .config import LOG_FORMAT, LOG_LEVEL, LOG_QUEUE_SIZE, LOG_REDACT, LOG_SAMPLE
+from .metrics import REGISTRY
+
+# Логи бота: JSON-строки в stdout, которые пишет отдельный поток.
+# Хендлер только кладёт запись в очередь (без форматирования и без write в stdout), поэтому медленный
+# драйвер логов docker не тормозит event loop. Переполненная очередь отбрасывает записи, а не ждёт.
+#
+#   log.info("Новая игра", extra={"chat_id": chat_id, "answer": answer, "sample": True})
+#
+# Поля из extra попадают в JSON; секретные (ответ, токен) заменяются на "***", пока не задано
+# SLOVLI_LOG_REDACT=0. sample=True — частое событие: его пишут только для доли чатов SLOVLI_LOG_SAMPLE,
+# причём для выбранного чата пишутся все такие события, чтобы по нему была видна вся партия.
+
+ROOT_LOGGER = "wordly_bot"
+SECRET_FIELDS = frozenset({"answer", "token", "secret"})
+REDACTED = "***"
+# Атрибуты, которые есть у любой LogRecord; всё остальное пришло из extra
+_RECORD_ATTRS = frozenset(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime", "sample"}
+
+LOG_DROPPED = REGISTRY.counter("slovli_log_dropped_total", "Записи лога, отброшенные из-за полной очереди")
+
+
+def record_fields(record: logging.LogRecord, redact: bool = LOG_REDACT) -> dict:
+    fields = {}
+    for key, value in record.__dict__.items():
+        if key in _RECORD_ATTRS or key.startswith("_"):
+            continue
+        fields[key] = REDACTED if redact and key in SECRET_FIELDS else value
+    return fields
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(record_fields(record))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Для чтения глазами при локальном запуске (SLOVLI_LOG_FORMAT=text)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        stamp = time.strftime("%H:%M:%S", time.localtime(record.created))
+        fields = " ".join(f"{k}={v}" for k, v in record_fields(record).items())
+        line = f"{stamp} {record.levelname:<7} {record.name.rsplit('.', 1)[-1]}: {record.getMessage()}"
+        if fields:
+            line += f" [{fields}]"
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class ChatSampler(logging.Filter):
+    """Частые события (sample=True) пропускаются только для доли чатов; выбор чата не меняется между запусками"""
+
+    def __init__(self, rate: float = LOG_SAMPLE):
+        super().__init__()
+        self.threshold = int(max(0.0, min(1.0, rate)) * 10_000)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sample", False):
+            return True
+        chat_id = getattr(record, "chat_id", None)
+        if chat_id is None:
+            return self.threshold > 0
+        return zlib.crc32(str(chat_id).encode()) % 10_000 < self.threshold
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler, который не форматирует запись в потоке вызова и не ждёт места в очереди"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Форматирование — в потоке записи; аргументы подставляются сейчас, пока объекты не изменились
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_DROPPED.inc()
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, stream=None) -> None:
+    """Настроить логгер wordly_bot (повторный вызов перезапускает поток записи)"""
+    global _listener
+    stop_logging()
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(TextFormatter() if fmt == "text" else JsonFormatter())
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    handler = DroppingQueueHandler(log_queue)
+    handler.addFilter(ChatSampler())
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level.upper())
+    root.handlers = [handler]
+    root.propagate = False
+    # Сообщения библиотек (PTB, httpx) — через ту же очередь и не ниже WARNING
+    library = logging.getLogger()
+    library.handlers = [handler]
+    library.setLevel(logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Дописать очередь и остановить поток записи"""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+
+def _restart_after_fork() -> None:
+    # Поток записи не переживает fork: воркерам кластера нужен свой
+    global _listener
+    if _listener is not None:
+        _listener = None
+        setup_logging()
+
+
+atexit.register(stop_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
@@ -1,24 +1,51 @@
+import time
+
+# Замер импорта для отчёта о запуске: всё, что ниже, — зависимости бота
+_IMPORT_STARTED = time.perf_counter()
+
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
 from telegram.ext import (
+    Application,
     ApplicationBuilder,
     CommandHandler,
     ContextTypes,
     MessageHandler,
+    TypeHandler,
     filters,
 )
+from telegram import Update
+from telegram.request import BaseRequest
 
-from .config import TOKEN
+from .config import ADMIN_USER_ID, BOT_MODE, CLUSTER_WORKERS, CONFIG_WARNINGS, LAZY_START, TENANTS_FILE, TOKEN, WORD_LEN
 from .db import init_db
+from .backup import start_backup_scheduler
+from .leaderboard import GLOBAL_TOP
+from .render import RENDER_POOL, warm_tile_cache
+from .emoji_board import load_emoji_templates
+from .dispatch import build_update_processor
+from .ratelimit import build_rate_limiter
+from .network import configure_builder
+from .metrics import instrument_handler, start_metrics_server, stop_metrics_server
+from .health import start_health_server, stop_health_server
+from .logs import setup_logging
+from .recorder import RECORDER
+from .watchdog import WATCHDOG, watch_handler
+from .tenants import load_tenants
 from .handlers import (
-    bootstrap_words,
     cmd_giveup,
     cmd_help,
     cmd_new,
     cmd_start,
     cmd_stats,
+    cmd_top,
     on_text,
-    set_word_lists,
     set_words_by_length,
     cmd_length,
+    cmd_image,
     cmd_addword,
     cmd_removeword,
     cmd_words,
@@ -27,68 +54,211 @@ from .handlers import (
     cmd_removemoderator,
     cmd_moderators,
     cmd_myrole,
+    cmd_backup,
+    cmd_exportstats,
+    cmd_renderstats,
+    cmd_netstats,
+    cmd_profile,
+    WORD_LENGTHS,
+    load_length,
+    load_remaining_lengths,
 )
 
+log = logging.getLogger(__name__)
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
 
-def main():
-    init_db()
-    
-    # Загружаем слова для всех длин от 4 до 9
-    words_by_length = {}
-    answer_pools_by_length = {}
-    
-    for length in range(4, 10):
+
+class StartupTimer:
+    """Время фаз запуска для одной строки в логе: что именно замедляет перезапуск"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {"import": IMPORT_SECONDS}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
         try:
-            from .game import load_words
-            from .config import WORDS_FILE
-            words = load_words(WORDS_FILE, length, min_count=100)
-            words_by_length[length] = words
-            print(f"Загружено {len(words)} слов длиной {length}")
-        except Exception as e:
-            print(f"Ошибка загрузки слов длиной {length}: {e}")
-            words_by_length[length] = []
-    
-    # Создаем пулы ответов для каждой длины
-    for length in range(4, 10):
-        if length in words_by_length and words_by_length[length]:
-            answer_pools_by_length[length] = words_by_length[length]
-        else:
-            answer_pools_by_length[length] = []
-    
-    # Для обратной совместимости
-    words_all, answer_pool = bootstrap_words()
-    set_word_lists(words_all, answer_pool)
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - started
+
+    def report(self) -> None:
+        total = IMPORT_SECONDS + time.perf_counter() - self.started
+        log.info(
+            "Запуск за %.2f с: %s",
+            total,
+            ", ".join(f"{name} {seconds * 1000:.0f} мс" for name, seconds in self.phases.items()),
+            extra={"startup_ms": {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()}},
+        )
+
+
+async def start_services(app) -> None:
+    await start_metrics_server()
+    RECORDER.start()
+    WATCHDOG.start()
+    start_health_server()
+
+
+async def shutdown_workers(app) -> None:
+    RENDER_POOL.shutdown()
+    await stop_metrics_server()
+    RECORDER.stop()
+    await WATCHDOG.stop()
+    stop_health_server()
+
+
+def load_dictionaries(lengths: Iterable[int] = WORD_LENGTHS) -> Tuple[dict, dict]:
+    """Загрузить словари указанных длин (по умолчанию всех от 4 до 9); остальные загрузятся при обращении"""
+    words_by_length: dict = {}
+    answer_pools_by_length: dict = {}
+    # load_length дописывает длины прямо в эти словари
     set_words_by_length(words_by_length, answer_pools_by_length)
+    for length in lengths:
+        load_length(length)
+
+    if WORD_LEN in words_by_length and not words_by_length[WORD_LEN]:
+        raise RuntimeError(f"Не загружен словарь основной длины {WORD_LEN}")
+    return words_by_length, answer_pools_by_length
 
-    if not TOKEN:
-        raise RuntimeError("Нужен TELEGRAM_BOT_TOKEN")
 
-    app = ApplicationBuilder().token(TOKEN).build()
-    app.add_handler(CommandHandler("start", cmd_start))
-    app.add_handler(CommandHandler("help", cmd_help))
-    app.add_handler(CommandHandler("new", cmd_new))
-    app.add_handler(CommandHandler("giveup", cmd_giveup))
-    app.add_handler(CommandHandler("stats", cmd_stats))
-    app.add_handler(CommandHandler("length", cmd_length))
-    app.add_handler(CommandHandler("addword", cmd_addword))
-    app.add_handler(CommandHandler("removeword", cmd_removeword))
-    app.add_handler(CommandHandler("words", cmd_words))
-    app.add_handler(CommandHandler("checkword", cmd_checkword))
-    app.add_handler(CommandHandler("addmoderator", cmd_addmoderator))
-    app.add_handler(CommandHandler("removemoderator", cmd_removemoderator))
-    app.add_handler(CommandHandler("moderators", cmd_moderators))
-    app.add_handler(CommandHandler("myrole", cmd_myrole))
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, on_text))
+def start_background_loading() -> None:
+    """После быстрого старта: остальные длины и плитки досок — в фоне, бот уже отвечает"""
+
+    def load() -> None:
+        started = time.perf_counter()
+        load_remaining_lengths()
+        warm_tile_cache()
+        log.info("Фоновая загрузка словарей и плиток: %.2f с", time.perf_counter() - started)
+
+    threading.Thread(target=load, name="slovli-preload", daemon=True).start()
+
+
+def build_application(
+    processes: int = 1,
+    builder: Optional[ApplicationBuilder] = None,
+    token: Optional[str] = None,
+    requests: Optional[Tuple[BaseRequest, BaseRequest]] = None,
+) -> Application:
+    """
+    Приложение PTB со всеми хендлерами; processes — сколько процессов делят лимиты Telegram,
+    requests — свои объекты запросов вместо пула HTTP (заглушка Bot API в нагрузочном тесте)
+    """
+    if builder is None:
+        builder = ApplicationBuilder()
+    builder = builder.token(token or TOKEN).post_init(start_services).post_shutdown(shutdown_workers)
+    builder = configure_builder(builder, requests)
+    processor = build_update_processor()
+    if processor is not None:
+        builder = builder.concurrent_updates(processor)
+    limiter = build_rate_limiter(processes)
+    if limiter is not None:
+        builder = builder.rate_limiter(limiter)
+    app = builder.build()
+    if RECORDER.enabled:
+        # Группа -1: запись идёт раньше хендлеров и не мешает им сработать
+        app.add_handler(TypeHandler(Update, RECORDER.record), group=-1)
+    commands = (
+        ("start", cmd_start),
+        ("help", cmd_help),
+        ("new", cmd_new),
+        ("giveup", cmd_giveup),
+        ("stats", cmd_stats),
+        ("top", cmd_top),
+        ("length", cmd_length),
+        ("image", cmd_image),
+        ("addword", cmd_addword),
+        ("removeword", cmd_removeword),
+        ("words", cmd_words),
+        ("checkword", cmd_checkword),
+        ("addmoderator", cmd_addmoderator),
+        ("removemoderator", cmd_removemoderator),
+        ("moderators", cmd_moderators),
+        ("myrole", cmd_myrole),
+        ("backup", cmd_backup),
+        ("exportstats", cmd_exportstats),
+        ("renderstats", cmd_renderstats),
+        ("netstats", cmd_netstats),
+        ("profile", cmd_profile),
+    )
+    # Обёртки с замером времени (slovli_handler_seconds) только при включённых метриках,
+    # отметка для сторожа loop — только при включённом стороже
+    for name, callback in commands:
+        app.add_handler(CommandHandler(name, instrument_handler(name, watch_handler(name, callback))))
+    app.add_handler(
+        MessageHandler(filters.TEXT & ~filters.COMMAND, instrument_handler("text", watch_handler("text", on_text)))
+    )
+    return app
+
+
+def main():
+    timer = StartupTimer()
+    setup_logging()
+    for warning in CONFIG_WARNINGS:
+        log.warning(warning)
+    if ADMIN_USER_ID:
+        log.info("Администратор установлен: %s", ADMIN_USER_ID)
+    tenants = load_tenants(TENANTS_FILE) if TENANTS_FILE else []
+    with timer.phase("db"):
+        if tenants:
+            if CLUSTER_WORKERS > 1:
+                raise RuntimeError("Несколько ботов (SLOVLI_TENANTS_FILE) и кластер (SLOVLI_WORKERS) не совмещаются")
+            from .multibot import prepare_tenants
+
+            prepare_tenants(tenants)
+        else:
+            init_db()
+            GLOBAL_TOP.load()
+    # Воркеры кластера создаются fork-ом и делят память ведущего, поэтому им всё загружается заранее
+    lazy = LAZY_START and CLUSTER_WORKERS <= 1
+    if not lazy:
+        with timer.phase("tiles"):
+            warm_tile_cache()
+    with timer.phase("emoji"):
+        load_emoji_templates()
+    with timer.phase("dictionaries"):
+        words_by_length, answer_pools_by_length = load_dictionaries((WORD_LEN,) if lazy else WORD_LENGTHS)
+
+    if not TOKEN and not tenants:
+        raise RuntimeError("Нужен TELEGRAM_BOT_TOKEN")
 
     total_words = sum(len(words) for words in words_by_length.values())
     total_pools = sum(len(pool) for pool in answer_pools_by_length.values())
-    print(f"Загружено слов: {total_words}; пулов загадок: {total_pools}. Бот запущен.")
-    print(f"Доступные длины: {list(words_by_length.keys())}")
-    app.run_polling()
+    log.info(
+        "Загружено слов: %d; пулов загадок: %d. Бот запущен.",
+        total_words,
+        total_pools,
+        extra={"lengths": list(words_by_length.keys())},
+    )
+    if lazy:
+        start_background_loading()
+    if tenants or CLUSTER_WORKERS > 1:
+        timer.report()
+    if tenants:
+        from .multibot import run_tenants
 
+        # Словари, спрайты и пул отрисовки загружены один раз и общие для всех ботов
+        start_backup_scheduler(tenants=tenants)
+        run_tenants(tenants)
+        return
+    if CLUSTER_WORKERS > 1:
+        from .cluster import run_cluster
 
-if __name__ == "__main__":
-    main()
+        # Воркеры создаются fork-ом после загрузки словарей и делят их память
+        run_cluster(CLUSTER_WORKERS)
+        return
+
+    with timer.phase("app"):
+        app = build_application()
+    timer.report()
+    start_backup_scheduler()
+    if BOT_MODE == "webhook":
+        from .webhook import run_webhook
 
+        run_webhook(app)
+    else:
+        app.run_polling()
 
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+import bisect
+import functools
+import inspect
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .config import METRICS_ENABLED, METRICS_LISTEN, METRICS_PORT
+
+log = logging.getLogger(__name__)
+
+# Метрики в формате Prometheus. Наблюдение — пара сложений в заранее выделенных счётчиках,
+# текст собирается только при запросе /metrics. При SLOVLI_METRICS=0 функции не оборачиваются вовсе.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels_text(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, doc: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.doc = doc
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0.0)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} counter"]
+        lines.extend(
+            f"{self.name}{_labels_text(self.labels, values)} {_format_value(v)}" for values, v in items
+        )
+        return lines
+
+
+class _HistogramSeries:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * (buckets + 1)
+        self.total = 0.0
+        self.count = 0
+
+
+class Histogram:
+    def __init__(self, name: str, doc: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.doc = doc
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[LabelValues, _HistogramSeries] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = _HistogramSeries(len(self.buckets))
+            series.counts[index] += 1
+            series.total += seconds
+            series.count += 1
+
+    def totals(self) -> Dict[LabelValues, Tuple[int, float]]:
+        """Число наблюдений и сумма по каждому набору меток"""
+        with self._lock:
+            return {values: (s.count, s.total) for values, s in self._series.items()}
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = sorted(
+                (values, (list(s.counts), s.total, s.count)) for values, s in self._series.items()
+            )
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        for values, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels_text(self.labels, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels_text(self.labels, values)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_labels_text(self.labels, values)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[object] = []
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def counter(self, name: str, doc: str, labels: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, doc, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self, name: str, doc: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        metric = Histogram(name, doc, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], List[str]]) -> None:
+        """Значения, которые считаются только при запросе (глубина очередей и т.п.)"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception as e:  # noqa: BLE001
+                log.error("Ошибка сборщика: %s", e)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HANDLER_SECONDS = REGISTRY.histogram(
+    "slovli_handler_seconds", "Время обработки обновления хендлером", ("handler",)
+)
+HANDLER_ERRORS = REGISTRY.counter("slovli_handler_errors_total", "Исключения в хендлерах", ("handler",))
+DB_SECONDS = REGISTRY.histogram("slovli_db_query_seconds", "Время функций db.py", ("query",), DB_BUCKETS)
+RENDER_DRAW_SECONDS = REGISTRY.histogram("slovli_render_draw_seconds", "Отрисовка доски", ("format",))
+RENDER_ENCODE_SECONDS = REGISTRY.histogram("slovli_render_encode_seconds", "Кодирование картинки", ("format",))
+RENDER_WAIT_SECONDS = REGISTRY.histogram("slovli_render_wait_seconds", "Ожидание свободного рендера")
+RENDER_ERRORS = REGISTRY.counter("slovli_render_errors_total", "Ошибки отрисовки (доска отправлена текстом)", ("error",))
+API_SECONDS = REGISTRY.histogram("slovli_api_request_seconds", "Запросы к Bot API", ("method",))
+API_ERRORS = REGISTRY.counter("slovli_api_errors_total", "Ошибки запросов к Bot API", ("method",))
+GUESSES = REGISTRY.counter("slovli_guesses_total", "Принятые попытки")
+GAMES_FINISHED = REGISTRY.counter("slovli_games_finished_total", "Завершённые игры", ("result",))
+REJECTED_WORDS = REGISTRY.counter("slovli_rejected_words_total", "Отклонённые слова", ("reason",))
+
+
+def instrument_handler(name: str, handler):
+    """Обернуть хендлер PTB замером времени; при выключенных метриках вернуть его как есть"""
+    if not METRICS_ENABLED:
+        return handler
+
+    @functools.wraps(handler)
+    async def wrapper(update, context):
+        started = time.perf_counter()
+        try:
+            return await handler(update, context)
+        except Exception:
+            HANDLER_ERRORS.inc(name)
+            raise
+        finally:
+            HANDLER_SECONDS.observe(time.perf_counter() - started, name)
+
+    return wrapper
+
+
+def instrument_functions(namespace: dict, module: str, histogram: Histogram, exclude: Sequence[str] = ()) -> None:
+    """Заменить публичные функции модуля на обёртки с замером времени (до импорта их другими модулями)"""
+    if not METRICS_ENABLED:
+        return
+    for name, fn in list(namespace.items()):
+        if (
+            name.startswith("_")
+            or name in exclude
+            or not inspect.isfunction(fn)
+            or fn.__module__ != module
+            or inspect.isgeneratorfunction(fn)
+        ):
+            continue
+        namespace[name] = _timed(fn, histogram, name)
+
+
+def _timed(fn, histogram: Histogram, label: str):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started, label)
+
+    return wrapper
+
+
+# --- HTTP ---
+
+_server = None
+_port = METRICS_PORT
+
+
+def use_metrics_port(port: int) -> None:
+    """Свой порт для процесса (воркеры кластера слушают METRICS_PORT + 1 + номер)"""
+    global _port
+    _port = port
+
+
+async def metrics_endpoint(request):
+    from .http_server import HttpResponse
+
+    return HttpResponse(200, REGISTRY.render().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8")
+
+
+async def start_metrics_server(port: Optional[int] = None) -> None:
+    """Поднять /metrics на отдельном порту (один раз на процесс)"""
+    global _server
+    port = _port if port is None else port
+    if not METRICS_ENABLED or not port or _server is not None:
+        return
+    from .http_server import HttpServer
+
+    server = HttpServer(METRICS_LISTEN, port)
+    server.route("GET", "/metrics", metrics_endpoint)
+    try:
+        await server.start()
+    except OSError as e:
+        # Занятый порт телеметрии не должен останавливать бота: без /metrics он работает как раньше
+        log.warning("Сервер метрик не запущен на %s:%s: %s", METRICS_LISTEN, port, e)
+        return
+    _server = server
+    log.info("Метрики: http://%s:%s/metrics", METRICS_LISTEN, server.port)
+
+
+async def stop_metrics_server() -> None:
+    global _server
+    if _server is not None:
+        server, _server = _server, None
+        await server.stop()
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+from typing import Any, List, Optional
+
+from telegram.ext import Application, ApplicationBuilder
+
+from .config import BOT_MODE, HEALTH_PATH, WEBHOOK_LISTEN, WEBHOOK_PATH, WEBHOOK_PORT
+from .db import init_db
+from .health import start_health_server
+from .http_server import HttpServer
+from .leaderboard import global_top
+from .tenants import Tenant, use_tenant
+
+log = logging.getLogger(__name__)
+
+
+class TenantApplication(Application):
+    """Application одного из ботов: все хендлеры его обновлений видят его базу и администратора"""
+
+    def __init__(self, *, tenant: Tenant, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.tenant = tenant
+
+    async def process_update(self, update: object) -> None:
+        # Каждое обновление обрабатывается в своей задаче, так что контекст не протекает к другим ботам
+        with use_tenant(self.tenant):
+            await super().process_update(update)
+
+
+def prepare_tenants(tenants: List[Tenant]) -> None:
+    """Создать базы ботов и загрузить их рейтинги; словари и кэши отрисовки общие"""
+    for tenant in tenants:
+        with use_tenant(tenant):
+            init_db()
+            global_top().load()
+        log.info("Бот подготовлен", extra={"bot": tenant.name, "db": tenant.db_file, "admin": tenant.admin_user_id})
+
+
+def build_tenant_applications(tenants: List[Tenant]) -> List[Application]:
+    from .main import build_application
+
+    return [
+        build_application(
+            builder=ApplicationBuilder().application_class(TenantApplication, kwargs={"tenant": tenant}),
+            token=tenant.token,
+        )
+        for tenant in tenants
+    ]
+
+
+async def _serve(apps: List[Application]) -> None:
+    from .webhook import (
+        WebhookReceiver,
+        register_webhook,
+        stop_on_signals,
+        webhook_secret,
+    )
+
+    stop = asyncio.Event()
+    stop_on_signals(stop)
+    server: Optional[HttpServer] = None
+    started: List[Application] = []
+    try:
+        # Один сервер проверок на процесс: готовность — когда отвечают базы всех ботов
+        start_health_server(db_files=[app.tenant.db_file for app in apps])
+        for app in apps:
+            await app.initialize()
+            started.append(app)
+            if app.post_init:
+                await app.post_init(app)
+
+        if BOT_MODE == "webhook":
+            # Один порт на всех: у каждого бота свой путь WEBHOOK_PATH/<имя>
+            secret = webhook_secret()
+            server = HttpServer(WEBHOOK_LISTEN, WEBHOOK_PORT)
+            receivers = {}
+            for app in apps:
+                path = f"{WEBHOOK_PATH.rstrip('/')}/{app.tenant.name}"
+                receiver = WebhookReceiver(app.bot, secret, app.update_queue.put)
+                receivers[app.tenant.name] = receiver
+                server.route("POST", path, receiver.handle_update)
+
+            async def health(request):
+                from .http_server import HttpResponse
+
+                return HttpResponse.json(
+                    {
+                        "status": "ok",
+                        "bots": {
+                            name: {"updates": r.received, "rejected": r.rejected, "last_update_at": r.last_update_at}
+                            for name, r in receivers.items()
+                        },
+                    }
+                )
+
+            server.route("GET", HEALTH_PATH, health)
+            for app in apps:
+                await app.start()
+            await server.start()
+            for app in apps:
+                await register_webhook(app.bot, secret, f"{WEBHOOK_PATH.rstrip('/')}/{app.tenant.name}")
+            log.info("Вебхуки ботов слушают %s:%s%s/<имя>", WEBHOOK_LISTEN, server.port, WEBHOOK_PATH.rstrip("/"))
+        else:
+            for app in apps:
+                await app.updater.start_polling()
+                await app.start()
+        log.info("Запущено ботов: %d", len(apps))
+        await stop.wait()
+    finally:
+        if server is not None:
+            await server.stop()
+        for app in started:
+            if app.updater and app.updater.running:
+                await app.updater.stop()
+            if app.running:
+                await app.stop()
+            if app.post_stop:
+                await app.post_stop(app)
+        for app in started:
+            await app.shutdown()
+            if app.post_shutdown:
+                await app.post_shutdown(app)
+
+
+def run_tenants(tenants: List[Tenant]) -> None:
+    """Несколько ботов в одном процессе и одном цикле событий"""
+    asyncio.run(_serve(build_tenant_applications(tenants)))
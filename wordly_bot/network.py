@@ -0,0 +1,205 @@
+import asyncio
+import importlib.util
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from telegram.error import NetworkError, TimedOut
+from telegram.request import BaseRequest, HTTPXRequest, RequestData
+
+from .config import (
+    API_BASE_URL,
+    HTTP_BACKOFF,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_KEEPALIVE,
+    HTTP_MEDIA_WRITE_TIMEOUT,
+    HTTP_POOL_SIZE,
+    HTTP_POOL_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_RETRIES,
+    HTTP_UPDATES_POOL_SIZE,
+    HTTP_VERSION,
+    HTTP_WRITE_TIMEOUT,
+)
+from .health import mark_updates_received
+from .metrics import API_ERRORS, API_SECONDS
+
+log = logging.getLogger(__name__)
+
+# Запрос не дошёл до Telegram — повторять безопасно для любого метода
+_NOT_SENT = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# Повтор этих методов после любой сетевой ошибки или 5xx не создаст дубликат сообщения
+_IDEMPOTENT_PREFIXES = ("get", "edit", "delete", "set", "answer")
+_RETRY_STATUSES = (500, 502, 503, 504)
+
+
+class EndpointStats:
+    __slots__ = ("calls", "errors", "retries", "pool_timeouts", "total", "max")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.pool_timeouts = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+class NetworkStats:
+    """Задержки и ошибки запросов к Bot API по методам"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, EndpointStats] = {}
+
+    def _get(self, endpoint: str) -> EndpointStats:
+        stats = self._endpoints.get(endpoint)
+        if stats is None:
+            stats = self._endpoints[endpoint] = EndpointStats()
+        return stats
+
+    def record(self, endpoint: str, seconds: float, error: bool) -> None:
+        with self._lock:
+            stats = self._get(endpoint)
+            stats.calls += 1
+            stats.total += seconds
+            if seconds > stats.max:
+                stats.max = seconds
+            if error:
+                stats.errors += 1
+
+    def record_retry(self, endpoint: str, pool_timeout: bool) -> None:
+        with self._lock:
+            stats = self._get(endpoint)
+            stats.retries += 1
+            if pool_timeout:
+                stats.pool_timeouts += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                endpoint: {
+                    "calls": s.calls,
+                    "errors": s.errors,
+                    "retries": s.retries,
+                    "pool_timeouts": s.pool_timeouts,
+                    "avg_ms": s.total / s.calls * 1000 if s.calls else 0.0,
+                    "max_ms": s.max * 1000,
+                }
+                for endpoint, s in self._endpoints.items()
+            }
+
+
+NETWORK_STATS = NetworkStats()
+
+
+def _endpoint(url: str) -> str:
+    return url.rsplit("/", 1)[-1]
+
+
+def backoff_delay(attempt: int, base: float = HTTP_BACKOFF) -> float:
+    """Экспоненциальная пауза с полным джиттером, чтобы воркеры не повторяли запросы хором"""
+    return random.uniform(0, base * (2 ** attempt))
+
+
+class InstrumentedRequest(HTTPXRequest):
+    """HTTPXRequest с пулом и таймаутами из config.py, повтором с джиттером и метриками по методам"""
+
+    def __init__(self, pool_size: int, retries: int = HTTP_RETRIES, **kwargs):
+        http_version = kwargs.pop("http_version", HTTP_VERSION)
+        if http_version != "1.1" and importlib.util.find_spec("h2") is None:
+            log.warning('HTTP/2 требует пакет h2 (pip install "python-telegram-bot[http2]"), используется HTTP/1.1')
+            http_version = "1.1"
+        super().__init__(
+            connection_pool_size=pool_size,
+            read_timeout=HTTP_READ_TIMEOUT,
+            write_timeout=HTTP_WRITE_TIMEOUT,
+            connect_timeout=HTTP_CONNECT_TIMEOUT,
+            pool_timeout=HTTP_POOL_TIMEOUT,
+            media_write_timeout=HTTP_MEDIA_WRITE_TIMEOUT,
+            http_version=http_version,
+            httpx_kwargs={
+                "limits": httpx.Limits(
+                    max_connections=pool_size,
+                    max_keepalive_connections=pool_size,
+                    keepalive_expiry=HTTP_KEEPALIVE,
+                )
+            },
+            **kwargs,
+        )
+        self.retries = retries
+
+    async def do_request(
+        self,
+        url: str,
+        method: str,
+        request_data: Optional[RequestData] = None,
+        read_timeout=BaseRequest.DEFAULT_NONE,
+        write_timeout=BaseRequest.DEFAULT_NONE,
+        connect_timeout=BaseRequest.DEFAULT_NONE,
+        pool_timeout=BaseRequest.DEFAULT_NONE,
+    ) -> Tuple[int, bytes]:
+        endpoint = _endpoint(url)
+        idempotent = endpoint.startswith(_IDEMPOTENT_PREFIXES)
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                code, payload = await super().do_request(
+                    url, method, request_data, read_timeout, write_timeout, connect_timeout, pool_timeout
+                )
+            except (TimedOut, NetworkError) as e:
+                elapsed = time.perf_counter() - started
+                NETWORK_STATS.record(endpoint, elapsed, True)
+                API_SECONDS.observe(elapsed, endpoint)
+                API_ERRORS.inc(endpoint)
+                not_sent = isinstance(e.__cause__, _NOT_SENT)
+                if attempt >= self.retries or not (not_sent or idempotent):
+                    raise
+                NETWORK_STATS.record_retry(endpoint, isinstance(e.__cause__, httpx.PoolTimeout))
+            else:
+                failed = code >= 500
+                elapsed = time.perf_counter() - started
+                NETWORK_STATS.record(endpoint, elapsed, failed)
+                API_SECONDS.observe(elapsed, endpoint)
+                if failed:
+                    API_ERRORS.inc(endpoint)
+                if not (failed and idempotent and code in _RETRY_STATUSES and attempt < self.retries):
+                    if endpoint == "getUpdates" and code == 200:
+                        mark_updates_received()
+                    return code, payload
+                NETWORK_STATS.record_retry(endpoint, False)
+            await asyncio.sleep(backoff_delay(attempt))
+            attempt += 1
+
+
+def build_requests() -> Tuple[InstrumentedRequest, InstrumentedRequest]:
+    """Отдельные пулы: длинный getUpdates не занимает соединения, нужные для ответов"""
+    request = InstrumentedRequest(HTTP_POOL_SIZE)
+    # getUpdates висит до timeout опроса — read_timeout задаёт сам PTB
+    updates_request = InstrumentedRequest(HTTP_UPDATES_POOL_SIZE, http_version="1.1")
+    return request, updates_request
+
+
+def configure_builder(builder, requests: Optional[Tuple[BaseRequest, BaseRequest]] = None):
+    """Применить сетевые настройки к ApplicationBuilder; requests — свои (обычный, getUpdates), например заглушки"""
+    request, updates_request = requests or build_requests()
+    builder = builder.request(request).get_updates_request(updates_request)
+    if API_BASE_URL:
+        base = API_BASE_URL.rstrip("/")
+        builder = builder.base_url(f"{base}/bot").base_file_url(f"{base}/file/bot")
+    return builder
+
+
+def bot_kwargs() -> Dict[str, Any]:
+    """Те же настройки для отдельного telegram.Bot (ведущий процесс кластера)"""
+    request, updates_request = build_requests()
+    kwargs: Dict[str, Any] = {"request": request, "get_updates_request": updates_request}
+    if API_BASE_URL:
+        base = API_BASE_URL.rstrip("/")
+        kwargs["base_url"] = f"{base}/bot"
+        kwargs["base_file_url"] = f"{base}/file/bot"
+    return kwargs
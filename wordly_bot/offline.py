@@ -0,0 +1,105 @@
+import asyncio
+import json
+import os
+import random
+import time
+from collections import Counter
+from typing import Callable, Dict, Optional, Tuple
+
+from telegram import Bot, Update
+from telegram.request import BaseRequest, RequestData
+
+# Работа бота без сети: заглушка Bot API и сборка обновлений для loadtest.py и replay.py
+
+
+def _part_size(value) -> int:
+    content = value[1] if isinstance(value, tuple) else value
+    if isinstance(content, (bytes, str)):
+        return len(content)
+    # Файл, отправляемый потоком (InputFile с read_file_handle=False)
+    return os.fstat(content.fileno()).st_size
+
+
+class StubRequest(BaseRequest):
+    """
+    Заглушка Bot API: отвечает как Telegram, считает вызовы и отправленные байты.
+    on_call(endpoint, parameters) вызывается на каждый запрос — например, чтобы сохранить ответы бота.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        on_call: Optional[Callable[[str, Dict[str, object]], None]] = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.on_call = on_call
+        self.calls: Counter = Counter()
+        self.upload_bytes = 0
+        self._message_id = 0
+
+    @property
+    def read_timeout(self) -> Optional[float]:
+        return None
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def do_request(
+        self,
+        url: str,
+        method: str,
+        request_data: Optional[RequestData] = None,
+        read_timeout=BaseRequest.DEFAULT_NONE,
+        write_timeout=BaseRequest.DEFAULT_NONE,
+        connect_timeout=BaseRequest.DEFAULT_NONE,
+        pool_timeout=BaseRequest.DEFAULT_NONE,
+    ) -> Tuple[int, bytes]:
+        endpoint = url.rsplit("/", 1)[-1]
+        self.calls[endpoint] += 1
+        params = request_data.parameters if request_data is not None else {}
+        if request_data is not None and request_data.contains_files:
+            self.upload_bytes += sum(_part_size(value) for value in request_data.multipart_data.values())
+        if self.on_call is not None:
+            self.on_call(endpoint, params)
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+        return 200, json.dumps({"ok": True, "result": self._result(endpoint, params)}).encode()
+
+    def _result(self, endpoint: str, params: Dict[str, object]):
+        if endpoint == "getMe":
+            return {"id": 1, "is_bot": True, "first_name": "offline", "username": "offline_bot"}
+        if endpoint.startswith(("delete", "set", "answer")):
+            return True
+        self._message_id += 1
+        chat_id = int(params.get("chat_id", 0) or 0)
+        return {"message_id": self._message_id, "date": 0, "chat": {"id": chat_id, "type": "group"}}
+
+
+def text_update(
+    bot: Bot,
+    update_id: int,
+    chat_id: int,
+    user_id: int,
+    text: str,
+    chat_type: str = "group",
+    name: str = "",
+    date: Optional[int] = None,
+) -> Update:
+    """Update с текстовым сообщением; для команд добавляется сущность bot_command, как у Telegram"""
+    message = {
+        "message_id": update_id,
+        "date": int(time.time()) if date is None else date,
+        "chat": {"id": chat_id, "type": chat_type},
+        "from": {"id": user_id, "is_bot": False, "first_name": name or f"Игрок {user_id}"},
+        "text": text,
+    }
+    if chat_type != "private":
+        message["chat"]["title"] = f"chat {chat_id}"
+    if text.startswith("/"):
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+    return Update.de_json({"update_id": update_id, "message": message}, bot)
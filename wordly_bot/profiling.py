@@ -0,0 +1,122 @@
+import asyncio
+import cProfile
+import io
+import linecache
+import marshal
+import pstats
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Optional
+
+from .config import PROFILE_TOP
+
+# Профилирование по команде /profile. Пока команда не запущена, ничего не включено и не замедляет бота.
+
+PROFILE_MODES = ("cpu", "mem")
+# Глубина стека для tracemalloc: хватает, чтобы увидеть вызывающий хендлер
+TRACE_FRAMES = 16
+
+_busy = asyncio.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    pass
+
+
+@dataclass
+class ProfileResult:
+    mode: str
+    seconds: float
+    report: str
+    raw: Optional[bytes] = None  # .prof для snakeviz/pstats (только cpu)
+
+
+async def run_profile(mode: str, seconds: float) -> ProfileResult:
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Неизвестный режим профилирования: {mode}")
+    if _busy.locked():
+        raise ProfilerBusy("Профилирование уже идёт")
+    async with _busy:
+        if mode == "cpu":
+            return await _profile_cpu(seconds)
+        return await _profile_memory(seconds)
+
+
+async def _profile_cpu(seconds: float) -> ProfileResult:
+    # cProfile видит поток, в котором включён, — это поток event loop со всеми хендлерами;
+    # потоки отрисовки и бэкапа сюда не попадают (их время видно как ожидание в хендлерах)
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.disable()
+    elapsed = time.perf_counter() - started
+    return await asyncio.to_thread(_format_cpu, profiler, elapsed)
+
+
+def _format_cpu(profiler: cProfile.Profile, elapsed: float) -> ProfileResult:
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.strip_dirs()
+    out.write(f"CPU event loop за {elapsed:.1f} с\n\n=== По суммарному времени (cumulative) ===\n")
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_TOP)
+    out.write("\n=== По собственному времени (tottime) ===\n")
+    stats.sort_stats(pstats.SortKey.TIME).print_stats(PROFILE_TOP)
+    profiler.create_stats()
+    # Тот же формат, что у Profile.dump_stats, только без временного файла
+    raw = marshal.dumps(profiler.stats)
+    return ProfileResult("cpu", elapsed, out.getvalue(), raw)
+
+
+async def _profile_memory(seconds: float) -> ProfileResult:
+    # tracemalloc видит все потоки. Снимок кучи с TRACE_FRAMES кадрами занимает от сотен миллисекунд
+    # до секунд, поэтому и снимки, и их сравнение — в отдельном потоке, а не в event loop
+    already = tracemalloc.is_tracing()
+    if not already:
+        tracemalloc.start(TRACE_FRAMES)
+    started = time.perf_counter()
+    try:
+        before = await asyncio.to_thread(tracemalloc.take_snapshot)
+        await asyncio.sleep(seconds)
+        after = await asyncio.to_thread(tracemalloc.take_snapshot)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not already:
+            tracemalloc.stop()
+    elapsed = time.perf_counter() - started
+    report = await asyncio.to_thread(_format_memory, before, after, current, peak, elapsed)
+    return ProfileResult("mem", elapsed, report)
+
+
+def _format_memory(
+    before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, current: int, peak: int, elapsed: float
+) -> str:
+    ignore = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, linecache.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    )
+    before = before.filter_traces(ignore)
+    after = after.filter_traces(ignore)
+    out = io.StringIO()
+    out.write(
+        f"Память за {elapsed:.1f} с: отслежено {current / 1024 / 1024:.1f} МБ, пик {peak / 1024 / 1024:.1f} МБ\n"
+    )
+
+    out.write("\n=== Прирост по строкам ===\n")
+    for stat in after.compare_to(before, "lineno")[:PROFILE_TOP]:
+        out.write(f"{stat}\n")
+
+    out.write("\n=== Больше всего занято сейчас (по строкам) ===\n")
+    for stat in after.statistics("lineno")[:PROFILE_TOP]:
+        out.write(f"{stat}\n")
+
+    out.write("\n=== Самые большие приросты со стеком ===\n")
+    for stat in after.compare_to(before, "traceback")[:10]:
+        out.write(f"\n{stat.size_diff / 1024:+.1f} КБ, {stat.count_diff:+d} блоков\n")
+        for line in stat.traceback.format(limit=TRACE_FRAMES):
+            out.write(f"{line}\n")
+    return out.getvalue()
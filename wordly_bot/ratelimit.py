@@ -0,0 +1,261 @@
+import asyncio
+import functools
+import heapq
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Tuple, Union
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from .config import (
+    RATE_BURST,
+    RATE_CHAT,
+    RATE_GLOBAL,
+    RATE_GROUP_PER_MIN,
+    RATE_LIMIT,
+    RATE_MAX_RETRIES,
+)
+
+log = logging.getLogger(__name__)
+
+# Чем меньше число, тем раньше уходит запрос: ответы в игре опережают выгрузки /words и файлы
+PRIORITY_GAME = 0
+PRIORITY_BULK = 10
+
+_priority: ContextVar[int] = ContextVar("slovli_outbound_priority", default=PRIORITY_GAME)
+_sequence = itertools.count()
+
+# Корзины чатов без ожидающих запросов, успевшие наполниться, удаляются раз в SWEEP_INTERVAL секунд
+SWEEP_INTERVAL = 60.0
+
+
+@contextmanager
+def outbound_priority(priority: int):
+    """Все запросы к Telegram внутри блока идут с указанным приоритетом"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def bulk_priority(handler):
+    """Хендлер, чьи ответы могут подождать ответов в играх (выгрузки, списки слов)"""
+
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        with outbound_priority(PRIORITY_BULK):
+            return await handler(*args, **kwargs)
+
+    return wrapper
+
+
+class TokenBucket:
+    """Token bucket с очередью ожидающих по приоритету (внутри приоритета — по порядку прихода)"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._waiters: List[Tuple[int, int]] = []
+        self._changed = asyncio.Event()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _delay(self, now: float) -> float:
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def block(self, seconds: float) -> None:
+        """Telegram ответил 429: ничего не отправлять в этот чат (или вообще) seconds секунд"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+        self._notify()
+
+    def idle(self, now: float) -> bool:
+        if self._waiters or now < self.blocked_until:
+            return False
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, priority: int) -> float:
+        """Дождаться токена; возвращает время ожидания в секундах"""
+        started = time.monotonic()
+        if not self._waiters and self._delay(started) <= 0:
+            self.tokens -= 1
+            return 0.0
+
+        entry = (priority, next(_sequence))
+        heapq.heappush(self._waiters, entry)
+        # Новый запрос мог оказаться первым в очереди — разбудить текущего первого
+        self._notify()
+        try:
+            while True:
+                now = time.monotonic()
+                timeout = None
+                if self._waiters[0] == entry:
+                    timeout = self._delay(now)
+                    if timeout <= 0:
+                        heapq.heappop(self._waiters)
+                        self.tokens -= 1
+                        self._notify()
+                        return now - started
+                changed = self._changed
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            if entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._notify()
+            raise
+
+
+def _retry_seconds(error: RetryAfter) -> float:
+    value = error.retry_after
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    return float(value)
+
+
+class OutboundLimiter(BaseRateLimiter[Dict[str, Any]]):
+    """
+    Лимиты исходящих запросов к Bot API: общий token bucket на бота и свой на каждый чат
+    (личные чаты и группы с разной скоростью), очередь по приоритету и повтор после 429 с retry_after.
+    Приоритет задаётся outbound_priority() или rate_limit_args={"priority": ...}.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = RATE_GLOBAL,
+        chat_rate: float = RATE_CHAT,
+        group_per_min: float = RATE_GROUP_PER_MIN,
+        burst: int = RATE_BURST,
+        max_retries: int = RATE_MAX_RETRIES,
+    ):
+        self.global_bucket = TokenBucket(global_rate, max(1.0, global_rate))
+        self.chat_rate = chat_rate
+        self.group_rate = group_per_min / 60
+        self.burst = max(1, burst)
+        self.max_retries = max_retries
+        self._chats: Dict[Union[int, str], TokenBucket] = {}
+        self._last_sweep = time.monotonic()
+
+        self.queued = 0
+        self.queued_max = 0
+        self.sent = 0
+        self.throttled = 0
+        self.wait_total = 0.0
+        self.retries = 0
+        self.failed = 0
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    def _chat_bucket(self, chat_id: Union[int, str]) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            # Отрицательные id и @username — группы и каналы, у них лимит в минуту
+            group = isinstance(chat_id, str) or chat_id < 0
+            bucket = TokenBucket(self.group_rate if group else self.chat_rate, self.burst)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _sweep(self, now: float) -> None:
+        if now - self._last_sweep < SWEEP_INTERVAL:
+            return
+        self._last_sweep = now
+        for chat_id in [c for c, b in self._chats.items() if b.idle(now)]:
+            del self._chats[chat_id]
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Union[bool, Dict[str, Any], List[Dict[str, Any]]]]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[Dict[str, Any]],
+    ) -> Union[bool, Dict[str, Any], List[Dict[str, Any]]]:
+        priority = _priority.get()
+        if rate_limit_args and "priority" in rate_limit_args:
+            priority = rate_limit_args["priority"]
+        chat_id = data.get("chat_id")
+        self._sweep(time.monotonic())
+
+        attempt = 0
+        while True:
+            self.queued += 1
+            self.queued_max = max(self.queued_max, self.queued)
+            try:
+                waited = 0.0
+                if chat_id is not None:
+                    waited += await self._chat_bucket(chat_id).acquire(priority)
+                waited += await self.global_bucket.acquire(priority)
+            finally:
+                self.queued -= 1
+            if waited > 0:
+                self.throttled += 1
+                self.wait_total += waited
+
+            try:
+                result = await callback(*args, **kwargs)
+            except RetryAfter as e:
+                delay = _retry_seconds(e)
+                bucket = self._chat_bucket(chat_id) if chat_id is not None else self.global_bucket
+                bucket.block(delay)
+                if attempt >= self.max_retries:
+                    self.failed += 1
+                    log.error("429 после %d повторов, сдаёмся", attempt, extra={"method": endpoint, "chat_id": chat_id})
+                    raise
+                attempt += 1
+                self.retries += 1
+                log.warning("429, повтор через %.0f с", delay, extra={"method": endpoint, "chat_id": chat_id})
+                continue
+            self.sent += 1
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queued,
+            "queued_max": self.queued_max,
+            "sent": self.sent,
+            "throttled": self.throttled,
+            "wait_ms_avg": self.wait_total / self.throttled * 1000 if self.throttled else 0.0,
+            "retries": self.retries,
+            "failed": self.failed,
+            "chats": len(self._chats),
+        }
+
+
+def build_rate_limiter(processes: int = 1) -> Optional[OutboundLimiter]:
+    """None — запросы уходят без ограничений, как раньше. В кластере общий лимит делится между воркерами"""
+    if not RATE_LIMIT:
+        return None
+    return OutboundLimiter(global_rate=RATE_GLOBAL / max(1, processes))
@@ -0,0 +1,198 @@
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from .config import RECORD_DIR, RECORD_KEEP, RECORD_MAX_MB, RECORD_SALT, WORD_LENGTHS
+from .tenants import DEFAULT_TENANT, current_tenant
+
+log = logging.getLogger(__name__)
+
+# Журнал обновлений для воспроизведения нагрузки (replay.py).
+# Одна строка gzip JSONL на текстовое сообщение:
+#   {"t": 1700000000.123, "id": 42, "chat": -100, "type": "group", "user": 7, "name": "u-1a2b3c", "text": "слово"}
+# Ходы (сообщение из одного слова кириллицей допустимой длины, не считая пробелов и знаков препинания)
+# и команды сохраняются как есть,
+# остальной текст и имена заменяются HMAC с солью: поведение бота при повторе то же, а переписки нет.
+
+RECORD_PREFIX = "updates-"
+_GUESS_TOKEN = re.compile(r"[А-ЯЁа-яё]+")
+_PUNCTUATION = re.compile(r"[\W_]+")
+_SAFE_ARG = re.compile(r"[А-ЯЁа-яё]+|-?\d+|[a-z]+")
+_FLUSH_INTERVAL = 1.0
+
+
+def anonymize_text(text: str, salt: bytes) -> str:
+    """Оставить только то, что влияет на ответ бота; всё остальное — хэш"""
+    if text.startswith("/"):
+        command, *args = text.split()
+        safe = [a if _SAFE_ARG.fullmatch(a) else _digest(a, salt) for a in args]
+        return " ".join([command, *safe])
+    # Ходом может быть только одно слово игровой длины; "привет", имя или "Москва123" — уже переписка
+    tokens = _GUESS_TOKEN.findall(text)
+    if len(tokens) == 1 and len(tokens[0]) in WORD_LENGTHS and _PUNCTUATION.sub("", text) == tokens[0]:
+        return tokens[0]
+    # Остальное on_text не примет за ход, и хэш при повторе ведёт себя так же
+    return _digest(text, salt)
+
+
+def _digest(value: str, salt: bytes) -> str:
+    return "#" + hmac.new(salt, value.encode("utf-8"), hashlib.sha256).hexdigest()[:16]
+
+
+def compact_update(update: Update, salt: bytes, received: float) -> Optional[Dict[str, Any]]:
+    message = update.message or update.edited_message
+    if message is None or message.text is None or update.effective_chat is None:
+        return None
+    user = update.effective_user
+    record: Dict[str, Any] = {
+        "t": round(received, 3),
+        "id": update.update_id,
+        "chat": update.effective_chat.id,
+        "type": update.effective_chat.type,
+        "user": user.id if user else 0,
+        "name": "u-" + _digest(str(user.id) if user else "", salt)[1:7],
+        "text": anonymize_text(message.text, salt),
+    }
+    tenant = current_tenant()
+    if tenant is not DEFAULT_TENANT:
+        record["bot"] = tenant.name
+    return record
+
+
+class UpdateRecorder:
+    """
+    Пишет обновления в gzip JSONL с ротацией по размеру. Хендлер только кладёт запись в очередь,
+    сжатие и запись на диск — в отдельном потоке.
+    """
+
+    def __init__(
+        self,
+        directory: str = RECORD_DIR,
+        max_bytes: int = int(RECORD_MAX_MB * 1024 * 1024),
+        keep: int = RECORD_KEEP,
+        salt: str = RECORD_SALT,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.salt = salt.encode("utf-8") if salt else secrets.token_bytes(16)
+        self.recorded = 0
+        self._files = 0
+        self._queue: "queue.SimpleQueue[Optional[Dict[str, Any]]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    async def record(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        if self._thread is None:
+            return
+        record = compact_update(update, self.salt, time.time())
+        if record is not None:
+            self._queue.put(record)
+
+    def start(self) -> None:
+        if not self.enabled or self._thread is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._writer, name="slovli-recorder", daemon=True)
+        self._thread.start()
+        log.info("Запись обновлений в %s", self.directory)
+
+    def stop(self) -> None:
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(5)
+
+    def _open(self):
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self._files += 1
+        name = f"{RECORD_PREFIX}{stamp}-{os.getpid()}-{self._files:04d}.jsonl.gz"
+        path = os.path.join(self.directory, name)
+        self._rotate()
+        return gzip.open(path, "wt", encoding="utf-8", compresslevel=6), path
+
+    def _rotate(self) -> None:
+        files = list_records(self.directory)
+        for path in files[: max(0, len(files) - self.keep + 1)]:
+            try:
+                os.remove(path)
+            except OSError as e:
+                log.warning("Не удалось удалить %s: %s", path, e)
+
+    def _writer(self) -> None:
+        out, path = self._open()
+        written = 0
+        dirty = False
+        last_flush = time.monotonic()
+        try:
+            while True:
+                try:
+                    record = self._queue.get(timeout=_FLUSH_INTERVAL)
+                except queue.Empty:
+                    # Тишина: дописать сжатый хвост, чтобы файл можно было читать, не останавливая бота
+                    if dirty:
+                        out.flush()
+                        dirty = False
+                    last_flush = time.monotonic()
+                    continue
+                if record is None:
+                    return
+                line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+                out.write(line)
+                written += len(line)
+                dirty = True
+                self.recorded += 1
+                if written >= self.max_bytes:
+                    out.close()
+                    out, path = self._open()
+                    written = 0
+                    dirty = False
+                elif time.monotonic() - last_flush >= _FLUSH_INTERVAL:
+                    out.flush()
+                    dirty = False
+                    last_flush = time.monotonic()
+        except OSError as e:
+            log.error("Ошибка записи %s: %s, запись остановлена", path, e)
+        finally:
+            out.close()
+
+
+def list_records(directory: str) -> List[str]:
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.startswith(RECORD_PREFIX) and name.endswith(".jsonl.gz")
+    )
+
+
+def read_records(paths: List[str]) -> Iterator[Dict[str, Any]]:
+    """Записи из файлов по порядку; оборванный хвост файла (процесс упал) пропускается"""
+    for path in paths:
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        except (EOFError, gzip.BadGzipFile, json.JSONDecodeError) as e:
+            log.warning("%s: файл оборван (%s), читаю дальше", path, e)
+
+
+RECORDER = UpdateRecorder()
@@ -1,21 +1,73 @@
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
 from io import BytesIO
+import importlib.util
+import logging
 import os
-from typing import List, Optional, Tuple
+import threading
+import time
+from typing import Dict, Hashable, List, Optional, Tuple
 
-from telegram import Update
+from telegram import Bot, InputMediaPhoto, Message, MessageEntity, Update
+from telegram.error import BadRequest
 
-from .config import ATTEMPTS, WORD_LEN
+from .config import (
+    ATTEMPTS,
+    RENDER_CANVAS_CACHE_MB,
+    RENDER_FORMAT,
+    RENDER_PNG_LEVEL,
+    RENDER_MAX_PENDING,
+    RENDER_POOL_KIND,
+    RENDER_TILE,
+    RENDER_WORKERS,
+    WORD_LEN,
+)
+from .emoji_board import build_emoji_board, custom_emoji_enabled, disable_custom_emoji
+from .game import format_history
+from .metrics import RENDER_DRAW_SECONDS, RENDER_ENCODE_SECONDS, RENDER_ERRORS, RENDER_WAIT_SECONDS
+from .tenants import tenant_key
 
-try:
-    from PIL import Image, ImageDraw, ImageFont  # type: ignore
-except Exception:  # noqa: BLE001
-    Image = None  # type: ignore
-    ImageDraw = None  # type: ignore
-    ImageFont = None  # type: ignore
+log = logging.getLogger(__name__)
 
+# Pillow импортируется при первой отрисовке (в потоке или процессе пула), а не при импорте модуля
+Image = None  # type: ignore
+ImageDraw = None  # type: ignore
+ImageFont = None  # type: ignore
+_pillow_lock = threading.Lock()
+_pillow_failed = False
 
+
+@lru_cache(maxsize=1)
+def pillow_installed() -> bool:
+    """Есть ли Pillow — без импорта самого пакета"""
+    return importlib.util.find_spec("PIL") is not None
+
+
+def load_pillow() -> bool:
+    global Image, ImageDraw, ImageFont, _pillow_failed
+    if Image is not None:
+        return True
+    if _pillow_failed or not pillow_installed():
+        return False
+    with _pillow_lock:
+        if Image is None and not _pillow_failed:
+            try:
+                from PIL import Image as _Image, ImageDraw as _ImageDraw, ImageFont as _ImageFont  # type: ignore
+            except Exception as e:  # noqa: BLE001
+                _pillow_failed = True
+                log.warning("Pillow не импортируется, доска будет текстом: %s", e)
+                return False
+            ImageDraw, ImageFont = _ImageDraw, _ImageFont
+            Image = _Image
+    return Image is not None
+
+
+@lru_cache(maxsize=None)
 def _load_cyrillic_font(pixel_size: int):
-    if ImageFont is None:
+    if not load_pillow():
         return None
     candidates: List[str] = [
         "DejaVuSans-Bold.ttf",
@@ -52,70 +104,513 @@ def _load_cyrillic_font(pixel_size: int):
     return ImageFont.load_default()
 
 
-def render_attempts_image(attempts: List[Tuple[str, List[str]]], word_length: int = 5) -> Optional[bytes]:
-    if Image is None:
-        return None
+def board_geometry(tile: int) -> Tuple[int, int]:
+    """Промежуток между плитками и поля доски для заданного размера плитки"""
+    return max(1, tile // 8), tile // 4
+
+
+TILE = RENDER_TILE
+GAP, PADDING = board_geometry(TILE)
+MIN_TILE, MAX_TILE = 32, 120
+
+# Форматы картинки: обычный PNG, PNG с палитрой (1 байт на пиксель) и WebP без потерь
+FORMATS = ("png", "palette", "webp")
+# Виды доски: картинка в одном из форматов или текст (кастомные эмодзи / цветные квадраты)
+BOARD_FORMATS = FORMATS + ("emoji", "text")
+DEFAULT_IMAGE_FORMAT = RENDER_FORMAT if RENDER_FORMAT in FORMATS else "png"
+FORMAT_EXTENSIONS = {"png": "png", "palette": "png", "webp": "webp"}
+
+COLORS = {
+    "correct": (106, 170, 100),
+    "present": (201, 180, 88),
+    "absent": (120, 124, 126),
+    "empty": (211, 214, 218),
+}
+BORDER_COLOR = (120, 124, 126)
+TEXT_COLOR = (255, 255, 255)
+BACKGROUND_COLOR = (255, 255, 255)
+ALPHABET = "АБВГДЕЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ"
+ANTIALIAS_STEPS = 16
 
-    tile, gap, padding = 80, 10, 20
-    rows, cols = ATTEMPTS, word_length
+# Готовые плитки: (размер, режим, буква, отметка) -> картинка; пустая плитка — буква ""
+_tile_cache: Dict[Tuple[int, str, str, str], "Image.Image"] = {}
+# Пустые доски: (размер плитки, режим, длина слова) -> картинка
+_board_cache: Dict[Tuple[int, str, int], "Image.Image"] = {}
 
-    width = padding * 2 + cols * tile + (cols - 1) * gap
-    height = padding * 2 + rows * tile + (rows - 1) * gap
 
-    img = Image.new("RGB", (width, height), (255, 255, 255))
+@lru_cache(maxsize=1)
+def _palette_image():
+    """
+    Общая палитра для режима "P": фон, рамка и цвета плиток плюс переходы
+    от цвета плитки к белому для сглаженных краёв букв
+    """
+    colors = [BACKGROUND_COLOR, BORDER_COLOR, TEXT_COLOR]
+    for fill in COLORS.values():
+        for step in range(ANTIALIAS_STEPS):
+            t = step / (ANTIALIAS_STEPS - 1)
+            colors.append(tuple(round(f + (w - f) * t) for f, w in zip(fill, TEXT_COLOR)))
+    flat = [v for color in colors for v in color]
+    pal = Image.new("P", (1, 1))
+    pal.putpalette(flat + [0] * (768 - len(flat)))
+    return pal
+
+
+def _to_mode(img, mode: str):
+    if mode == "P":
+        return img.quantize(palette=_palette_image(), dither=Image.Dither.NONE)
+    return img
+
+
+def _image_mode(fmt: str) -> str:
+    return "P" if fmt == "palette" else "RGB"
+
+
+def _draw_tile(tile: int, ch: str, mark: str):
+    # Прямоугольник рисуется включительно, поэтому плитка на пиксель больше tile
+    img = Image.new("RGB", (tile + 1, tile + 1), COLORS[mark])
     draw = ImageDraw.Draw(img)
+    draw.rectangle([0, 0, tile, tile], outline=BORDER_COLOR, width=max(1, tile // 40))
+    if ch:
+        font = _load_cyrillic_font(int(tile * 0.5))
+        try:
+            bbox = draw.textbbox((0, 0), ch, font=font)
+            tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
+        except Exception:  # noqa: BLE001
+            tw, th = draw.textsize(ch, font=font)  # type: ignore[attr-defined]
+        draw.text(
+            ((tile - tw) // 2, (tile - th) // 2 - max(1, tile // 40)), ch, font=font, fill=TEXT_COLOR
+        )
+    return img
 
-    colors = {
-        "correct": (106, 170, 100),
-        "present": (201, 180, 88),
-        "absent": (120, 124, 126),
-        "empty": (211, 214, 218),
-    }
-    border_color = (120, 124, 126)
-    text_color = (255, 255, 255)
-    font = _load_cyrillic_font(int(tile * 0.5))
-
-    for r in range(rows):
-        for c in range(cols):
-            x0 = padding + c * (tile + gap)
-            y0 = padding + r * (tile + gap)
-            x1, y1 = x0 + tile, y0 + tile
 
-            if r < len(attempts):
-                guess, marks = attempts[r]
-                ch = guess[c]
-                fill = colors.get(marks[c], colors["absent"])
-            else:
-                ch = ""
-                fill = colors["empty"]
+def _tile_sprite(tile: int, ch: str, mark: str, mode: str = "RGB"):
+    if mark not in COLORS or (ch and mark == "empty"):
+        mark = "absent"
+    key = (tile, mode, ch, mark)
+    sprite = _tile_cache.get(key)
+    if sprite is None:
+        sprite = _tile_cache.setdefault(key, _to_mode(_draw_tile(tile, ch, mark), mode))
+    return sprite
 
-            draw.rectangle([x0, y0, x1, y1], fill=fill)
-            draw.rectangle([x0, y0, x1, y1], outline=border_color, width=2)
 
-            if ch:
-                try:
-                    bbox = draw.textbbox((0, 0), ch, font=font)
-                    tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
-                except Exception:  # noqa: BLE001
-                    tw, th = draw.textsize(ch, font=font)  # type: ignore[attr-defined]
-                draw.text((x0 + (tile - tw) // 2, y0 + (tile - th) // 2 - 2), ch, font=font, fill=text_color)
+def _empty_board(tile: int, word_length: int, mode: str = "RGB"):
+    key = (tile, mode, word_length)
+    board = _board_cache.get(key)
+    if board is None:
+        gap, padding = board_geometry(tile)
+        rows, cols = ATTEMPTS, word_length
+        width = padding * 2 + cols * tile + (cols - 1) * gap
+        height = padding * 2 + rows * tile + (rows - 1) * gap
+        board = _to_mode(Image.new("RGB", (width, height), BACKGROUND_COLOR), mode)
+        empty = _tile_sprite(tile, "", "empty", mode)
+        for r in range(rows):
+            for c in range(cols):
+                board.paste(empty, (padding + c * (tile + gap), padding + r * (tile + gap)))
+        board = _board_cache.setdefault(key, board)
+    return board
 
+
+def warm_tile_cache(tile: int = TILE, fmt: str = DEFAULT_IMAGE_FORMAT) -> int:
+    """Заранее отрисовать все плитки (буква × отметка и пустую). Возвращает размер кэша"""
+    if not load_pillow():
+        return 0
+    mode = _image_mode(fmt)
+    _tile_sprite(tile, "", "empty", mode)
+    for ch in ALPHABET:
+        for mark in ("correct", "present", "absent"):
+            _tile_sprite(tile, ch, mark, mode)
+    return len(_tile_cache)
+
+
+class CanvasCache:
+    """
+    LRU уже нарисованных досок активных игр: ключ чата -> (холст, размер плитки, режим, длина слова, строки).
+    На очередной ход дорисовывается только новая строка. Ограничен по памяти.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _size(entry: tuple) -> int:
+        img = entry[0]
+        return img.width * img.height * len(img.getbands())
+
+    def take(self, chat_id: Hashable) -> Optional[tuple]:
+        """Забрать холст из кэша; пока он у рендера, параллельный рендер того же чата начнёт с нуля"""
+        with self._lock:
+            entry = self._items.pop(chat_id, None)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._bytes -= self._size(entry)
+            self.hits += 1
+            return entry
+
+    def put(self, chat_id: Hashable, entry: tuple) -> None:
+        size = self._size(entry)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(chat_id, None)
+            if old is not None:
+                self._bytes -= self._size(old)
+            self._items[chat_id] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= self._size(evicted)
+                self.evictions += 1
+
+    def drop(self, chat_id: Hashable) -> None:
+        with self._lock:
+            entry = self._items.pop(chat_id, None)
+            if entry is not None:
+                self._bytes -= self._size(entry)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._items),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+CANVAS_CACHE = CanvasCache(int(RENDER_CANVAS_CACHE_MB * 1024 * 1024))
+
+
+def drop_board_canvas(chat_id: int) -> None:
+    """Забыть холст игры чата (вызывается при завершении игры)"""
+    CANVAS_CACHE.drop(tenant_key(chat_id))
+
+
+def _paint_rows(img, tile: int, word_length: int, rows, start: int) -> None:
+    gap, padding = board_geometry(tile)
+    for r in range(start, len(rows)):
+        guess, marks = rows[r]
+        y0 = padding + r * (tile + gap)
+        for c in range(word_length):
+            x0 = padding + c * (tile + gap)
+            img.paste(_tile_sprite(tile, guess[c], marks[c], img.mode), (x0, y0))
+
+
+def encode_image(img, fmt: str) -> bytes:
     bio = BytesIO()
-    img.save(bio, format="PNG")
+    if fmt == "webp":
+        img.save(bio, format="WEBP", lossless=True)
+    else:
+        img.save(bio, format="PNG", compress_level=RENDER_PNG_LEVEL)
     return bio.getvalue()
 
 
-async def reply_with_grid_image(update: Update, attempts: List[Tuple[str, List[str]]], word_length: int = 5):
-    img_bytes = render_attempts_image(attempts, word_length)
-    if not img_bytes:
-        return
+def _draw_attempts(
+    attempts: List[Tuple[str, List[str]]],
+    word_length: int,
+    chat_id: Optional[int],
+    fmt: str,
+    tile: Optional[int],
+):
+    tile = tile or TILE
+    mode = _image_mode(fmt)
+    rows = tuple((guess, tuple(marks)) for guess, marks in attempts[:ATTEMPTS])
+
+    entry = CANVAS_CACHE.take(chat_id) if chat_id is not None else None
+    if entry is not None:
+        img, cached_tile, cached_mode, cached_length, drawn = entry
+        # Холст годится, только если на нём нарисовано начало той же партии в том же виде
+        if (
+            (cached_tile, cached_mode, cached_length) != (tile, mode, word_length)
+            or rows[: len(drawn)] != drawn
+        ):
+            entry = None
+
+    if entry is None:
+        # Доска собирается из готовых плиток: шрифт и текст рисуются один раз на плитку
+        img = _empty_board(tile, word_length, mode).copy()
+        _paint_rows(img, tile, word_length, rows, 0)
+    else:
+        _paint_rows(img, tile, word_length, rows, len(drawn))
+
+    if chat_id is not None:
+        CANVAS_CACHE.put(chat_id, (img, tile, mode, word_length, rows))
+    return img
+
+
+def render_attempts_image(
+    attempts: List[Tuple[str, List[str]]],
+    word_length: int = 5,
+    chat_id: Optional[int] = None,
+    fmt: Optional[str] = None,
+    tile: Optional[int] = None,
+) -> Optional[bytes]:
+    if not load_pillow():
+        return None
+    fmt = fmt if fmt in FORMATS else DEFAULT_IMAGE_FORMAT
+    return encode_image(_draw_attempts(attempts, word_length, chat_id, fmt, tile), fmt)
+
+
+def _render_timed(
+    attempts: List[Tuple[str, List[str]]],
+    word_length: int,
+    chat_id: Optional[int],
+    fmt: str,
+    tile: Optional[int],
+) -> Tuple[Optional[bytes], float, float]:
+    """Отрисовка и кодирование с раздельными замерами (в процессе пула метрики не видны — время возвращается)"""
+    if not load_pillow():
+        return None, 0.0, 0.0
+    started = time.perf_counter()
+    img = _draw_attempts(attempts, word_length, chat_id, fmt, tile)
+    drawn = time.perf_counter()
+    img_bytes = encode_image(img, fmt)
+    return img_bytes, drawn - started, time.perf_counter() - drawn
+
+
+class RenderPool:
+    """
+    Пул потоков или процессов для отрисовки и PNG-кодирования вне event loop.
+    Число заданий в работе ограничено: при переполнении render() сразу возвращает None.
+    """
+
+    def __init__(
+        self,
+        kind: str = RENDER_POOL_KIND,
+        workers: int = RENDER_WORKERS,
+        max_pending: int = RENDER_MAX_PENDING,
+    ):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Неизвестный тип пула рендера: {kind}")
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[Executor] = None
+        # Счётчики меняются только из event loop, блокировки не нужны
+        self.pending = 0
+        self.max_seen_pending = 0
+        self.rendered = 0
+        self.rejected = 0
+        self.errors = 0
+        self.render_seconds = 0.0
+        self.wait_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                # Холсты игр в процессах не разделяются, но сверка строк сохраняет корректность
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="slovli-render")
+        return self._executor
+
+    async def render(
+        self,
+        attempts: List[Tuple[str, List[str]]],
+        word_length: int = 5,
+        chat_id: Optional[int] = None,
+        fmt: Optional[str] = None,
+        tile: Optional[int] = None,
+    ) -> Optional[bytes]:
+        if not pillow_installed():
+            return None
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            return None
+
+        fmt = fmt if fmt in FORMATS else DEFAULT_IMAGE_FORMAT
+        self.pending += 1
+        self.max_seen_pending = max(self.max_seen_pending, self.pending)
+        started = time.perf_counter()
+        executor = self._get_executor()
+        try:
+            loop = asyncio.get_running_loop()
+            img_bytes, draw_seconds, encode_seconds = await loop.run_in_executor(
+                executor, _render_timed, attempts, word_length, chat_id, fmt, tile
+            )
+        except Exception as e:  # noqa: BLE001
+            # Как и при перегрузке — доска уйдёт текстом, а не пропадёт вместе с ответом
+            self.errors += 1
+            RENDER_ERRORS.inc(type(e).__name__)
+            if isinstance(e, BrokenProcessPool):
+                # Процесс пула упал (например, после fork из многопоточного процесса) — следующий вызов создаст новый пул
+                log.error("Пул отрисовки сломан, пересоздаю: %s", e)
+                self._reset_executor(executor)
+            else:
+                log.exception("Ошибка отрисовки доски", extra={"chat_id": chat_id})
+            return None
+        finally:
+            self.pending -= 1
+        elapsed = draw_seconds + encode_seconds
+        waited = time.perf_counter() - started - elapsed
+        self.rendered += 1
+        self.render_seconds += elapsed
+        self.wait_seconds += waited
+        RENDER_DRAW_SECONDS.observe(draw_seconds, fmt)
+        RENDER_ENCODE_SECONDS.observe(encode_seconds, fmt)
+        RENDER_WAIT_SECONDS.observe(waited)
+        return img_bytes
+
+    def stats(self) -> dict:
+        done = self.rendered or 1
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "queue_depth": self.pending,
+            "queue_depth_max": self.max_seen_pending,
+            "max_pending": self.max_pending,
+            "rendered": self.rendered,
+            "degraded": self.rejected,
+            "errors": self.errors,
+            "render_ms_avg": 1000 * self.render_seconds / done,
+            "wait_ms_avg": 1000 * self.wait_seconds / done,
+        }
+
+    def _reset_executor(self, broken: Executor) -> None:
+        # Несколько заданий падают на одном пуле разом — пересоздаём его только один раз
+        if self._executor is broken:
+            self._executor = None
+            broken.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+RENDER_POOL = RenderPool()
+
+
+# Telegram ограничивает подпись к фото 1024 символами
+CAPTION_LIMIT = 1024
+
+
+def _photo_file(img_bytes: bytes, fmt: Optional[str]) -> BytesIO:
     bio = BytesIO(img_bytes)
     try:
-        bio.name = "grid.png"  # type: ignore[attr-defined]
+        bio.name = f"grid.{FORMAT_EXTENSIONS.get(fmt or DEFAULT_IMAGE_FORMAT, 'png')}"  # type: ignore[attr-defined]
     except Exception:  # noqa: BLE001
         pass
     bio.seek(0)
-    await update.message.reply_photo(photo=bio)
+    return bio
+
+
+def _with_caption(
+    text: str, entities: Optional[List[MessageEntity]], caption: str
+) -> Tuple[str, Optional[List[MessageEntity]]]:
+    # Подпись идёт после доски, поэтому смещения сущностей доски не меняются
+    if not caption:
+        return text, entities
+    if not text:
+        return caption, None
+    return f"{text}\n\n{caption}", entities
+
 
+async def _build_board(
+    attempts: List[Tuple[str, List[str]]],
+    word_length: int,
+    canvas_key: Optional[int],
+    fmt: Optional[str],
+    tile: Optional[int],
+) -> Tuple[Optional[bytes], str, Optional[List[MessageEntity]]]:
+    """Содержимое доски: (картинка, None, None) или (None, текст, сущности custom_emoji)"""
+    fmt = fmt if fmt in BOARD_FORMATS else RENDER_FORMAT
+    if fmt in FORMATS:
+        img_bytes = await RENDER_POOL.render(attempts, word_length, tenant_key(canvas_key), fmt, tile)
+        if img_bytes:
+            return img_bytes, "", None
+    elif fmt == "emoji" and custom_emoji_enabled():
+        board = build_emoji_board(attempts)
+        if board is not None:
+            return None, board[0], board[1]
+    # Pillow нет, пул перегружен или эмодзи недоступны — цветные квадраты
+    return None, format_history(attempts), None
+
+
+async def send_board(
+    message: Message,
+    attempts: List[Tuple[str, List[str]]],
+    word_length: int = 5,
+    chat_id: Optional[int] = None,
+    fmt: Optional[str] = None,
+    tile: Optional[int] = None,
+    caption: str = "",
+) -> Message:
+    """Ответить доской с подписью одним сообщением: фото или текст"""
+    img_bytes, text, entities = await _build_board(attempts, word_length, chat_id, fmt, tile)
+    if img_bytes:
+        if len(caption) <= CAPTION_LIMIT:
+            return await message.reply_photo(photo=_photo_file(img_bytes, fmt), caption=caption or None)
+        # Подпись не влезает в фото — отдельным сообщением после доски
+        sent = await message.reply_photo(photo=_photo_file(img_bytes, fmt))
+        await message.reply_text(caption)
+        return sent
+    text, entities = _with_caption(text, entities, caption)
+    try:
+        return await message.reply_text(text, entities=entities)
+    except BadRequest as e:
+        if not entities:
+            raise
+        disable_custom_emoji(e)
+        return await message.reply_text(_with_caption(format_history(attempts), None, caption)[0])
+
+
+async def edit_board(
+    bot: Bot,
+    chat_id: int,
+    message_id: int,
+    attempts: List[Tuple[str, List[str]]],
+    word_length: int = 5,
+    fmt: Optional[str] = None,
+    tile: Optional[int] = None,
+    caption: str = "",
+    keep_canvas: bool = True,
+) -> bool:
+    """Обновить ранее отправленное сообщение с доской. False — сообщение нужно отправить заново"""
+    fmt = fmt if fmt in BOARD_FORMATS else RENDER_FORMAT
+    img_bytes, text, entities = await _build_board(
+        attempts, word_length, chat_id if keep_canvas else None, fmt, tile
+    )
+    try:
+        if img_bytes:
+            await bot.edit_message_media(
+                media=InputMediaPhoto(media=_photo_file(img_bytes, fmt), caption=caption or None),
+                chat_id=chat_id,
+                message_id=message_id,
+            )
+        elif fmt in FORMATS:
+            # Сообщение с доской — фото, а картинку сейчас не нарисовать: доска уходит в подпись
+            text, entities = _with_caption(text, entities, caption)
+            await bot.edit_message_caption(
+                chat_id=chat_id, message_id=message_id, caption=text, caption_entities=entities
+            )
+        else:
+            text, entities = _with_caption(text, entities, caption)
+            await bot.edit_message_text(text, chat_id=chat_id, message_id=message_id, entities=entities)
+        return True
+    except BadRequest as e:
+        if "not modified" in str(e).lower():
+            return True
+        log.warning("Не удалось обновить доску: %s", e, extra={"chat_id": chat_id})
+        return False
 
 
+async def reply_with_board(
+    update: Update,
+    attempts: List[Tuple[str, List[str]]],
+    word_length: int = 5,
+    chat_id: Optional[int] = None,
+    fmt: Optional[str] = None,
+    tile: Optional[int] = None,
+    caption: str = "",
+) -> Message:
+    """Отправить доску в выбранном виде: картинкой, кастомными эмодзи или квадратами"""
+    return await send_board(update.message, attempts, word_length, chat_id, fmt, tile, caption)
@@ -0,0 +1,87 @@
+import json
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Hashable, List, Optional
+
+from .config import ADMIN_USER_ID, BACKUP_DIR, DB_FILE, EXPORT_DIR, TOKEN
+
+
+@dataclass(frozen=True)
+class Tenant:
+    """Отдельный бот в общем процессе: свой токен, своя база и свой администратор"""
+
+    name: str
+    token: str
+    db_file: str
+    admin_user_id: int = 0
+    backup_dir: str = ""
+    export_dir: str = ""
+
+
+# Однобот: всё как раньше, настройки из переменных окружения
+DEFAULT_TENANT = Tenant("default", TOKEN or "", DB_FILE, ADMIN_USER_ID, BACKUP_DIR, EXPORT_DIR)
+
+_current: ContextVar[Tenant] = ContextVar("slovli_tenant", default=DEFAULT_TENANT)
+
+
+def current_tenant() -> Tenant:
+    """Бот, чьё обновление сейчас обрабатывается (в потоках без контекста — бот по умолчанию)"""
+    return _current.get()
+
+
+@contextmanager
+def use_tenant(tenant: Tenant):
+    token = _current.set(tenant)
+    try:
+        yield tenant
+    finally:
+        _current.reset(token)
+
+
+def tenant_key(chat_id: Optional[int]) -> Optional[Hashable]:
+    """Ключ чата для общих кэшей: один и тот же чат может быть у нескольких ботов"""
+    if chat_id is None:
+        return None
+    tenant = _current.get()
+    if tenant is DEFAULT_TENANT:
+        return chat_id
+    return (tenant.name, chat_id)
+
+
+def load_tenants(path: str) -> List[Tenant]:
+    """
+    Прочитать список ботов из JSON:
+    [{"name": "main", "token_env": "MAIN_TOKEN", "db_file": "data/main.db", "admin_user_id": 123}, ...]
+    Токен задаётся прямо ("token") или именем переменной окружения ("token_env").
+    """
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    tenants: List[Tenant] = []
+    for item in raw:
+        name = str(item["name"])
+        if name == DEFAULT_TENANT.name:
+            # Под этим именем живёт бот без списка: с ним совпали бы рейтинг и кэши другого бота
+            raise RuntimeError(f"Имя бота «{name}» зарезервировано, выберите другое")
+        token = item.get("token") or os.getenv(item.get("token_env", ""), "")
+        if not token:
+            raise RuntimeError(f"Не задан токен бота {name}")
+        db_file = item.get("db_file") or os.path.join(os.path.dirname(DB_FILE) or ".", f"{name}.db")
+        base = os.path.dirname(db_file) or "."
+        tenants.append(
+            Tenant(
+                name=name,
+                token=token,
+                db_file=db_file,
+                admin_user_id=int(item.get("admin_user_id", 0)),
+                backup_dir=item.get("backup_dir") or os.path.join(base, "backups", name),
+                export_dir=item.get("export_dir") or os.path.join(base, "exports", name),
+            )
+        )
+    names = [t.name for t in tenants]
+    if len(set(names)) != len(names):
+        raise RuntimeError("Имена ботов в списке должны быть уникальными")
+    if len({t.db_file for t in tenants}) != len(tenants):
+        raise RuntimeError("У каждого бота должна быть своя база")
+    return tenants
@@ -0,0 +1,165 @@
+import asyncio
+import functools
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from .config import LOOP_LAG_INTERVAL, LOOP_LAG_STACK_DEPTH, LOOP_LAG_THRESHOLD, LOOP_LAG_WINDOW, LOOP_WATCHDOG
+from .metrics import REGISTRY, _format_value
+
+log = logging.getLogger(__name__)
+
+# Сторож event loop: находит синхронные вызовы, которые держат loop (sqlite, Pillow, запись файлов).
+# Задача в loop каждые LOOP_LAG_INTERVAL секунд проверяет, на сколько опоздал её таймер, — это задержка loop.
+# Поток-наблюдатель смотрит на метку последнего такта: если loop молчит дольше порога,
+# он снимает стек потока loop прямо во время блокировки и печатает его вместе с хендлером и чатом.
+
+LOOP_LAG_SECONDS = REGISTRY.histogram(
+    "slovli_loop_lag_seconds",
+    "Задержка event loop (опоздание таймера)",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+LOOP_STALLS = REGISTRY.counter("slovli_loop_stalls_total", "Блокировки event loop дольше порога", ("handler",))
+
+
+class LoopWatchdog:
+    def __init__(
+        self,
+        interval: float = LOOP_LAG_INTERVAL,
+        threshold: float = LOOP_LAG_THRESHOLD,
+        window: int = LOOP_LAG_WINDOW,
+        enabled: bool = LOOP_WATCHDOG,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.enabled = enabled
+        self.lags: Deque[float] = deque(maxlen=window)
+        self.stalls = 0
+        self.last_stall: Optional[Dict[str, object]] = None
+        # Какой хендлер и чат сейчас выполняет задача loop — заполняет watch_handler
+        self.running: Dict[asyncio.Task, Tuple[str, Optional[int]]] = {}
+        self._heartbeat = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread = 0
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        if not self.enabled or self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = self._loop.create_task(self._ticker(), name="slovli-loop-watchdog")
+        self._thread = threading.Thread(target=self._observer, name="slovli-loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        self._stop.set()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        if self._thread is not None:
+            await asyncio.to_thread(self._thread.join, 1)
+            self._thread = None
+
+    async def _ticker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self._heartbeat = time.monotonic()
+            self.lags.append(lag)
+            LOOP_LAG_SECONDS.observe(lag)
+
+    def _observer(self) -> None:
+        reported = 0.0  # метка такта, на котором уже напечатан стек: одна блокировка — один отчёт
+        while not self._stop.wait(self.interval / 2):
+            beat = self._heartbeat
+            if beat == reported:
+                continue
+            silent = time.monotonic() - beat - self.interval
+            if silent < self.threshold:
+                continue
+            reported = beat
+            self._report(silent)
+
+    def _report(self, silent: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return
+        stack = traceback.format_stack(frame)[-LOOP_LAG_STACK_DEPTH:]
+        # Задача, которая сейчас на loop, и есть та, что его держит
+        task = asyncio.current_task(self._loop) if self._loop is not None else None
+        handler, chat_id = self.running.get(task, ("-", None)) if task is not None else ("-", None)
+        self.stalls += 1
+        LOOP_STALLS.inc(handler)
+        self.last_stall = {
+            "at": time.time(),
+            "seconds": silent,
+            "handler": handler,
+            "chat_id": chat_id,
+            "stack": stack,
+        }
+        log.warning(
+            "event loop занят уже %.0f мс",
+            silent * 1000,
+            extra={
+                "handler": handler,
+                "chat_id": chat_id,
+                "task": task.get_name() if task is not None else None,
+                "stack": "".join(stack).rstrip(),
+            },
+        )
+
+    def percentiles(self) -> Dict[str, float]:
+        lags = sorted(self.lags)
+        if not lags:
+            return {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+        pick = lambda q: lags[min(len(lags) - 1, int(len(lags) * q))]  # noqa: E731
+        return {"p50": pick(0.5), "p90": pick(0.9), "p99": pick(0.99), "max": lags[-1]}
+
+    def collect(self):
+        """Процентили за последнее окно — гистограмма /metrics копится с запуска и сглаживает всплески"""
+        if not self.enabled:
+            return []
+        name = "slovli_loop_lag_window_seconds"
+        stats = self.percentiles()
+        lines = [f"# HELP {name} Задержка event loop за последние {self.lags.maxlen} тактов", f"# TYPE {name} gauge"]
+        for quantile, key in (("0.5", "p50"), ("0.9", "p90"), ("0.99", "p99"), ("1", "max")):
+            lines.append(f'{name}{{quantile="{quantile}"}} {_format_value(stats[key])}')
+        return lines
+
+
+def watch_handler(name: str, handler):
+    """Запомнить хендлер и чат задачи, чтобы сторож мог назвать их в отчёте о блокировке"""
+    if not WATCHDOG.enabled:
+        return handler
+
+    @functools.wraps(handler)
+    async def wrapper(update, context):
+        task = asyncio.current_task()
+        chat = getattr(update, "effective_chat", None)
+        WATCHDOG.running[task] = (name, chat.id if chat is not None else None)
+        try:
+            return await handler(update, context)
+        finally:
+            WATCHDOG.running.pop(task, None)
+
+    return wrapper
+
+
+WATCHDOG = LoopWatchdog()
+REGISTRY.add_collector(WATCHDOG.collect)
@@ -0,0 +1,151 @@
+import asyncio
+import hmac
+import logging
+import secrets
+import signal
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from telegram import Bot, Update
+from telegram.ext import Application
+
+from .config import (
+    HEALTH_PATH,
+    WEBHOOK_LISTEN,
+    WEBHOOK_PATH,
+    WEBHOOK_PORT,
+    WEBHOOK_SECRET,
+    WEBHOOK_URL,
+)
+from .health import mark_updates_received
+from .http_server import HttpRequest, HttpResponse, HttpServer
+
+log = logging.getLogger(__name__)
+
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+
+
+class WebhookReceiver:
+    """Принимает обновления Telegram по HTTP и передаёт их дальше (в очередь PTB или воркеру кластера)"""
+
+    def __init__(
+        self,
+        bot: Bot,
+        secret: str,
+        deliver: Callable[[Update], Awaitable[None]],
+        status: Optional[Callable[[], Dict[str, Any]]] = None,
+    ):
+        self.bot = bot
+        self.secret = secret
+        self.deliver = deliver
+        self.status = status
+        self.received = 0
+        self.rejected = 0
+        self.last_update_at = 0.0
+
+    async def handle_update(self, request: HttpRequest) -> HttpResponse:
+        token = request.headers.get(SECRET_HEADER, "")
+        if not hmac.compare_digest(token.encode(), self.secret.encode()):
+            self.rejected += 1
+            return HttpResponse.text("forbidden", 403)
+        try:
+            update = Update.de_json(request.json(), self.bot)
+        except (ValueError, TypeError, KeyError) as e:
+            log.warning("Некорректное обновление: %s", e)
+            return HttpResponse.text("bad update", 400)
+        # Отвечаем сразу: обработка идёт в фоне, Telegram не ждёт хендлеры
+        await self.deliver(update)
+        mark_updates_received()
+        self.received += 1
+        self.last_update_at = time.time()
+        return HttpResponse(200)
+
+    async def health(self, request: HttpRequest) -> HttpResponse:
+        data: Dict[str, Any] = {
+            "status": "ok",
+            "updates": self.received,
+            "rejected": self.rejected,
+            "last_update_at": self.last_update_at,
+        }
+        if self.status is not None:
+            data.update(self.status())
+        return HttpResponse.json(data)
+
+
+def webhook_server(receiver: WebhookReceiver, port: int = WEBHOOK_PORT) -> HttpServer:
+    server = HttpServer(WEBHOOK_LISTEN, port)
+    server.route("POST", WEBHOOK_PATH, receiver.handle_update)
+    server.route("GET", HEALTH_PATH, receiver.health)
+    server.receiver = receiver  # type: ignore[attr-defined]
+    return server
+
+
+def build_webhook_server(app: Application, secret: str, port: int = WEBHOOK_PORT) -> HttpServer:
+    receiver = WebhookReceiver(app.bot, secret, app.update_queue.put, lambda: {"running": app.running})
+    return webhook_server(receiver, port)
+
+
+def webhook_secret() -> str:
+    """Секрет заголовка X-Telegram-Bot-Api-Secret-Token.
+
+    Сгенерировать его можно, только когда бот сам регистрирует вебхук (SLOVLI_WEBHOOK_URL):
+    иначе секрет нужно знать прокси или отправителю обновлений, а в логах он скрыт.
+    """
+    if WEBHOOK_SECRET:
+        return WEBHOOK_SECRET
+    if not WEBHOOK_URL:
+        raise RuntimeError(
+            "Без SLOVLI_WEBHOOK_URL нужен SLOVLI_WEBHOOK_SECRET: вебхук регистрирует не бот, "
+            "и отправитель обновлений должен знать секрет"
+        )
+    return secrets.token_urlsafe(32)
+
+
+async def register_webhook(bot: Bot, secret: str, path: str = WEBHOOK_PATH) -> None:
+    """Сообщить Telegram адрес вебхука, если задан публичный URL"""
+    if WEBHOOK_URL:
+        await bot.set_webhook(
+            url=WEBHOOK_URL.rstrip("/") + path,
+            secret_token=secret,
+            allowed_updates=Update.ALL_TYPES,
+        )
+
+
+def stop_on_signals(stop: asyncio.Event) -> None:
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows
+            pass
+
+
+async def serve_webhook(app: Application, secret: str, port: int = WEBHOOK_PORT) -> None:
+    """Запуск, работа до SIGINT/SIGTERM и корректная остановка бота в режиме вебхука"""
+    stop = asyncio.Event()
+    stop_on_signals(stop)
+
+    await app.initialize()
+    if app.post_init:
+        await app.post_init(app)
+    server = build_webhook_server(app, secret, port)
+    try:
+        await app.start()
+        await server.start()
+        await register_webhook(app.bot, secret)
+        log.info("Вебхук слушает %s:%s%s, health: %s", WEBHOOK_LISTEN, server.port, WEBHOOK_PATH, HEALTH_PATH)
+        await stop.wait()
+    finally:
+        # Сначала перестаём принимать обновления, затем дорабатываем очередь
+        await server.stop()
+        if app.running:
+            await app.stop()
+        if app.post_stop:
+            await app.post_stop(app)
+        await app.shutdown()
+        if app.post_shutdown:
+            await app.post_shutdown(app)
+
+
+def run_webhook(app: Application) -> None:
+    asyncio.run(serve_webhook(app, webhook_secret()))